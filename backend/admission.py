@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Admission control for the quality endpoint
+Bounds the frames being processed (`max_in_flight`) and the frames waiting for
+a slot (`max_queue`). A frame beyond either bound, or one that waited past its
+deadline, is shed right away with a retry hint instead of queueing behind
+preprocessing and inference, so under overload the latency of admitted frames
+stays bounded and the UI keeps getting fresh feedback.
+AsyncAdmissionController does the same with coroutines for the asyncio server.
+"""
+
+import asyncio
+import random
+import threading
+import time
+from collections import Counter, deque
+
+
+class AdmissionRejected(RuntimeError):
+    """Raised when a frame is shed (maps to HTTP 429)"""
+
+    def __init__(self, reason, retry_after_ms):
+        super().__init__(f'Server overloaded ({reason}), retry in {retry_after_ms}ms')
+        self.reason = reason
+        self.retry_after_ms = retry_after_ms
+
+
+class AdmissionMetrics:
+    """
+    Thread-safe admitted/shed counters shared by both controllers
+
+    The recent shed rate is computed over one-second buckets covering the last
+    `window_seconds`.
+    """
+
+    def __init__(self, window_seconds=10):
+        self.window_seconds = window_seconds
+        self._lock = threading.Lock()
+        self._admitted = 0
+        self._shed = Counter()
+        self._queue_waits_ms = deque(maxlen=1000)  # Recent samples for percentiles
+        self._buckets = deque()  # [second, requests, shed]
+
+    def _bucket(self):
+        second = int(time.monotonic())
+        if not self._buckets or self._buckets[-1][0] != second:
+            self._buckets.append([second, 0, 0])
+            while self._buckets[0][0] <= second - self.window_seconds:
+                self._buckets.popleft()
+        return self._buckets[-1]
+
+    def record_admitted(self, queue_wait_ms):
+        with self._lock:
+            self._admitted += 1
+            self._queue_waits_ms.append(queue_wait_ms)
+            self._bucket()[1] += 1
+
+    def record_shed(self, reason, counted_before=False):
+        """counted_before: the frame was admitted earlier (dropped at its deadline)"""
+        with self._lock:
+            self._shed[reason] += 1
+            bucket = self._bucket()
+            bucket[2] += 1
+            if not counted_before:
+                bucket[1] += 1
+
+    def snapshot(self):
+        with self._lock:
+            waits = sorted(self._queue_waits_ms)
+            admitted, shed = self._admitted, dict(self._shed)
+            now = int(time.monotonic())
+            recent = [b for b in self._buckets if b[0] > now - self.window_seconds]
+            recent_requests = sum(b[1] for b in recent)
+            recent_shed = sum(b[2] for b in recent)
+
+        total_shed = sum(shed.values())
+        requests = admitted + total_shed - shed.get('deadline', 0)  # Deadline drops were admitted first
+        return {
+            'admitted': admitted,
+            'shed': total_shed,
+            'shed_by_reason': shed,
+            'shed_rate': round(total_shed / requests, 4) if requests else None,
+            'recent_shed_rate': round(recent_shed / recent_requests, 4) if recent_requests else None,
+            'recent_window_seconds': self.window_seconds,
+            'queue_wait_ms': {
+                'p50': round(waits[len(waits) // 2], 2) if waits else None,
+                'p99': round(waits[min(len(waits) - 1, int(len(waits) * 0.99))], 2) if waits else None,
+                'max': round(waits[-1], 2) if waits else None
+            }
+        }
+
+
+class _AdmissionBase:
+    """
+    Limits and shedding shared by both controllers
+
+    Args:
+        max_in_flight: frames processed concurrently
+        max_queue: frames waiting for a slot; beyond it frames are shed at once
+        max_queue_wait_ms: longest a frame waits for a slot before it is shed
+        retry_after_ms: retry hint sent with a shed frame (plus up to 50% jitter,
+            so shed clients do not come back in lockstep)
+    """
+
+    def __init__(self, max_in_flight=16, max_queue=32, max_queue_wait_ms=500.0, retry_after_ms=1000):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.max_queue_wait_s = max_queue_wait_ms / 1000.0
+        self.retry_after_ms = retry_after_ms
+        self._metrics = AdmissionMetrics()
+        self._in_flight = 0
+
+    def _reject(self, reason, counted_before=False):
+        self._metrics.record_shed(reason, counted_before)
+        return AdmissionRejected(reason, int(self.retry_after_ms * random.uniform(1.0, 1.5)))
+
+    def _wait_deadline(self, deadline):
+        wait_deadline = time.monotonic() + self.max_queue_wait_s
+        return wait_deadline if deadline is None else min(wait_deadline, deadline)
+
+    def check_deadline(self, deadline):
+        """
+        Drop an admitted frame whose deadline passed (e.g. before inference)
+
+        Raises:
+            AdmissionRejected: the deadline passed
+        """
+        if deadline is not None and time.monotonic() > deadline:
+            raise self._reject('deadline', counted_before=True)
+
+    def stats(self):
+        stats = self._metrics.snapshot()
+        stats.update({
+            'max_in_flight': self.max_in_flight,
+            'max_queue': self.max_queue,
+            'max_queue_wait_ms': self.max_queue_wait_s * 1000,
+            'in_flight': self._in_flight,
+            'waiting': self._waiting_count()
+        })
+        return stats
+
+
+class AdmissionController(_AdmissionBase):
+    """Admission control for request threads (Flask / gunicorn gthread workers)"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cond = threading.Condition()
+        self._waiting = 0
+
+    def _waiting_count(self):
+        return self._waiting
+
+    def admit(self, deadline=None):
+        """
+        Take a processing slot, waiting for one if needed; pair with release()
+
+        Args:
+            deadline: time.monotonic() by which the frame is stale (None = none)
+
+        Raises:
+            AdmissionRejected: queue full, or no slot before the queue wait /
+                deadline ran out
+        """
+        start = time.monotonic()
+        with self._cond:
+            if self._in_flight < self.max_in_flight and not self._waiting:
+                self._in_flight += 1
+                self._metrics.record_admitted(0.0)
+                return
+            if self._waiting >= self.max_queue:
+                raise self._reject('queue_full')
+
+            wait_deadline = self._wait_deadline(deadline)
+            self._waiting += 1
+            try:
+                while self._in_flight >= self.max_in_flight:
+                    remaining = wait_deadline - time.monotonic()
+                    if remaining <= 0:
+                        if self._in_flight < self.max_in_flight:
+                            self._cond.notify()  # Pass on a release() wakeup this waiter may have taken
+                        raise self._reject('queue_timeout')
+                    self._cond.wait(remaining)
+                self._in_flight += 1
+            finally:
+                self._waiting -= 1
+        self._metrics.record_admitted((time.monotonic() - start) * 1000)
+
+    def release(self):
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify()
+
+
+class AsyncAdmissionController(_AdmissionBase):
+    """
+    Admission control for coroutines on one event loop
+
+    A released slot is handed straight to the oldest waiter, so waiters are
+    admitted in arrival order.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._waiters = deque()
+
+    def _waiting_count(self):
+        return len(self._waiters)
+
+    async def admit(self, deadline=None):
+        """Coroutine form of AdmissionController.admit(); pair with release()"""
+        if self._in_flight < self.max_in_flight and not self._waiters:
+            self._in_flight += 1
+            self._metrics.record_admitted(0.0)
+            return
+        if len(self._waiters) >= self.max_queue:
+            raise self._reject('queue_full')
+
+        start = time.monotonic()
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, max(0.0, self._wait_deadline(deadline) - start))
+        except asyncio.TimeoutError:
+            if not waiter.done() or waiter.cancelled():
+                raise self._reject('queue_timeout')
+            # Handed a slot as the wait timed out: keep it
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()  # Handed a slot, then the request was cancelled: pass it on
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+        self._metrics.record_admitted((time.monotonic() - start) * 1000)
+
+    def release(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)  # Slot passes to the waiter; in-flight count unchanged
+                return
+        self._in_flight -= 1
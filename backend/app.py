@@ -4,24 +4,32 @@ Flask backend for Facial Data Collection app
 Handles session creation, chunked video uploads, and metadata storage
 """
 
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, g, request, jsonify, send_from_directory
 from flask_cors import CORS
+from werkzeug.http import parse_content_range_header
 import os
 import json
 import uuid
+import time
 from datetime import datetime
 from pathlib import Path
 import shutil
-import base64
-import io
-import numpy as np
-from PIL import Image
-import tritonclient.http as httpclient
 import logging  # #claude
 from logging.handlers import RotatingFileHandler  # #claude
-import gc  # #claude: Explicit garbage collection to prevent memory leaks
-import cv2  # #claude: OpenCV for face detection
-from face_preprocessing import preprocess_with_face_detection  # #claude: New face detection pipeline
+import cv2
+import numpy as np
+from face_preprocessing import preprocess_with_face_detection, preprocess_batch, decode_image_bytes, FaceDetectorPool, TensorArena, COMMON_RESOLUTIONS, ROI_DETECTION_SIZE, detection_size  # #claude: New face detection pipeline
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from batcher import MicroBatcher, BatcherFullError
+from frame_cache import NearDuplicateCache, ResultCache, SharedResultCache, content_hash, perceptual_hash
+from face_tracking import FaceTracker
+from check_interval import CheckIntervalAdvisor
+from admission import AdmissionController, AdmissionRejected
+from chunk_manifest import ChunkManifest, UploadMismatch
+from upload_storage import FSYNC_POLICIES, commit_file, part_path, reassemble_chunks, remove_stale_uploads, same_chunk, save_chunk, write_chunk_at
+from inference_backends import create_inference_backend, FallbackBackend, InferenceNotReadyError
+import metrics
 
 # Serve frontend static files from ../frontend directory
 app = Flask(__name__, static_folder='../frontend', static_url_path='')
@@ -59,200 +67,287 @@ BASE_DATA_DIR.mkdir(parents=True, exist_ok=True)
 CAMERA_TEST_DIR = Path(__file__).parent.parent / 'data' / 'camera_tests'
 CAMERA_TEST_DIR.mkdir(parents=True, exist_ok=True)
 
+# Direct-offset uploads (chunk_size given) size their .part file (sparse) to total_chunks * chunk_size on the first chunk
+MAX_UPLOAD_BYTES = int(os.environ.get('MAX_UPLOAD_BYTES', str(1024 ** 3)))  # Largest video accepted in that layout
+UPLOAD_STALE_HOURS = float(os.environ.get('UPLOAD_STALE_HOURS', '24'))  # Abandoned uploads' chunk directories / .part files are removed after this long idle
+UPLOAD_COMPLETED_TTL = float(os.environ.get('UPLOAD_COMPLETED_TTL', '3600'))  # Seconds a completed upload answers resent chunks; later, its video_id uploads anew
+UPLOAD_SWEEP_INTERVAL = 3600  # Seconds between stale-upload sweeps (per worker, on session creation)
+UPLOAD_FSYNC = os.environ.get('UPLOAD_FSYNC', 'none')  # Completed videos: 'none' (page cache), 'end' (fsync before reporting complete) or 'chunk' (also per chunk while reassembling)
+if UPLOAD_FSYNC not in FSYNC_POLICIES:
+    raise ValueError(f"Unknown UPLOAD_FSYNC: {UPLOAD_FSYNC} (expected {', '.join(FSYNC_POLICIES)})")
+
 # Triton Inference Server configuration
 TRITON_URL = os.environ.get('TRITON_URL', 'localhost:8003')
 TRITON_MODEL_NAME = 'efficient_fiqa'
 TRITON_MODEL_VERSION = '1'
-
-# ImageNet normalization stats (used by Efficient-FIQA)
-IMAGENET_MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
-IMAGENET_STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
+TRITON_POOL_SIZE = int(os.environ.get('TRITON_POOL_SIZE', '16'))  # Max keep-alive clients (one per in-flight request)
+TRITON_READINESS_INTERVAL = float(os.environ.get('TRITON_READINESS_INTERVAL', '2.0'))  # Seconds between background readiness checks
+
+# Inference backend: 'triton' (GPU server), 'onnxruntime' or 'opencv' (in-process CPU)
+INFERENCE_BACKEND = os.environ.get('INFERENCE_BACKEND', 'triton')
+INFERENCE_FALLBACK = os.environ.get('INFERENCE_FALLBACK', '')  # e.g. 'onnxruntime' to serve from CPU while Triton is down
+ONNX_MODEL_PATH = Path(os.environ.get('ONNX_MODEL_PATH', Path(__file__).parent.parent / 'ai-models' / 'efficient_fiqa_student.onnx'))
+CPU_INTRA_OP_THREADS = int(os.environ.get('CPU_INTRA_OP_THREADS', '0')) or None  # ONNX Runtime threads per inference; None = half the cores
+
+# Server-side micro-batching (see ai-models/triton_models/efficient_fiqa/config.pbtxt: max_batch_size 16, preferred 4/8)
+BATCHING_ENABLED = os.environ.get('BATCHING_ENABLED', '1') == '1'
+BATCH_MAX_SIZE = int(os.environ.get('BATCH_MAX_SIZE', '8'))          # Frames per Triton request
+BATCH_MAX_WAIT_MS = float(os.environ.get('BATCH_MAX_WAIT_MS', '5'))  # Max time the first frame waits for a batch
+BATCH_MAX_QUEUE = int(os.environ.get('BATCH_MAX_QUEUE', '256'))      # Queued frames before rejecting with 503
+BATCH_DISPATCHERS = int(os.environ.get('BATCH_DISPATCHERS', '2'))    # Concurrent batches (= Triton instance count)
+BINARY_FRAME_MIMETYPES = ('application/octet-stream', 'image/jpeg', 'image/webp', 'image/png')
+QUALITY_BATCH_MAX_FRAMES = 16  # Frames per /api/quality/check_batch request (= model max_batch_size)
+TENSOR_ARENA_PREALLOCATE = int(os.environ.get('TENSOR_ARENA_PREALLOCATE', '16'))  # Input buffers allocated at startup
+PREPROCESS_THREADS = int(os.environ.get('PREPROCESS_THREADS', '4'))  # Parallel decode + detection per batch request
+
+# Admission control for /api/quality/check (per worker process): beyond these bounds frames get a fast 429
+QUALITY_MAX_IN_FLIGHT = int(os.environ.get('QUALITY_MAX_IN_FLIGHT', '16'))  # Frames preprocessed/scored at once (0 = no admission control)
+QUALITY_MAX_QUEUE = int(os.environ.get('QUALITY_MAX_QUEUE', '32'))  # Frames waiting for a slot
+QUALITY_MAX_QUEUE_WAIT_MS = float(os.environ.get('QUALITY_MAX_QUEUE_WAIT_MS', '500'))  # Longest wait for a slot
+QUALITY_DEADLINE_MS = float(os.environ.get('QUALITY_DEADLINE_MS', '0'))  # Drop frames older than this before inference (0 = only a client X-Deadline-Ms)
+QUALITY_RETRY_AFTER_MS = int(os.environ.get('QUALITY_RETRY_AFTER_MS', '1000'))  # next_check_ms hint sent with a 429
+
+# Per-session near-duplicate frame cache (frames must carry a session_id)
+FRAME_CACHE_ENABLED = os.environ.get('FRAME_CACHE_ENABLED', '1') == '1'
+FRAME_CACHE_MAX_DISTANCE = int(os.environ.get('FRAME_CACHE_MAX_DISTANCE', '8'))  # Hamming distance out of 256 hash bits
+FRAME_CACHE_TTL_SECONDS = float(os.environ.get('FRAME_CACHE_TTL_SECONDS', '10'))  # Never reuse a result older than this
+FRAME_CACHE_ENTRIES_PER_SESSION = 4
+FRAME_CACHE_MAX_SESSIONS = 1000
+
+# Exact-repeat result cache: same frame bytes (client retries, service-worker replays) from any session
+RESULT_CACHE_ENABLED = os.environ.get('RESULT_CACHE_ENABLED', '1') == '1'
+RESULT_CACHE_MAX_MB = float(os.environ.get('RESULT_CACHE_MAX_MB', '32'))  # Memory bound for cached responses
+RESULT_CACHE_SHARED = os.environ.get('RESULT_CACHE_SHARED', '1') == '1'  # Shared-memory segment for all gunicorn workers (created before fork)
+CACHEABLE_STATUSES = ('OK', 'NO_FACE', 'MULTIPLE_FACES', 'PARTIAL_FACE', 'FACE_TOO_SMALL')  # Never cache ERROR
+
+# Adaptive check interval: each response recommends next_check_ms from the session's score/face stability
+ADAPTIVE_INTERVAL_ENABLED = os.environ.get('ADAPTIVE_INTERVAL_ENABLED', '1') == '1'
+QUALITY_CHECK_INTERVAL_MS = int(os.environ.get('QUALITY_CHECK_INTERVAL_MS', '2000'))  # Frames without a session / new sessions
+QUALITY_CHECK_MIN_MS = int(os.environ.get('QUALITY_CHECK_MIN_MS', '1500'))  # No face, poor or changing score
+QUALITY_CHECK_MAX_MS = int(os.environ.get('QUALITY_CHECK_MAX_MS', '6000'))  # Steady, good score and still face
 
 # Face detection configuration (YuNet)  # #claude
 FACE_DETECTOR_MODEL_PATH = Path(__file__).parent.parent / 'ai-models' / 'yunet' / 'face_detection_yunet_2023mar.onnx'  # #claude
 FACE_DETECTION_CONF_THRESHOLD = 0.6  # Minimum confidence for face detection  # #claude
 FACE_DETECTION_NMS_THRESHOLD = 0.3   # Non-maximum suppression threshold  # #claude
 MIN_FACE_SIZE_RATIO = 0.12           # Minimum face size (12% of frame width)  # #claude
-CROP_MARGIN_RATIO = 0.20             # 20% margin around face bbox  # #claude
 MULTI_FACE_AMBIGUITY_RATIO = 0.35    # If 2nd face > 35% of largest, reject as ambiguous  # #claude
 MAX_PADDING_RATIO = 0.10             # Max acceptable padding (10% of crop area)  # #claude
-
-# Initialize face detector (lazy loading in function)  # #claude
-_face_detector = None  # #claude
-
-def get_face_detector():  # #claude
-    """Get or initialize the YuNet face detector (singleton pattern)"""  # #claude
-    global _face_detector  # #claude
-    if _face_detector is None:  # #claude
-        if not FACE_DETECTOR_MODEL_PATH.exists():  # #claude
-            raise FileNotFoundError(f"Face detector model not found: {FACE_DETECTOR_MODEL_PATH}")  # #claude
-        _face_detector = cv2.FaceDetectorYN.create(  # #claude
-            str(FACE_DETECTOR_MODEL_PATH),  # #claude
-            "",  # config (empty for ONNX)  # #claude
-            (320, 320),  # default input size (will be updated per frame)  # #claude
-            FACE_DETECTION_CONF_THRESHOLD,  # #claude
-            FACE_DETECTION_NMS_THRESHOLD  # #claude
-        )  # #claude
-        logger.info(f"✅ Face detector initialized: {FACE_DETECTOR_MODEL_PATH.name}")  # #claude
-    return _face_detector  # #claude
+MAX_FRAME_PIXELS = int(os.environ.get('MAX_FRAME_PIXELS', str(4096 * 4096)))  # Larger frames are rejected from the image header
+FACE_DETECTION_LONG_SIDE = int(os.environ.get('FACE_DETECTION_LONG_SIDE', '480'))  # Downscale long side for YuNet (0 = full resolution); crop stays full-res
+FACE_DETECTOR_WARM_PER_RESOLUTION = int(os.environ.get('FACE_DETECTOR_WARM_PER_RESOLUTION', '2'))  # Preloaded YuNet instances per common resolution
+
+# Per-session face tracking: search only around the last face (frames must carry a session_id)
+FACE_TRACKING_ENABLED = os.environ.get('FACE_TRACKING_ENABLED', '1') == '1'
+FACE_TRACKING_FULL_EVERY = int(os.environ.get('FACE_TRACKING_FULL_EVERY', '10'))  # Full-frame detection at least every N frames
+# Stale tracks trigger a full-frame pass; kept at least 1.5x the longest recommended check interval, so
+# sessions backed off to QUALITY_CHECK_MAX_MS (steady and good) keep their ROI and reduced decode
+FACE_TRACKING_MAX_AGE_SECONDS = max(float(os.environ.get('FACE_TRACKING_MAX_AGE_SECONDS', '5')), 1.5 * QUALITY_CHECK_MAX_MS / 1000)
+FACE_TRACKING_ROI_SCALE = 2.0  # Search region side = 2x the tracked face
+FACE_TRACKING_MAX_SESSIONS = 1000
+
+# Initialize face detector pool (lazy loading in function)
+_face_detector = None
+_face_detector_lock = threading.Lock()
+
+def get_face_detector():
+    """Get or initialize the YuNet detector pool (singleton pattern, one detector per in-flight frame and resolution)"""
+    global _face_detector
+    if _face_detector is None:
+        with _face_detector_lock:
+            if _face_detector is None:
+                if not FACE_DETECTOR_MODEL_PATH.exists():
+                    raise FileNotFoundError(f"Face detector model not found: {FACE_DETECTOR_MODEL_PATH}")
+                _face_detector = FaceDetectorPool(
+                    FACE_DETECTOR_MODEL_PATH,
+                    FACE_DETECTION_CONF_THRESHOLD,
+                    FACE_DETECTION_NMS_THRESHOLD,
+                    warm_resolutions=sorted({detection_size(w, h, FACE_DETECTION_LONG_SIDE) for w, h in COMMON_RESOLUTIONS} |
+                                            ({(ROI_DETECTION_SIZE, ROI_DETECTION_SIZE)} if FACE_TRACKING_ENABLED else set())),
+                    warm_per_resolution=FACE_DETECTOR_WARM_PER_RESOLUTION
+                )
+                logger.info(f"✅ Face detector pool initialized: {FACE_DETECTOR_MODEL_PATH.name} ({_face_detector.stats()})")
+    return _face_detector
+
+# Preallocated model-input buffers, reused across requests (bounded by peak concurrency)
+tensor_arena = TensorArena(preallocate=TENSOR_ARENA_PREALLOCATE)
+
+# Worker threads for per-frame decode + detection in batch requests (lazy loading in function)
+_preprocess_executor = None
+_preprocess_executor_lock = threading.Lock()
+
+def get_preprocess_executor():
+    """Get or create the preprocessing thread pool (singleton pattern)"""
+    global _preprocess_executor
+    if _preprocess_executor is None:
+        with _preprocess_executor_lock:
+            if _preprocess_executor is None:
+                _preprocess_executor = ThreadPoolExecutor(max_workers=PREPROCESS_THREADS, thread_name_prefix='preprocess')
+    return _preprocess_executor
+
+frame_cache = NearDuplicateCache(
+    max_distance=FRAME_CACHE_MAX_DISTANCE,
+    ttl_seconds=FRAME_CACHE_TTL_SECONDS,
+    entries_per_session=FRAME_CACHE_ENTRIES_PER_SESSION,
+    max_sessions=FRAME_CACHE_MAX_SESSIONS
+) if FRAME_CACHE_ENABLED else None
+
+admission = AdmissionController(
+    max_in_flight=QUALITY_MAX_IN_FLIGHT,
+    max_queue=QUALITY_MAX_QUEUE,
+    max_queue_wait_ms=QUALITY_MAX_QUEUE_WAIT_MS,
+    retry_after_ms=QUALITY_RETRY_AFTER_MS
+) if QUALITY_MAX_IN_FLIGHT > 0 else None
+
+result_cache = (SharedResultCache if RESULT_CACHE_SHARED else ResultCache)(
+    max_bytes=int(RESULT_CACHE_MAX_MB * 1024 * 1024)
+) if RESULT_CACHE_ENABLED else None
+
+check_interval = CheckIntervalAdvisor(
+    default_ms=QUALITY_CHECK_INTERVAL_MS,
+    min_ms=QUALITY_CHECK_MIN_MS,
+    max_ms=QUALITY_CHECK_MAX_MS
+) if ADAPTIVE_INTERVAL_ENABLED else None
+
+face_tracker = FaceTracker(
+    roi_scale=FACE_TRACKING_ROI_SCALE,
+    full_every=FACE_TRACKING_FULL_EVERY,
+    max_age_seconds=FACE_TRACKING_MAX_AGE_SECONDS,
+    max_sessions=FACE_TRACKING_MAX_SESSIONS
+) if FACE_TRACKING_ENABLED else None
+
+# Persistent Triton client pool (lazy loading in function)
+_triton_pool = None
+_triton_pool_lock = threading.Lock()
+
+def get_triton_pool():
+    """Get or initialize the shared Triton client pool (singleton pattern)"""
+    global _triton_pool
+    if _triton_pool is None:
+        with _triton_pool_lock:
+            if _triton_pool is None:
+                from triton_pool import TritonClientPool  # tritonclient is not needed on CPU-only nodes
+                _triton_pool = TritonClientPool(
+                    TRITON_URL,
+                    TRITON_MODEL_NAME,
+                    TRITON_MODEL_VERSION,
+                    size=TRITON_POOL_SIZE,
+                    readiness_interval=TRITON_READINESS_INTERVAL
+                ).start()
+                logger.info(f"✅ Triton client pool initialized: {TRITON_URL} (size={TRITON_POOL_SIZE}, ready={_triton_pool.is_ready()})")
+    return _triton_pool
+
+# Inference backend selected by config (lazy loading in function)
+_inference_backend = None
+_inference_backend_lock = threading.Lock()
+
+def _create_backend(name):
+    return create_inference_backend(
+        name,
+        model_path=ONNX_MODEL_PATH,
+        triton_pool_factory=get_triton_pool,
+        intra_op_threads=CPU_INTRA_OP_THREADS,
+        max_batch_size=QUALITY_BATCH_MAX_FRAMES,
+        num_buffers=BATCH_DISPATCHERS
+    )
+
+def get_inference_backend():
+    """Get or initialize the configured inference backend (singleton pattern)"""
+    global _inference_backend
+    if _inference_backend is None:
+        with _inference_backend_lock:
+            if _inference_backend is None:
+                backend = _create_backend(INFERENCE_BACKEND)
+                if INFERENCE_FALLBACK and INFERENCE_FALLBACK != INFERENCE_BACKEND:
+                    backend = FallbackBackend(backend, _create_backend(INFERENCE_FALLBACK))
+                _inference_backend = backend
+                logger.info(f"✅ Inference backend: {backend.name}")
+    return _inference_backend
+
+# Micro-batcher in front of the inference backend (lazy loading in function)
+_batcher = None
+_batcher_lock = threading.Lock()
+
+def get_batcher():
+    """Get or initialize the shared micro-batcher (singleton pattern)"""
+    global _batcher
+    if _batcher is None:
+        backend = get_inference_backend()
+        with _batcher_lock:
+            if _batcher is None:
+                _batcher = MicroBatcher(
+                    backend.infer,
+                    max_batch_size=BATCH_MAX_SIZE,
+                    max_wait_ms=BATCH_MAX_WAIT_MS,
+                    max_queue_size=BATCH_MAX_QUEUE,
+                    num_dispatchers=BATCH_DISPATCHERS
+                ).start()
+    return _batcher
+
+def run_quality_inference(img_tensor):
+    """Score one preprocessed (1, 3, 352, 352) tensor, batched with concurrent requests if enabled"""
+    if BATCHING_ENABLED:
+        return get_batcher().infer(img_tensor, timeout=30)
+    return float(get_inference_backend().infer(img_tensor)[0])
 
 # ============================================================================
-# Face Detection Helper Functions  # #claude
+# Pre-fork server lifecycle (gunicorn.conf.py)
 # ============================================================================
 
-def detect_faces(img_bgr):  # #claude
-    """  # #claude
-    Detect faces in an image using YuNet  # #claude
-
-    Args:  # #claude
-        img_bgr: numpy array in BGR format (OpenCV format)  # #claude
-
-    Returns:  # #claude
-        list of dicts with keys: bbox (x, y, w, h), confidence, landmarks (5 points)  # #claude
-        Empty list if no faces detected  # #claude
-    """  # #claude
-    detector = get_face_detector()  # #claude
-    height, width = img_bgr.shape[:2]  # #claude
-
-    # Update detector input size to match frame  # #claude
-    detector.setInputSize((width, height))  # #claude
-
-    # Detect faces  # #claude
-    _, faces = detector.detect(img_bgr)  # #claude
-
-    if faces is None:  # #claude
-        return []  # #claude
-
-    # Parse results  # #claude
-    detected_faces = []  # #claude
-    for face in faces:  # #claude
-        # YuNet output: [x, y, w, h, x_re, y_re, x_le, y_le, x_nt, y_nt, x_rcm, y_rcm, x_lcm, y_lcm, conf]  # #claude
-        # First 4: bbox, next 10: 5 landmarks (right_eye, left_eye, nose_tip, right_mouth, left_mouth), last: confidence  # #claude
-        x, y, w, h = face[:4].astype(int)  # #claude
-        confidence = float(face[14])  # #claude
-        landmarks = face[4:14].reshape(5, 2).astype(int)  # 5 keypoints (x, y)  # #claude
-
-        detected_faces.append({  # #claude
-            'bbox': (x, y, w, h),  # #claude
-            'confidence': confidence,  # #claude
-            'landmarks': landmarks,  # #claude
-            'area': w * h  # #claude
-        })  # #claude
-
-    # Sort by area (largest first)  # #claude
-    detected_faces.sort(key=lambda f: f['area'], reverse=True)  # #claude
-    return detected_faces  # #claude
-
-def select_best_face(faces, img_shape):  # #claude
-    """  # #claude
-    Select the best face for quality assessment  # #claude
-
-    Prioritizes: center position, size, confidence  # #claude
-
-    Returns:  # #claude
-        Selected face dict or None  # #claude
-    """  # #claude
-    if not faces:  # #claude
-        return None  # #claude
-
-    height, width = img_shape[:2]  # #claude
-    frame_center_x, frame_center_y = width / 2, height / 2  # #claude
-
-    # Calculate score for each face  # #claude
-    for face in faces:  # #claude
-        x, y, w, h = face['bbox']  # #claude
-        center_x = x + w / 2  # #claude
-        center_y = y + h / 2  # #claude
-
-        # Distance from frame center (normalized)  # #claude
-        dist_from_center = np.sqrt((center_x - frame_center_x)**2 + (center_y - frame_center_y)**2)  # #claude
-        max_dist = np.sqrt(width**2 + height**2) / 2  # #claude
-        center_weight = 1.0 - (dist_from_center / max_dist)  # #claude
-
-        # Area normalized  # #claude
-        area_norm = face['area'] / (width * height)  # #claude
-
-        # Combined score  # #claude
-        face['selection_score'] = area_norm * center_weight * face['confidence']  # #claude
-
-    # Return face with highest score  # #claude
-    return max(faces, key=lambda f: f['selection_score'])  # #claude
+def preload_models():
+    """
+    Load what workers can share copy-on-write, in the master before fork
 
-def is_ambiguous_multi_face(faces):  # #claude
-    """Check if multiple faces are present and ambiguous (hard to pick one)"""  # #claude
-    if len(faces) < 2:  # #claude
-        return False  # #claude
+    Only the YuNet detector pool is built here. Anything that starts threads
+    (Triton I/O threads, the micro-batcher, ONNX Runtime sessions) must be
+    created after fork, so it is left to warm_up_worker(). OpenCV runs
+    single-threaded while preloading so its thread pool does not exist yet at
+    fork time.
+    """
+    start = time.time()
+    cv2.setNumThreads(1)
+    detector = get_face_detector()
+    import triton_pool  # noqa: F401 - import tritonclient/gevent once in the master; clients are per worker
+    logger.info(f"✅ Preloaded before fork in {(time.time() - start) * 1000:.0f}ms: {detector.stats()}")
 
-    largest_area = faces[0]['area']  # #claude
-    second_area = faces[1]['area']  # #claude
+def warm_up_worker(opencv_threads=None):
+    """
+    Start this worker's inference clients and push one synthetic frame through
+    the pipeline, so the first real request does not pay for lazy setup
 
-    # If 2nd face is >= 35% of largest, consider ambiguous  # #claude
-    return second_area >= (MULTI_FACE_AMBIGUITY_RATIO * largest_area)  # #claude
+    Args:
+        opencv_threads: OpenCV thread count for this worker (None = leave as is)
+    """
+    start = time.time()
+    if opencv_threads:
+        cv2.setNumThreads(opencv_threads)
 
-def square_crop_with_margin(img_bgr, bbox, margin_ratio=CROP_MARGIN_RATIO):  # #claude
-    """  # #claude
-    Create a square crop around face bbox with margin  # #claude
+    backend = get_inference_backend()
+    if BATCHING_ENABLED:
+        get_batcher()
 
-    Args:  # #claude
-        img_bgr: numpy array (BGR)  # #claude
-        bbox: (x, y, w, h)  # #claude
-        margin_ratio: fraction of bbox size to add as margin  # #claude
+    # Decode + detection on a synthetic frame (no face, so stops at NO_FACE), then one inference
+    synthetic_frame = cv2.imencode('.jpg', np.full((480, 640, 3), 128, dtype=np.uint8))[1].tobytes()
+    img_tensor, scratch = slot = tensor_arena.acquire()
+    try:
+        preprocess_frame(synthetic_frame, out=img_tensor, scratch=scratch)
+        if backend.is_ready():
+            img_tensor.fill(0.0)
+            run_quality_inference(img_tensor)
+        else:
+            logger.warning(f"Worker {os.getpid()} warm-up skipped inference: {backend.ready_reason}")
+    except Exception as e:
+        logger.warning(f"Worker {os.getpid()} warm-up inference failed: {e}")
+    finally:
+        tensor_arena.release(slot)
+    logger.info(f"✅ Worker {os.getpid()} warmed up in {(time.time() - start) * 1000:.0f}ms ({backend.name})")
 
-    Returns:  # #claude
-        dict with keys:  # #claude
-            - crop: numpy array (BGR, square)  # #claude
-            - padding_ratio: fraction of crop that was padded (0 = no padding, 1 = all padding)  # #claude
-    """  # #claude
-    x, y, w, h = bbox  # #claude
-    height, width = img_bgr.shape[:2]  # #claude
-
-    # Make square: use the larger dimension  # #claude
-    size = max(w, h)  # #claude
-
-    # Add margin  # #claude
-    margin = int(size * margin_ratio)  # #claude
-    size_with_margin = size + 2 * margin  # #claude
-
-    # Center the square on the face  # #claude
-    center_x = x + w // 2  # #claude
-    center_y = y + h // 2  # #claude
-
-    # Calculate crop boundaries  # #claude
-    x1 = center_x - size_with_margin // 2  # #claude
-    y1 = center_y - size_with_margin // 2  # #claude
-    x2 = x1 + size_with_margin  # #claude
-    y2 = y1 + size_with_margin  # #claude
-
-    # Calculate how much padding is needed  # #claude
-    pad_left = max(0, -x1)  # #claude
-    pad_top = max(0, -y1)  # #claude
-    pad_right = max(0, x2 - width)  # #claude
-    pad_bottom = max(0, y2 - height)  # #claude
-
-    total_padding = pad_left + pad_top + pad_right + pad_bottom  # #claude
-    padding_ratio = total_padding / (4 * size_with_margin)  # Normalized  # #claude
-
-    # Clamp coordinates to image bounds  # #claude
-    x1_clamped = max(0, x1)  # #claude
-    y1_clamped = max(0, y1)  # #claude
-    x2_clamped = min(width, x2)  # #claude
-    y2_clamped = min(height, y2)  # #claude
-
-    # Extract crop  # #claude
-    crop = img_bgr[y1_clamped:y2_clamped, x1_clamped:x2_clamped]  # #claude
-
-    # Add padding if necessary (reflection padding looks more natural)  # #claude
-    if total_padding > 0:  # #claude
-        crop = cv2.copyMakeBorder(  # #claude
-            crop,  # #claude
-            pad_top, pad_bottom, pad_left, pad_right,  # #claude
-            cv2.BORDER_REFLECT_101  # #claude
-        )  # #claude
-
-    return {  # #claude
-        'crop': crop,  # #claude
-        'padding_ratio': padding_ratio  # #claude
-    }  # #claude
+def shutdown_worker():
+    """Stop this worker's batcher and inference clients (graceful worker exit)"""
+    if _batcher is not None:
+        _batcher.stop()
+    if _inference_backend is not None:
+        _inference_backend.close()
 
 # ============================================================================
 # Helper Functions
@@ -273,56 +368,284 @@ def get_chunks_dir(session_id, video_id, video_type='recording'):
     """Get the directory for temporary chunks"""
     return get_session_dir(session_id, video_type) / f"{video_id}_chunks"
 
-def preprocess_image_for_quality_check(image_data):
+_last_upload_sweep = 0.0
+
+def sweep_stale_uploads():
+    """Remove abandoned uploads' leftovers, at most once per UPLOAD_SWEEP_INTERVAL in this worker"""
+    global _last_upload_sweep
+    if time.time() - _last_upload_sweep < UPLOAD_SWEEP_INTERVAL:
+        return
+    _last_upload_sweep = time.time()
+    session_dirs = [d for base_dir in (BASE_DATA_DIR, CAMERA_TEST_DIR) for d in base_dir.iterdir() if d.is_dir()]
+    removed = remove_stale_uploads(session_dirs, UPLOAD_STALE_HOURS * 3600)
+    if removed:
+        logger.info(f"🗑️ Removed {len(removed)} stale upload(s) idle for over {UPLOAD_STALE_HOURS:g}h")
+
+def get_quality_level(quality_score):
+    """Map a 0-1 quality score to poor / acceptable / good"""
+    if quality_score >= 0.7:
+        return 'good'
+    elif quality_score >= 0.5:
+        return 'acceptable'
+    return 'poor'
+
+def get_frame_from_request():
     """
-    Preprocess image for Efficient-FIQA model
+    Extract one encoded frame from a quality check request
 
-    Args:
-        image_data: Base64-encoded image string or PIL Image
+    Supports three request formats:
+        - application/octet-stream, image/jpeg, image/webp, image/png:
+          raw encoded bytes as the request body (no base64, no JSON)
+        - multipart/form-data: file field "image"
+        - application/json: {"image": "data:image/jpeg;base64,..."}
 
     Returns:
-        numpy.ndarray: Preprocessed image tensor (1, 3, 352, 352)
+        bytes (binary formats), str (JSON format) or None if no image was sent
     """
-    image = None  # #claude: Track for cleanup
-    try:
-        # Decode base64 if needed
-        if isinstance(image_data, str):
-            # Remove data URL prefix if present (data:image/png;base64,...)
-            if 'base64,' in image_data:
-                image_data = image_data.split('base64,')[1]
-            image_bytes = base64.b64decode(image_data)
-            image = Image.open(io.BytesIO(image_bytes))
-        else:
-            image = image_data
-
-        # Convert to RGB if needed
-        if image.mode != 'RGB':
-            image = image.convert('RGB')
-
-        # Resize to 352x352 (Efficient-FIQA input size)
-        image = image.resize((352, 352), Image.BILINEAR)
+    if request.mimetype in BINARY_FRAME_MIMETYPES:
+        return request.get_data(cache=False)
+
+    if request.mimetype == 'multipart/form-data':
+        frame_file = request.files.get('image')
+        return frame_file.read() if frame_file else None
+
+    data = request.get_json(silent=True)
+    if not data or 'image' not in data:
+        return None
+    return data['image']
+
+def get_session_id_from_request():
+    """Session id sent with a frame: JSON "session_id", ?session_id= or X-Session-Id header"""
+    session_id = request.args.get('session_id') or request.headers.get('X-Session-Id')
+    if not session_id and request.mimetype == 'application/json':
+        data = request.get_json(silent=True) or {}
+        session_id = data.get('session_id')
+    elif not session_id and request.mimetype == 'multipart/form-data':
+        session_id = request.form.get('session_id')
+    return session_id
 
-        # Convert to numpy array and normalize to [0, 1]
-        img_array = np.array(image, dtype=np.float32) / 255.0
+def request_deadline(deadline_header):
+    """
+    time.monotonic() after which a frame arriving now is stale, from
+    QUALITY_DEADLINE_MS and/or the client's X-Deadline-Ms budget (None = no deadline)
+    """
+    budgets = [QUALITY_DEADLINE_MS] if QUALITY_DEADLINE_MS > 0 else []
+    try:
+        if deadline_header:
+            budgets.append(float(deadline_header))
+    except ValueError:
+        pass  # Malformed header: ignore it
+    return time.monotonic() + min(budgets) / 1000 if budgets else None
+
+def build_overloaded_result(error):
+    """429 body for a shed frame; clients wait next_check_ms before the next frame"""
+    return {
+        'error': str(error),
+        'status': 'OVERLOADED',
+        'reason': error.reason,
+        'next_check_ms': error.retry_after_ms
+    }
+
+def retry_after_header(error):
+    return {'Retry-After': str(max(1, -(-error.retry_after_ms // 1000)))}  # Whole seconds, rounded up
+
+def is_empty_frame(image_data):
+    """Encoder test sends empty/placeholder frames"""
+    return not image_data or image_data in ['data:,', '']
+
+def build_quality_result(preprocess_result=None, quality_score=None, inference_time_ms=0):
+    """
+    Build the per-frame quality check response
 
-        # Apply ImageNet normalization
-        img_array = (img_array - IMAGENET_MEAN) / IMAGENET_STD
+    Args:
+        preprocess_result: dict from preprocess_with_face_detection (None = empty frame)
+        quality_score: model score if the frame was scored
+        inference_time_ms: wall time to report
+    """
+    if preprocess_result is None:
+        return {
+            'status': 'NO_FRAME',
+            'quality_score': None,
+            'quality_level': None,
+            'threshold_met': False,
+            'face_confidence': 0.0,
+            'message': 'No frame data provided',
+            'inference_time_ms': 0
+        }
 
-        # Convert from HWC to CHW format (channels first)
-        img_array = np.transpose(img_array, (2, 0, 1))
+    if preprocess_result['status'] != 'OK' or quality_score is None:
+        return {
+            'status': preprocess_result['status'],
+            'quality_score': None,
+            'quality_level': None,
+            'threshold_met': False,
+            'face_confidence': preprocess_result['face_confidence'],
+            'face_bbox': preprocess_result.get('face_bbox'),
+            'message': preprocess_result['message'],
+            'inference_time_ms': round(inference_time_ms, 2)
+        }
 
-        # Add batch dimension
-        img_array = np.expand_dims(img_array, axis=0)
+    return {
+        'status': 'OK',
+        'quality_score': round(quality_score, 4),
+        'quality_level': get_quality_level(quality_score),
+        'threshold_met': quality_score >= 0.5,
+        'face_confidence': round(preprocess_result['face_confidence'], 4),
+        'face_bbox': preprocess_result['face_bbox'],
+        'message': 'Face quality assessed successfully',
+        'inference_time_ms': round(inference_time_ms, 2)
+    }
+
+def preprocess_frame(image_data, out=None, scratch=None, roi=None, face_size=None):
+    """Run face detection + preprocessing with the configured thresholds, writing the tensor into `out`"""
+    return preprocess_with_face_detection(
+        image_data,
+        get_face_detector(),
+        min_face_ratio=MIN_FACE_SIZE_RATIO,
+        max_padding_ratio=MAX_PADDING_RATIO,
+        multi_face_ambiguity_ratio=MULTI_FACE_AMBIGUITY_RATIO,
+        detection_long_side=FACE_DETECTION_LONG_SIDE,
+        out=out,
+        scratch=scratch,
+        roi=roi,
+        max_image_pixels=MAX_FRAME_PIXELS,
+        face_size=face_size
+    )
+
+def preprocess_frames(frames):
+    """Batch form of preprocess_frame: returns (stacked OK tensors, per-frame results with batch_index)"""
+    return preprocess_batch(
+        frames,
+        get_face_detector(),
+        min_face_ratio=MIN_FACE_SIZE_RATIO,
+        max_padding_ratio=MAX_PADDING_RATIO,
+        multi_face_ambiguity_ratio=MULTI_FACE_AMBIGUITY_RATIO,
+        detection_long_side=FACE_DETECTION_LONG_SIDE,
+        max_image_pixels=MAX_FRAME_PIXELS,
+        executor=get_preprocess_executor()
+    )
+
+def lookup_cached_result(image_data, session_id, timings=None):
+    """
+    Result cache lookup for a frame: an exact repeat of any earlier frame first,
+    then a near-duplicate of a recent frame from the same session
 
-        return img_array
+    Args:
+        timings: optional {stage: ms} dict; the base64 decode is added to it
 
+    Returns:
+        (image_data, cache_key, cached_result): image_data is decoded to bytes
+        when hashed (so preprocessing does not decode base64 again); cache_key
+        is passed on to remember_result(), None when no cache applies
+    """
+    near_duplicates = frame_cache is not None and session_id
+    if result_cache is None and not near_duplicates:
+        return image_data, None, None
+    start = time.perf_counter()
+    try:
+        image_data = decode_image_bytes(image_data)  # Decode base64 once; preprocessing reuses the bytes
+    except Exception:
+        return image_data, None, None  # Preprocessing reports the decode error
+    if timings is not None:
+        timings['base64_decode'] = (time.perf_counter() - start) * 1000
+
+    content_key = content_hash(image_data) if result_cache is not None else None
+    cached = result_cache.lookup(content_key) if content_key is not None else None
+    if cached is None and near_duplicates:
+        frame_hash = perceptual_hash(image_data)
+        cached = frame_cache.lookup(session_id, frame_hash) if frame_hash is not None else None
+    else:
+        frame_hash = None
+    if cached is not None:
+        cached['cached'] = True
+        return image_data, None, cached
+    return image_data, (content_key, frame_hash), None
+
+def preprocess_session_frame(image_data, session_id, out, scratch, timings=None):
+    """
+    preprocess_frame() around the session's tracked face, updating the tracker
+    with the outcome; the per-stage timings are added to `timings` if given
+    """
+    roi = face_size = None
+    if face_tracker is not None and session_id:
+        roi = face_tracker.get_roi(session_id)
+        if roi is None:
+            face_size = face_tracker.get_face_size(session_id)  # Full-frame pass: still sizes the reduced decode
+    preprocess_result = preprocess_frame(image_data, out=out, scratch=scratch, roi=roi, face_size=face_size)
+    if face_tracker is not None and session_id and 'detection' in preprocess_result:
+        face_tracker.update(session_id, preprocess_result.get('face_bbox'), preprocess_result['detection'])
+    metrics.count_preprocess_status(preprocess_result['status'])
+    if timings is not None:
+        for stage, ms in preprocess_result['timings'].items():
+            timings[stage] = timings.get(stage, 0.0) + ms
+    return preprocess_result
+
+def timed_inference(img_tensor, timings):
+    """run_quality_inference(), adding the round trip (batch wait included) to timings['inference']"""
+    start = time.perf_counter()
+    try:
+        return run_quality_inference(img_tensor)
     finally:
-        # #claude: CRITICAL - Close PIL image to free memory
-        if image is not None:
-            try:
-                image.close()
-            except:
-                pass
+        timings['inference'] = (time.perf_counter() - start) * 1000
+
+def quality_response(result, timings, status=200, headers=None):
+    """jsonify() a quality check response, timing the JSON encode and recording the request's stage timings"""
+    start = time.perf_counter()
+    response = jsonify(result)
+    timings['json_encode'] = (time.perf_counter() - start) * 1000
+    metrics.observe_stages(timings)
+    response.status_code = status
+    response.headers.extend(headers or {})
+    return response
+
+def remember_result(session_id, cache_key, result):
+    """Mark a freshly computed result and store it for repeated and near-duplicate frames"""
+    result['cached'] = False
+    if cache_key is None or result['status'] not in CACHEABLE_STATUSES:
+        return
+    content_key, frame_hash = cache_key
+    if content_key is not None:
+        result_cache.store(content_key, result)
+    if frame_hash is not None:
+        frame_cache.store(session_id, frame_hash, result)
+
+def recommend_check_interval(session_id, result):
+    """next_check_ms for a response; called after remember_result() so cached copies do not carry it"""
+    if check_interval is None:
+        return QUALITY_CHECK_INTERVAL_MS
+    return check_interval.recommend(session_id, result)
+
+@app.before_request
+def track_request_start():
+    g.request_start = time.perf_counter()
+    g.timings = {}  # Stage -> ms, filled in by the handler
+    g.in_flight = metrics.IN_FLIGHT.labels(request.endpoint or 'unmatched')
+    g.in_flight.inc()
+
+@app.after_request
+def add_server_timing(response):
+    """
+    Server-Timing header with the request's stage durations (e.g.
+    "decode;dur=2.1, detect;dur=8.4, infer;dur=5.2, total;dur=17.9"), shown
+    by browser devtools; with ?debug_timing=1 a JSON object response also
+    gets the breakdown as "server_timing_ms"
+    """
+    if 'request_start' not in g:
+        return response
+    header, breakdown = metrics.server_timing(g.timings, (time.perf_counter() - g.request_start) * 1000)
+    response.headers['Server-Timing'] = header
+    if request.args.get('debug_timing') == '1' and response.is_json:
+        payload = response.get_json(silent=True)
+        if isinstance(payload, dict):
+            payload['server_timing_ms'] = breakdown
+            response.set_data(app.json.dumps(payload))
+    return response
+
+@app.teardown_request
+def track_request_end(error=None):
+    in_flight = g.pop('in_flight', None)
+    if in_flight is not None:
+        in_flight.dec()
 
 # ============================================================================
 # API Endpoints
@@ -358,6 +681,7 @@ def create_session():
         # Create session directory
         session_dir = get_session_dir(session_id, video_type)  # #claude: Pass video_type
         session_dir.mkdir(parents=True, exist_ok=True)
+        sweep_stale_uploads()
 
         # Create session metadata file
         session_metadata = {
@@ -384,6 +708,111 @@ def create_session():
         logger.exception(f"❌ Failed to create session")  # #claude - logs full traceback
         return jsonify({'error': str(e)}), 500
 
+def upload_complete_response(video_id, video_path, video_type):
+    """The final-chunk response; also answers duplicates of chunks of a finished upload"""
+    base_dir = CAMERA_TEST_DIR if video_type == 'encoder_test' else BASE_DATA_DIR  # #claude: Use correct base dir for relative path
+    return jsonify({
+        'status': 'video_complete',
+        'video_id': video_id,
+        'file_path': str(video_path.relative_to(base_dir))
+    }), 200
+
+def is_resent_chunk(manifest, chunk_index, stream, video_id, video_path):
+    """
+    Whether a chunk is a resend of a chunk of the upload completed under its
+    video_id (tombstone younger than UPLOAD_COMPLETED_TTL, same layout, same
+    bytes as the video at the chunk's offset): nothing to store then. Any
+    other chunk starts a new upload, whose video replaces the old one once
+    complete.
+
+    Returns:
+        (is a resend, the stream to store the chunk from)
+    """
+    tombstone = ChunkManifest.completed_upload(manifest.chunks_dir, UPLOAD_COMPLETED_TTL)
+    if tombstone is None:
+        return False, stream
+    chunk_range = manifest.chunk_range(tombstone, chunk_index)
+    if chunk_range is not None:
+        resent, stream = same_chunk(stream, video_path, *chunk_range)
+        if resent:
+            return True, stream
+    logger.info(f"🔁 New upload of {video_id} (chunk {chunk_index} differs from the completed one): replacing it")
+    manifest.forget_completed()
+    return False, stream
+
+def late_chunk_response(chunk_index, video_id, video_path, video_type, chunks_dir):
+    """Answer a duplicate chunk that arrived while (or after) another request completed the upload"""
+    try:
+        chunks_dir.rmdir()  # Recreated by this request's mkdir after the cleanup (not empty while completing)
+    except OSError:
+        pass
+    logger.info(f"↩️ Chunk {chunk_index} for already complete video {video_id}")
+    return upload_complete_response(video_id, video_path, video_type)
+
+def record_chunk(manifest, chunk_index, video_id, video_path, video_type, direct):
+    """
+    Record a stored chunk in the upload's manifest; the chunk that completes the
+    upload reassembles (or, direct-offset, commits) the video
+
+    Returns:
+        the chunk request's response
+    """
+    chunks_dir, total_chunks = manifest.chunks_dir, manifest.total_chunks
+    try:
+        # O(1) progress, persisted, shared by all workers
+        received_chunks = manifest.mark_received(chunk_index)
+    except ValueError as e:
+        logger.error(f"❌ Chunk manifest mismatch for {video_id}: {e}")
+        return jsonify({'error': str(e)}), 409
+    except FileNotFoundError:
+        if not os.path.exists(manifest.completed_path):
+            raise
+        return late_chunk_response(chunk_index, video_id, video_path, video_type, chunks_dir)
+    logger.info(f"📊 Progress: {received_chunks}/{total_chunks} chunks received for {video_id}")  # #claude
+
+    if received_chunks < total_chunks:
+        return jsonify({
+            'status': 'chunk_received',
+            'chunk_index': chunk_index,
+            'total_chunks': total_chunks,
+            'received': received_chunks
+        }), 200
+
+    # Exactly one request completes the video: concurrent final chunks (and retries) wait here
+    with manifest.completing() as complete:
+        if complete:
+            reassembly_start = time.perf_counter()
+            if direct:
+                # Every chunk is already in place: completion is a rename
+                commit_file(part_path(video_path), video_path, UPLOAD_FSYNC)
+            else:
+                # Reassemble video (in-kernel copies; never more than a small buffer in Python)
+                logger.info(f"🔧 Starting video reassembly: {video_id}")  # #claude
+                chunk_paths = [chunks_dir / f"chunk_{i:04d}" for i in range(total_chunks)]
+                try:
+                    chunk_lengths = [chunk_path.stat().st_size for chunk_path in chunk_paths]
+                    _, copy_method = reassemble_chunks(chunk_paths, video_path, UPLOAD_FSYNC)
+                except FileNotFoundError as e:
+                    if e.filename is None or Path(e.filename) not in chunk_paths:
+                        raise  # The .part file or the session directory, not a chunk
+                    missing = chunk_paths.index(Path(e.filename))  # From stat() or the copy
+                    logger.error(f"❌ Missing chunk during reassembly: chunk_{missing:04d}")  # #claude
+                    return jsonify({'error': f'Missing chunk {missing}'}), 500  # #claude
+                logger.info(f"🔧 Reassembled with {copy_method}")
+
+            final_size = video_path.stat().st_size  # #claude
+            g.timings['reassembly'] = (time.perf_counter() - reassembly_start) * 1000
+            logger.info(f"✅ File reassembled: {video_path.name} ({final_size/1024/1024:.2f}MB)")  # #claude
+
+            # Tombstone, then clean up chunks (removes the manifest: requests waiting in completing() see the upload done)
+            manifest.mark_completed(final_size, None if direct else chunk_lengths)
+            shutil.rmtree(chunks_dir)
+            logger.info(f"🗑️ Cleaned up chunk directory for {video_id}")  # #claude
+        else:
+            logger.info(f"↩️ Video {video_id} completed by a concurrent request")
+
+    return upload_complete_response(video_id, video_path, video_type)
+
 @app.route('/api/upload/chunk', methods=['POST'])
 def upload_chunk():
     """
@@ -395,6 +824,12 @@ def upload_chunk():
         - chunk_index: Current chunk index (0-based)
         - total_chunks: Total number of chunks
         - chunk: File data
+        - chunk_size: Optional; bytes in every chunk but the last. Selects the
+          direct-offset layout: chunks are written straight into the
+          (sparse) video file at chunk_index * chunk_size (any order), so
+          the last chunk only renames it instead of reassembling
+    (PUT /api/upload/chunk takes the chunk as the raw body instead: no
+    multipart parsing or spooling)
 
     Response:
         {
@@ -409,8 +844,21 @@ def upload_chunk():
             "video_id": "...",
             "file_path": "..."
         }
+
+    Chunks may be sent in parallel and resent: the video is completed exactly
+    once (ChunkManifest.completing() across threads and workers), and a chunk
+    of an already complete video (resent within UPLOAD_COMPLETED_TTL: same
+    layout and bytes) is answered "video_complete" without storing it, while
+    any other chunk under a completed video_id starts a new upload that
+    replaces the video. The first chunk fixes the upload's layout (total_chunks, chunk_size,
+    and for PUT the video size): a chunk that disagrees gets 409.
+
+    The Server-Timing header reports parse (multipart body), disk (chunk
+    write), reassemble (last chunk only) and total; ?debug_timing=1 adds
+    them to the JSON as "server_timing_ms".
     """
     try:
+        upload_start = time.perf_counter()
         session_id = request.form.get('session_id')
         video_id = request.form.get('video_id')
         chunk_index = int(request.form.get('chunk_index'))
@@ -418,6 +866,8 @@ def upload_chunk():
         chunk_file = request.files.get('chunk')
         video_type = request.form.get('video_type', 'recording')  # #claude: Default to 'recording' for backwards compatibility
         file_extension = request.form.get('file_extension', 'webm')  # #claude: Support custom file extensions (e.g., 'json' for summary files)
+        direct_chunk_size = request.form.get('chunk_size', type=int)  # Direct-offset layout when given
+        g.timings['multipart_parse'] = (time.perf_counter() - upload_start) * 1000  # Form parsed on first access (body received + spooled)
 
         # Log chunk receipt  # #claude
         chunk_size = chunk_file.content_length if chunk_file else 0  # #claude
@@ -433,60 +883,221 @@ def upload_chunk():
             logger.error(f"❌ Session not found: {session_id}")  # #claude
             return jsonify({'error': 'Session not found'}), 404
 
-        # Create chunks directory
-        chunks_dir = get_chunks_dir(session_id, video_id, video_type)  # #claude: Pass video_type
-        chunks_dir.mkdir(parents=True, exist_ok=True)
-
-        # Save chunk
-        chunk_path = chunks_dir / f"chunk_{chunk_index:04d}"
-        chunk_file.save(str(chunk_path))
-        saved_size = chunk_path.stat().st_size  # #claude
-        logger.info(f"✅ Chunk saved: {chunk_path.name} ({saved_size/1024:.1f}KB)")  # #claude
-
-        # Check if all chunks received
-        received_chunks = len(list(chunks_dir.glob('chunk_*')))
-        logger.info(f"📊 Progress: {received_chunks}/{total_chunks} chunks received for {video_id}")  # #claude
-
-        if received_chunks == total_chunks:
-            # Reassemble video
-            logger.info(f"🔧 Starting video reassembly: {video_id}")  # #claude
-            video_path = session_dir / f"{video_id}.{file_extension}"  # #claude: Use custom extension if provided
-
-            with open(video_path, 'wb') as outfile:
-                for i in range(total_chunks):
-                    chunk_path = chunks_dir / f"chunk_{i:04d}"
-                    if not chunk_path.exists():  # #claude
-                        logger.error(f"❌ Missing chunk during reassembly: chunk_{i:04d}")  # #claude
-                        return jsonify({'error': f'Missing chunk {i}'}), 500  # #claude
-                    with open(chunk_path, 'rb') as chunk:
-                        outfile.write(chunk.read())
-
-            final_size = video_path.stat().st_size  # #claude
-            logger.info(f"✅ File reassembled: {video_id}.{file_extension} ({final_size/1024/1024:.2f}MB)")  # #claude
+        if not 0 <= chunk_index < total_chunks:
+            logger.error(f"❌ Chunk index out of range: {chunk_index}/{total_chunks}")
+            return jsonify({'error': f'chunk_index must be in 0-{total_chunks - 1}'}), 400
+        if direct_chunk_size is not None and not 0 < direct_chunk_size * total_chunks <= MAX_UPLOAD_BYTES:
+            return jsonify({'error': f'chunk_size must be positive, with total_chunks * chunk_size <= {MAX_UPLOAD_BYTES}'}), 400
 
-            # Clean up chunks
-            shutil.rmtree(chunks_dir)
-            logger.info(f"🗑️ Cleaned up chunk directory for {video_id}")  # #claude
+        chunks_dir = get_chunks_dir(session_id, video_id, video_type)  # #claude: Pass video_type
+        video_path = session_dir / f"{video_id}.{file_extension}"  # #claude: Use custom extension if provided
+        manifest = ChunkManifest(chunks_dir, total_chunks, chunk_size=direct_chunk_size or 0)
+        resent, chunk_stream = is_resent_chunk(manifest, chunk_index, chunk_file.stream, video_id, video_path)
+        if resent:
+            # Duplicate of a chunk of a finished upload (a retry whose response was lost): nothing to store
+            logger.info(f"↩️ Chunk {chunk_index} for already complete video {video_id}")
+            return upload_complete_response(video_id, video_path, video_type)
+
+        # Create chunks directory (holds the chunk manifest; and the chunks themselves without chunk_size)
+        try:
+            chunks_dir.mkdir(parents=True, exist_ok=True)
+        except FileExistsError:
+            pass  # Removed by the request completing the upload: storing() below tells
 
-            # #claude: Use correct base dir for relative path
-            base_dir = CAMERA_TEST_DIR if video_type == 'encoder_test' else BASE_DATA_DIR
-            return jsonify({
-                'status': 'video_complete',
-                'video_id': video_id,
-                'file_path': str(video_path.relative_to(base_dir))
-            }), 200
+        # Save chunk (chunks of one video may arrive in parallel, and more than once)
+        write_start = time.perf_counter()
+        try:
+            if direct_chunk_size:
+                saved_size = write_chunk_at(part_path(video_path), chunk_stream, chunk_index, direct_chunk_size, total_chunks,
+                                            guard=manifest.storing)
+            else:
+                chunk_path = chunks_dir / f"chunk_{chunk_index:04d}"
+                with manifest.storing():  # Copies the spooled chunk: held briefly, whatever the client's speed
+                    saved_size = save_chunk(chunk_stream, chunk_path)  # #claude
+        except UploadMismatch as e:
+            logger.error(f"❌ Chunk manifest mismatch for {video_id}: {e}")
+            return jsonify({'error': str(e)}), 409
+        except ValueError as e:
+            logger.error(f"❌ Bad chunk for {video_id}: {e}")
+            return jsonify({'error': str(e)}), 400
+        except FileNotFoundError:
+            if not os.path.exists(manifest.completed_path):
+                raise
+            return late_chunk_response(chunk_index, video_id, video_path, video_type, chunks_dir)
+        g.timings['disk_write'] = (time.perf_counter() - write_start) * 1000
+        if direct_chunk_size:
+            logger.info(f"✅ Chunk written: {chunk_index} at offset {chunk_index * direct_chunk_size} ({saved_size/1024:.1f}KB)")
         else:
-            return jsonify({
-                'status': 'chunk_received',
-                'chunk_index': chunk_index,
-                'total_chunks': total_chunks,
-                'received': received_chunks
-            }), 200
+            logger.info(f"✅ Chunk saved: {chunk_path.name} ({saved_size/1024:.1f}KB)")  # #claude
+
+        response = record_chunk(manifest, chunk_index, video_id, video_path, video_type, direct=bool(direct_chunk_size))
+        if response[1] == 200:
+            metrics.observe_upload_chunk(saved_size, time.perf_counter() - upload_start)
+        return response
 
     except Exception as e:
         logger.exception(f"❌ Upload chunk failed: session={request.form.get('session_id')} video={request.form.get('video_id')} chunk={request.form.get('chunk_index')}")  # #claude - logs full traceback
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/upload/chunk', methods=['PUT'])
+def upload_chunk_raw():
+    """
+    Upload a single chunk of a video as the raw request body
+
+    The body is streamed from the socket to the chunk's offset in the video
+    file in fixed-size reads (the direct-offset layout of POST with
+    chunk_size), with no multipart parsing and no spooled temporary file.
+
+    Query parameters:
+        - session_id, video_id
+        - chunk_size: bytes in every chunk but the last; each range starts at
+          a multiple of it
+        - video_type: default 'recording'
+        - file_extension: default 'webm'
+
+    Headers:
+        - Content-Type: application/octet-stream
+        - Content-Range: bytes <first>-<last>/<video size>
+          (e.g. "bytes 1048576-2097151/5767168" for chunk 1 of 1MB chunks)
+
+    Response: as POST /api/upload/chunk. Server-Timing reports disk (body
+    received and written), reassemble (the completing chunk) and total.
+    """
+    try:
+        upload_start = time.perf_counter()
+        session_id = request.args.get('session_id')
+        video_id = request.args.get('video_id')
+        chunk_size = request.args.get('chunk_size', type=int)
+        video_type = request.args.get('video_type', 'recording')
+        file_extension = request.args.get('file_extension', 'webm')
+        content_range = parse_content_range_header(request.headers.get('Content-Range'))
+
+        if not all([session_id, video_id, chunk_size]) or chunk_size <= 0:
+            return jsonify({'error': 'Missing session_id, video_id or chunk_size'}), 400
+        if request.mimetype != 'application/octet-stream':
+            return jsonify({'error': 'Content-Type must be application/octet-stream'}), 415
+        if content_range is None or content_range.units != 'bytes' or content_range.length is None:
+            return jsonify({'error': 'Content-Range must be "bytes <first>-<last>/<video size>"'}), 400
+        video_size = content_range.length
+        chunk_index, misaligned = divmod(content_range.start, chunk_size)
+        total_chunks = -(-video_size // chunk_size)
+        if misaligned or content_range.stop != min(content_range.start + chunk_size, video_size):
+            return jsonify({'error': f'Content-Range must cover exactly one chunk of chunk_size ({chunk_size}) bytes'}), 400
+        if request.content_length != content_range.stop - content_range.start:
+            return jsonify({'error': 'Content-Length does not match Content-Range'}), 400
+        if video_size > MAX_UPLOAD_BYTES:
+            return jsonify({'error': f'Video larger than {MAX_UPLOAD_BYTES} bytes'}), 413
+        logger.info(f"📥 Chunk received (raw): session={session_id} video={video_id} type={video_type} chunk={chunk_index}/{total_chunks} size={request.content_length/1024:.1f}KB")
+
+        session_dir = get_session_dir(session_id, video_type)
+        if not session_dir.exists():
+            logger.error(f"❌ Session not found: {session_id}")
+            return jsonify({'error': 'Session not found'}), 404
+
+        chunks_dir = get_chunks_dir(session_id, video_id, video_type)
+        video_path = session_dir / f"{video_id}.{file_extension}"
+        manifest = ChunkManifest(chunks_dir, total_chunks, chunk_size=chunk_size, video_size=video_size)
+        resent, chunk_stream = is_resent_chunk(manifest, chunk_index, request.stream, video_id, video_path)
+        if resent:
+            # Duplicate of a chunk of a finished upload (a retry whose response was lost): nothing to store
+            logger.info(f"↩️ Chunk {chunk_index} for already complete video {video_id}")
+            return upload_complete_response(video_id, video_path, video_type)
+        try:
+            chunks_dir.mkdir(parents=True, exist_ok=True)  # Holds the chunk manifest
+        except FileExistsError:
+            pass  # Removed by the request completing the upload: storing() below tells
+
+        write_start = time.perf_counter()
+        try:
+            # Locks the upload only to create and truncate the .part file: a stalled body never blocks completion
+            saved_size = write_chunk_at(part_path(video_path), chunk_stream, chunk_index, chunk_size, total_chunks,
+                                        guard=manifest.storing)
+        except UploadMismatch as e:
+            logger.error(f"❌ Chunk manifest mismatch for {video_id}: {e}")
+            return jsonify({'error': str(e)}), 409
+        except ValueError as e:
+            logger.error(f"❌ Bad chunk for {video_id}: {e}")
+            return jsonify({'error': str(e)}), 400
+        except FileNotFoundError:
+            if not os.path.exists(manifest.completed_path):
+                raise
+            return late_chunk_response(chunk_index, video_id, video_path, video_type, chunks_dir)
+        g.timings['disk_write'] = (time.perf_counter() - write_start) * 1000
+        logger.info(f"✅ Chunk written: {chunk_index} at offset {content_range.start} ({saved_size/1024:.1f}KB)")
+
+        response = record_chunk(manifest, chunk_index, video_id, video_path, video_type, direct=True)
+        if response[1] == 200:
+            metrics.observe_upload_chunk(saved_size, time.perf_counter() - upload_start)
+        return response
+
+    except Exception as e:
+        logger.exception(f"❌ Raw upload chunk failed: session={request.args.get('session_id')} video={request.args.get('video_id')} range={request.headers.get('Content-Range')}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/upload/status', methods=['GET'])  # HEAD too (Flask answers it with the GET headers)
+def upload_status():
+    """
+    Which chunks of an upload the server already has, so a client that was
+    interrupted (tab reload, dropped connection) resends only the gaps
+
+    Answered from the upload's chunk manifest, not by listing its chunks.
+
+    Query parameters:
+        - session_id, video_id
+        - video_type: as sent with the chunks (default 'recording')
+        - file_extension: as sent with the chunks (default 'webm')
+
+    Response:
+        {
+            "status": "in_progress",  # or "not_started" (no chunk yet), "complete"
+            "total_chunks": 120,
+            "received_count": 37,
+            "received": [[0, 30], [33, 38]],  # Inclusive chunk index ranges
+            "missing": [[31, 32], [39, 119]]
+        }
+        A complete upload has "file_path" instead of the chunk fields. It is
+        reported complete for UPLOAD_COMPLETED_TTL seconds; after that the
+        video_id is not_started again (chunks sent then start a new upload).
+        Headers Upload-Status and (in progress) Upload-Received-Chunks
+        "37/120" carry the gist for HEAD requests.
+    """
+    session_id = request.args.get('session_id')
+    video_id = request.args.get('video_id')
+    video_type = request.args.get('video_type', 'recording')
+    file_extension = request.args.get('file_extension', 'webm')
+    if not session_id or not video_id:
+        return jsonify({'error': 'Missing session_id or video_id'}), 400
+
+    session_dir = get_session_dir(session_id, video_type)
+    if not session_dir.exists():
+        return jsonify({'error': 'Session not found'}), 404
+
+    video_path = session_dir / f"{video_id}.{file_extension}"
+    response = {'session_id': session_id, 'video_id': video_id}
+    headers = {}
+    chunks_dir = get_chunks_dir(session_id, video_id, video_type)
+    try:
+        manifest = ChunkManifest.open(chunks_dir)
+        progress = manifest.progress() if manifest else None
+    except FileNotFoundError:
+        progress = None  # Chunk directory removed by the completing chunk meanwhile
+    except ValueError as e:
+        logger.error(f"❌ Unreadable chunk manifest for {video_id}: {e}")
+        return jsonify({'error': str(e)}), 409
+    except OSError as e:
+        logger.exception(f"❌ Upload status failed: session={session_id} video={video_id}")
+        return jsonify({'error': str(e)}), 500
+    if progress is not None:
+        response.update(progress, status='in_progress')
+        headers['Upload-Received-Chunks'] = f"{progress['received_count']}/{progress['total_chunks']}"
+    elif ChunkManifest.completed_upload(chunks_dir, UPLOAD_COMPLETED_TTL) is not None and video_path.exists():
+        base_dir = CAMERA_TEST_DIR if video_type == 'encoder_test' else BASE_DATA_DIR
+        response.update(status='complete', file_path=str(video_path.relative_to(base_dir)))
+    else:
+        response['status'] = 'not_started'
+    headers['Upload-Status'] = response['status']
+    return jsonify(response), 200, headers
+
 @app.route('/api/upload/metadata', methods=['POST'])
 def upload_metadata():
     """
@@ -595,144 +1206,253 @@ def check_quality():
     """
     Check face image quality using AI model (Efficient-FIQA)
 
-    Request body:
+    Request body (JSON):
         {
             "image": "base64-encoded image data (data:image/png;base64,...)"
         }
 
+    Or the raw JPEG/WebP/PNG bytes as the body with Content-Type
+    application/octet-stream (or image/jpeg, image/webp), or a multipart
+    form with the file in field "image". Binary uploads skip JSON parsing
+    and base64 decoding and are ~25% smaller on the wire.
+
+    Optional "session_id" (JSON field, ?session_id= or X-Session-Id header)
+    enables the per-session near-duplicate cache: a frame nearly identical to
+    a recent one from the same session returns that frame's result, and face
+    detection searches only around the session's last face (with a periodic
+    full-frame pass). Frames whose bytes exactly repeat an earlier frame
+    (retries, replays; any session) return the stored response.
+
+    Under overload (QUALITY_MAX_IN_FLIGHT frames in flight and the wait queue
+    full, or no slot within QUALITY_MAX_QUEUE_WAIT_MS) the frame is not
+    processed: the response is 429 with a Retry-After header and
+    {"status": "OVERLOADED", "next_check_ms": 1200, ...}. A frame whose
+    deadline (QUALITY_DEADLINE_MS, or the client's X-Deadline-Ms budget)
+    passes before inference is dropped the same way.
+
+    Every response carries a Server-Timing header (b64, decode, detect,
+    preprocess, infer, json, total); ?debug_timing=1 adds the same breakdown
+    as "server_timing_ms".
+
+    Every response carries next_check_ms. With a session_id it adapts to the
+    session's recent scores and face movement: QUALITY_CHECK_MIN_MS while
+    there is no face or the score is poor or changing, backing off towards
+    QUALITY_CHECK_MAX_MS while the score is good and steady.
+
     Response:
         {
             "quality_score": 0.85,  # 0-1, higher = better
             "quality_level": "good",  # poor, acceptable, good
             "threshold_met": true,   # True if >= 0.5
+            "cached": false,         # True if reused from a repeated or near-duplicate frame
+            "next_check_ms": 2000,   # When to send the next frame (longer while steady and good)
             "inference_time_ms": 4.2
         }
     """
     try:
-        import time
         start_time = time.time()
+        timings = g.timings  # Stage -> ms: Prometheus histograms and the Server-Timing header
+        deadline = request_deadline(request.headers.get('X-Deadline-Ms'))
 
-        data = request.get_json()
-        if not data or 'image' not in data:
+        image_data = get_frame_from_request()
+        if image_data is None:
             return jsonify({'error': 'Missing image data'}), 400
 
         # Check if image data is empty/placeholder (encoder test sends empty frames)  # #claude
-        image_data = data['image']  # #claude
-        if not image_data or image_data in ['data:,', '']:  # #claude
+        if is_empty_frame(image_data):  # #claude
             logger.debug("Quality check skipped: empty image data (likely encoder test)")  # #claude
-            return jsonify({  # #claude
-                'status': 'NO_FRAME',  # #claude
-                'quality_score': None,  # #claude
-                'quality_level': None,  # #claude
-                'threshold_met': False,  # #claude
-                'face_confidence': 0.0,  # #claude
-                'message': 'No frame data provided',  # #claude
-                'inference_time_ms': 0  # #claude
-            }), 200  # #claude
-
-        # Preprocess image with face detection  # #claude
-        preprocess_result = preprocess_with_face_detection(  # #claude
-            image_data,  # #claude
-            get_face_detector(),  # #claude
-            min_face_ratio=MIN_FACE_SIZE_RATIO,  # #claude
-            max_padding_ratio=MAX_PADDING_RATIO,  # #claude
-            multi_face_ambiguity_ratio=MULTI_FACE_AMBIGUITY_RATIO  # #claude
-        )  # #claude
-
-        # Handle edge cases (no face, multiple faces, etc.)  # #claude
-        if preprocess_result['status'] != 'OK':  # #claude
-            logger.info(f"Quality check skipped: {preprocess_result['status']} - {preprocess_result['message']}")  # #claude
-            inference_time = (time.time() - start_time) * 1000  # #claude
-            return jsonify({  # #claude
-                'status': preprocess_result['status'],  # #claude
-                'quality_score': None,  # #claude
-                'quality_level': None,  # #claude
-                'threshold_met': False,  # #claude
-                'face_confidence': preprocess_result['face_confidence'],  # #claude
-                'face_bbox': preprocess_result.get('face_bbox'),  # #claude
-                'message': preprocess_result['message'],  # #claude
-                'inference_time_ms': round(inference_time, 2)  # #claude
-            }), 200  # #claude
-
-        img_tensor = preprocess_result['tensor']  # #claude
-        face_confidence = preprocess_result['face_confidence']  # #claude
-        face_bbox = preprocess_result['face_bbox']  # #claude
-
-        # Create Triton client - #claude: Use context manager to ensure cleanup
-        triton_client = None
+            return jsonify(dict(build_quality_result(), next_check_ms=QUALITY_CHECK_INTERVAL_MS)), 200  # #claude
+
+        # Exact repeat of an earlier frame, or near-duplicate of a recent one from the session? Reuse its result
+        session_id = get_session_id_from_request()
+        image_data, cache_key, cached = lookup_cached_result(image_data, session_id, timings)
+        if cached is not None:
+            if face_tracker is not None and session_id:
+                face_tracker.touch(session_id)  # Same scene: the tracked face is still current
+            cached['inference_time_ms'] = round((time.time() - start_time) * 1000, 2)
+            cached['next_check_ms'] = recommend_check_interval(session_id, cached)
+            return quality_response(cached, timings)
+
+        # Too many frames in flight? Shed with a retry hint instead of queueing
+        if admission is not None:
+            try:
+                admission.admit(deadline)
+            except AdmissionRejected as e:
+                return quality_response(build_overloaded_result(e), timings, 429, retry_after_header(e))
+
+        # Preprocess image with face detection into a reused arena buffer  # #claude
+        img_tensor, scratch = slot = tensor_arena.acquire()
         try:
-            triton_client = httpclient.InferenceServerClient(
-                url=TRITON_URL,
-                verbose=False
-            )
-
-            # Check if Triton is ready
-            if not triton_client.is_server_ready():
-                return jsonify({'error': 'Triton server not ready'}), 503
-
-            # Check if model is ready
-            if not triton_client.is_model_ready(TRITON_MODEL_NAME, TRITON_MODEL_VERSION):
-                return jsonify({'error': f'Model {TRITON_MODEL_NAME} not ready'}), 503
-
-            # Prepare input tensor
-            input_tensor = httpclient.InferInput('input', img_tensor.shape, 'FP32')
-            input_tensor.set_data_from_numpy(img_tensor)
-
-            # Prepare output
-            output = httpclient.InferRequestedOutput('output')
-
-            # Run inference
-            response = triton_client.infer(
-                model_name=TRITON_MODEL_NAME,
-                model_version=TRITON_MODEL_VERSION,
-                inputs=[input_tensor],
-                outputs=[output]
-            )
-
-            # Get quality score
-            quality_score = float(response.as_numpy('output')[0][0])
-
-            # Determine quality level
-            if quality_score >= 0.7:
-                quality_level = 'good'
-            elif quality_score >= 0.5:
-                quality_level = 'acceptable'
+            preprocess_result = preprocess_session_frame(image_data, session_id, img_tensor, scratch, timings)  # #claude
+
+            # Handle edge cases (no face, multiple faces, etc.)  # #claude
+            if preprocess_result['status'] != 'OK':  # #claude
+                logger.info(f"Quality check skipped: {preprocess_result['status']} - {preprocess_result['message']}")  # #claude
+                inference_time = (time.time() - start_time) * 1000  # #claude
+                result = build_quality_result(preprocess_result, inference_time_ms=inference_time)  # #claude
             else:
-                quality_level = 'poor'
+                if admission is not None:
+                    admission.check_deadline(deadline)  # Stale by now: skip inference
+
+                # Single inference call (pooled keep-alive Triton client or in-process CPU backend)
+                quality_score = timed_inference(img_tensor, timings)
+
+                inference_time = (time.time() - start_time) * 1000  # Convert to ms
+                result = build_quality_result(preprocess_result, quality_score, inference_time)
 
-            inference_time = (time.time() - start_time) * 1000  # Convert to ms
+            remember_result(session_id, cache_key, result)
+            result['next_check_ms'] = recommend_check_interval(session_id, result)
+            return quality_response(result, timings)
 
-            return jsonify({  # #claude
-                'status': 'OK',  # #claude
-                'quality_score': round(quality_score, 4),
-                'quality_level': quality_level,
-                'threshold_met': quality_score >= 0.5,
-                'face_confidence': round(face_confidence, 4),  # #claude
-                'face_bbox': face_bbox,  # #claude
-                'message': 'Face quality assessed successfully',  # #claude
-                'inference_time_ms': round(inference_time, 2)
-            }), 200
+        except AdmissionRejected as e:
+            return quality_response(build_overloaded_result(e), timings, 429, retry_after_header(e))
+
+        except (InferenceNotReadyError, BatcherFullError) as e:
+            return jsonify({'error': str(e)}), 503
+
+        except FutureTimeoutError:
+            return jsonify({'error': 'Quality inference timed out'}), 503
 
         except Exception as e:
-            logger.error(f"Triton inference error: {e}")
+            logger.error(f"Inference error: {e}")
             return jsonify({'error': f'Inference failed: {str(e)}'}), 500
 
         finally:
-            # #claude: CRITICAL - Always close the client to prevent connection leak
-            if triton_client is not None:
-                try:
-                    triton_client.close()
-                    logger.debug("Triton client closed")
-                except:
-                    pass  # Ignore close errors
+            # Buffers are reused instead of freed, so no per-request gc.collect() is needed
+            tensor_arena.release(slot)
+            if admission is not None:
+                admission.release()
+
+    except Exception as e:
+        return jsonify({'error': f'Unexpected error: {str(e)}'}), 500
+
+@app.route('/api/quality/check_batch', methods=['POST'])
+def check_quality_batch():
+    """
+    Check face image quality for a burst of frames in one request
 
-            # #claude: Force garbage collection after quality check to free memory
-            del img_tensor
-            gc.collect()
+    Frames are decoded and face-detected in parallel, and every frame that
+    reaches OK is normalized into one stacked tensor and scored in a single
+    batched inference call (at most QUALITY_BATCH_MAX_FRAMES frames).
+
+    Request body:
+        {
+            "frames": ["data:image/jpeg;base64,...", ...]
+        }
+
+    Response:
+        {
+            "results": [  # Same order as "frames", same schema as /api/quality/check
+                {"status": "OK", "quality_score": 0.85, ...},
+                {"status": "NO_FACE", "quality_score": null, ...}
+            ],
+            "frame_count": 2,
+            "scored_count": 1,
+            "inference_time_ms": 12.3
+        }
+    """
+    try:
+        start_time = time.time()
+
+        data = request.get_json()
+        frames = data.get('frames') if data else None
+        if not isinstance(frames, list) or not frames:
+            return jsonify({'error': 'Missing frames array'}), 400
+        if len(frames) > QUALITY_BATCH_MAX_FRAMES:
+            return jsonify({'error': f'Too many frames ({len(frames)}), max {QUALITY_BATCH_MAX_FRAMES}'}), 400
+
+        # Decode + detect frames in parallel, then normalize every OK crop in one stacked pass
+        non_empty = [i for i, frame in enumerate(frames) if not is_empty_frame(frame)]
+        batch, batch_results = preprocess_frames([frames[i] for i in non_empty])
+        preprocess_results = [None] * len(frames)
+        for i, result in zip(non_empty, batch_results):
+            preprocess_results[i] = result
+            metrics.count_preprocess_status(result['status'])
+            metrics.observe_stages(result['timings'])
+            for stage, ms in result['timings'].items():  # Server-Timing: summed over the frames
+                g.timings[stage] = g.timings.get(stage, 0.0) + ms
+
+        scores = {}
+        if len(batch):
+            try:
+                inference_start = time.perf_counter()
+                batch_scores = get_inference_backend().infer(batch)
+                g.timings['inference'] = (time.perf_counter() - inference_start) * 1000
+            except InferenceNotReadyError as e:
+                return jsonify({'error': str(e)}), 503
+            except Exception as e:
+                logger.error(f"Batch inference error: {e}")
+                return jsonify({'error': f'Inference failed: {str(e)}'}), 500
+            scores = {i: float(batch_scores[r['batch_index']])
+                      for i, r in enumerate(preprocess_results) if r is not None and r['batch_index'] is not None}
+
+        inference_time = (time.time() - start_time) * 1000
+        results = [
+            build_quality_result(r, scores.get(i), inference_time) if r is not None else build_quality_result()
+            for i, r in enumerate(preprocess_results)
+        ]
+        logger.info(f"Batch quality check: {len(scores)}/{len(frames)} frames scored in {inference_time:.1f}ms")
+
+        return jsonify({
+            'results': results,
+            'frame_count': len(frames),
+            'scored_count': len(scores),
+            'inference_time_ms': round(inference_time, 2)
+        }), 200
 
     except Exception as e:
+        logger.exception("❌ Batch quality check failed")
         return jsonify({'error': f'Unexpected error: {str(e)}'}), 500
 
+@app.route('/api/quality/stats', methods=['GET'])
+def get_quality_stats():
+    """
+    Quality inference pipeline statistics (for tuning batching against config.pbtxt)
+
+    Response:
+        {
+            "backend": "triton",
+            "backend_ready": true,
+            "backend_status": "ready",
+            "batching": {
+                "frames": 1200,
+                "batches": 310,
+                "mean_batch_size": 3.87,
+                "batch_size_distribution": {"1": 40, "4": 200, ...},
+                "queue_wait_ms": {"mean": 2.1, "p50": 1.8, "p99": 5.0, "max": 6.2},
+                ...
+            }
+        }
+    """
+    backend = get_inference_backend()
+    return jsonify({
+        'backend': backend.name,
+        'backend_ready': backend.is_ready(),
+        'backend_status': backend.ready_reason,
+        'batching': get_batcher().stats() if BATCHING_ENABLED else None,
+        'tensor_arena': tensor_arena.stats(),
+        'frame_cache': frame_cache.stats() if frame_cache is not None else None,
+        'result_cache': result_cache.stats() if result_cache is not None else None,
+        'admission': admission.stats() if admission is not None else None,
+        'check_interval': check_interval.stats() if check_interval is not None else None,
+        'face_tracking': face_tracker.stats() if face_tracker is not None else None
+    }), 200
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """
+    Prometheus scrape endpoint (text format), summed over all gunicorn workers
+
+    facial_quality_stage_seconds{stage=...}: histogram per /api/quality/check
+        stage (base64_decode, image_decode, face_detection, crop_normalize,
+        inference, json_encode)
+    facial_quality_preprocess_total{status=...}: frames per preprocessing status
+    facial_upload_chunk_bytes_total, facial_upload_chunk_seconds: video chunks
+    facial_http_requests_in_flight{endpoint=...}: requests being handled
+    """
+    body, content_type = metrics.render()
+    return Response(body, content_type=content_type)
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""
+Async serving mode for the combined backend
+Serves /api/quality/check and /api/quality/stats natively on asyncio (aiohttp),
+with an async Triton client and async micro-batching, so a frame waiting on
+inference is a coroutine instead of a blocked thread. Decode + face detection
+(CPU-bound) run on a bounded thread pool. Every other route is forwarded to
+the Flask app (WSGI) on a thread pool, so uploads and sessions behave exactly
+as with `python app.py`.
+
+Usage:
+    python3 async_server.py            # same port as app.py (nginx unchanged)
+    ASYNC_PORT=5002 python3 async_server.py
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from aiohttp import web
+from multidict import CIMultiDict
+from werkzeug.test import EnvironBuilder, run_wsgi_app
+
+import app as flask_backend
+from app import (
+    app as flask_app, build_quality_result, build_overloaded_result, is_empty_frame, lookup_cached_result,
+    request_deadline, retry_after_header, recommend_check_interval, check_interval,
+    preprocess_session_frame, remember_result, tensor_arena, frame_cache, result_cache, face_tracker,
+    BATCHING_ENABLED, BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS, BATCH_MAX_QUEUE, BATCH_DISPATCHERS,
+    BINARY_FRAME_MIMETYPES, INFERENCE_BACKEND, INFERENCE_FALLBACK, PREPROCESS_THREADS,
+    TRITON_URL, TRITON_MODEL_NAME, TRITON_MODEL_VERSION, TRITON_READINESS_INTERVAL,
+    QUALITY_MAX_IN_FLIGHT, QUALITY_MAX_QUEUE, QUALITY_MAX_QUEUE_WAIT_MS, QUALITY_RETRY_AFTER_MS,
+    QUALITY_CHECK_INTERVAL_MS
+)
+from admission import AdmissionRejected, AsyncAdmissionController
+from batcher import AsyncMicroBatcher, BatcherFullError
+from inference_backends import InferenceNotReadyError
+import metrics
+
+logger = logging.getLogger(__name__)
+
+ASYNC_HOST = os.environ.get('ASYNC_HOST', '127.0.0.1')
+ASYNC_PORT = int(os.environ.get('ASYNC_PORT', '5001'))
+ASYNC_TRITON_CONN_LIMIT = int(os.environ.get('ASYNC_TRITON_CONN_LIMIT', '64'))  # Keep-alive connections to Triton
+WSGI_THREADS = int(os.environ.get('WSGI_THREADS', '16'))  # Threads for routes forwarded to Flask
+MAX_CONTENT_LENGTH = flask_app.config['MAX_CONTENT_LENGTH']
+
+# Keys on the aiohttp app
+PREPROCESS_EXECUTOR = web.AppKey('preprocess_executor', ThreadPoolExecutor)
+WSGI_EXECUTOR = web.AppKey('wsgi_executor', ThreadPoolExecutor)
+INFERENCE = web.AppKey('inference', object)
+ADMISSION = web.AppKey('admission', object)
+
+
+class AsyncTritonInference:
+    """Scores frames with the async Triton client, micro-batched on the event loop if enabled"""
+
+    name = 'triton-async'
+
+    def __init__(self):
+        from triton_pool import AsyncTritonClient
+        self.client = AsyncTritonClient(
+            TRITON_URL, TRITON_MODEL_NAME, TRITON_MODEL_VERSION,
+            conn_limit=ASYNC_TRITON_CONN_LIMIT,
+            readiness_interval=TRITON_READINESS_INTERVAL
+        )
+        self.batcher = AsyncMicroBatcher(
+            self.client.infer,
+            max_batch_size=BATCH_MAX_SIZE,
+            max_wait_ms=BATCH_MAX_WAIT_MS,
+            max_queue_size=BATCH_MAX_QUEUE,
+            num_dispatchers=BATCH_DISPATCHERS
+        ) if BATCHING_ENABLED else None
+
+    async def start(self):
+        await self.client.start()
+        if self.batcher is not None:
+            self.batcher.start()
+        logger.info(f"✅ Async Triton client initialized: {TRITON_URL} (ready={self.client.is_ready()})")
+
+    async def close(self):
+        if self.batcher is not None:
+            await self.batcher.stop()
+        await self.client.close()
+
+    async def score(self, img_tensor):
+        from triton_pool import TritonNotReadyError
+        try:
+            if self.batcher is not None:
+                return await self.batcher.infer(img_tensor)
+            return float((await self.client.infer(img_tensor))[0])
+        except TritonNotReadyError as e:
+            raise InferenceNotReadyError(str(e))
+
+    def is_ready(self):
+        return self.client.is_ready()
+
+    @property
+    def ready_reason(self):
+        return self.client.ready_reason
+
+    def batching_stats(self):
+        return self.batcher.stats() if self.batcher is not None else None
+
+
+class ThreadedInference:
+    """In-process CPU backends (and Triton with a CPU fallback): the sync batcher/backend, awaited"""
+
+    def __init__(self, executor):
+        self.executor = executor
+        self.backend = None
+
+    @property
+    def name(self):
+        return self.backend.name
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        self.backend = await loop.run_in_executor(self.executor, flask_backend.get_inference_backend)
+
+    async def close(self):
+        pass  # Owned by the Flask module singletons
+
+    async def score(self, img_tensor):
+        if BATCHING_ENABLED:
+            return await asyncio.wrap_future(flask_backend.get_batcher().submit(img_tensor))
+        scores = await asyncio.get_running_loop().run_in_executor(self.executor, self.backend.infer, img_tensor)
+        return float(scores[0])
+
+    def is_ready(self):
+        return self.backend.is_ready()
+
+    @property
+    def ready_reason(self):
+        return self.backend.ready_reason
+
+    def batching_stats(self):
+        return flask_backend.get_batcher().stats() if BATCHING_ENABLED else None
+
+
+# ============================================================================
+# Quality endpoints
+# ============================================================================
+
+async def get_frame(request):
+    """Async get_frame_from_request(): (frame, form-or-json fields) from binary, multipart or JSON bodies"""
+    if request.content_type in BINARY_FRAME_MIMETYPES:
+        return await request.read(), {}
+    if request.content_type == 'multipart/form-data':
+        form = await request.post()
+        frame_file = form.get('image')
+        return (frame_file.file.read() if frame_file is not None and hasattr(frame_file, 'file') else None), form
+    try:
+        data = await request.json()
+    except ValueError:
+        return None, {}
+    if not isinstance(data, dict):
+        return None, {}
+    return data.get('image'), data
+
+
+def get_session_id(request, fields):
+    """Async get_session_id_from_request(): ?session_id=, X-Session-Id header, or a body field"""
+    return request.query.get('session_id') or request.headers.get('X-Session-Id') or fields.get('session_id')
+
+
+def json_response(payload, status=200, headers=None):
+    # Same CORS header flask-cors adds to Flask routes
+    return web.json_response(payload, status=status, headers={'Access-Control-Allow-Origin': '*', **(headers or {})})
+
+
+def quality_response(request, result, timings, status=200, headers=None):
+    """
+    app.quality_response() plus the Flask after_request hook: json_response()
+    timing the JSON encode, recording the stage timings and adding the
+    Server-Timing header (and "server_timing_ms" with ?debug_timing=1)
+    """
+    start = time.perf_counter()
+    body = json.dumps(result)
+    timings['json_encode'] = (time.perf_counter() - start) * 1000
+    metrics.observe_stages(timings)
+    header, breakdown = metrics.server_timing(timings, (time.perf_counter() - request['request_start']) * 1000)
+    if request.query.get('debug_timing') == '1':
+        body = json.dumps(dict(result, server_timing_ms=breakdown))
+    return web.Response(text=body, status=status, content_type='application/json',
+                        headers={'Access-Control-Allow-Origin': '*', 'Server-Timing': header, **(headers or {})})
+
+
+async def check_quality(request):
+    """Async /api/quality/check - same request formats and response schema as the Flask endpoint"""
+    try:
+        start_time = time.time()
+        timings = {}
+        deadline = request_deadline(request.headers.get('X-Deadline-Ms'))
+        loop = asyncio.get_running_loop()
+        executor = request.app[PREPROCESS_EXECUTOR]
+        admission = request.app[ADMISSION]
+
+        image_data, fields = await get_frame(request)
+        if image_data is None:
+            return json_response({'error': 'Missing image data'}, 400)
+
+        if is_empty_frame(image_data):
+            return json_response(dict(build_quality_result(), next_check_ms=QUALITY_CHECK_INTERVAL_MS))
+
+        session_id = get_session_id(request, fields)
+        image_data, cache_key, cached = await loop.run_in_executor(
+            executor, lookup_cached_result, image_data, session_id, timings
+        )
+        if cached is not None:
+            cached['inference_time_ms'] = round((time.time() - start_time) * 1000, 2)
+            cached['next_check_ms'] = recommend_check_interval(session_id, cached)
+            return quality_response(request, cached, timings)
+
+        if admission is not None:
+            try:
+                await admission.admit(deadline)
+            except AdmissionRejected as e:
+                return quality_response(request, build_overloaded_result(e), timings, 429, retry_after_header(e))
+
+        img_tensor, scratch = slot = tensor_arena.acquire()
+        try:
+            preprocess_result = await loop.run_in_executor(
+                executor, preprocess_session_frame, image_data, session_id, img_tensor, scratch, timings
+            )
+
+            if preprocess_result['status'] != 'OK':
+                logger.info(f"Quality check skipped: {preprocess_result['status']} - {preprocess_result['message']}")
+                result = build_quality_result(preprocess_result, inference_time_ms=(time.time() - start_time) * 1000)
+            else:
+                if admission is not None:
+                    admission.check_deadline(deadline)
+                inference_start = time.perf_counter()
+                try:
+                    quality_score = await request.app[INFERENCE].score(img_tensor)
+                finally:
+                    timings['inference'] = (time.perf_counter() - inference_start) * 1000
+                result = build_quality_result(preprocess_result, quality_score, (time.time() - start_time) * 1000)
+
+            remember_result(session_id, cache_key, result)
+            result['next_check_ms'] = recommend_check_interval(session_id, result)
+            return quality_response(request, result, timings)
+
+        except AdmissionRejected as e:
+            return quality_response(request, build_overloaded_result(e), timings, 429, retry_after_header(e))
+
+        except (InferenceNotReadyError, BatcherFullError) as e:
+            return json_response({'error': str(e)}, 503)
+
+        except Exception as e:
+            logger.error(f"Inference error: {e}")
+            return json_response({'error': f'Inference failed: {str(e)}'}, 500)
+
+        finally:
+            tensor_arena.release(slot)
+            if admission is not None:
+                admission.release()
+
+    except Exception as e:
+        return json_response({'error': f'Unexpected error: {str(e)}'}, 500)
+
+
+async def quality_stats(request):
+    """Async /api/quality/stats - same keys as the Flask endpoint"""
+    inference = request.app[INFERENCE]
+    return json_response({
+        'backend': inference.name,
+        'backend_ready': inference.is_ready(),
+        'backend_status': inference.ready_reason,
+        'batching': inference.batching_stats(),
+        'tensor_arena': tensor_arena.stats(),
+        'frame_cache': frame_cache.stats() if frame_cache is not None else None,
+        'result_cache': result_cache.stats() if result_cache is not None else None,
+        'admission': request.app[ADMISSION].stats() if request.app[ADMISSION] is not None else None,
+        'check_interval': check_interval.stats() if check_interval is not None else None,
+        'face_tracking': face_tracker.stats() if face_tracker is not None else None
+    })
+
+
+# ============================================================================
+# Everything else: forwarded to the Flask app
+# ============================================================================
+
+def _call_flask(method, path, query_string, headers, body, remote):
+    builder = EnvironBuilder(path=path, method=method, query_string=query_string, headers=headers, data=body)
+    try:
+        environ = builder.get_environ()
+    finally:
+        builder.close()
+    environ['REMOTE_ADDR'] = remote or ''
+    app_iter, status, response_headers = run_wsgi_app(flask_app, environ, buffered=True)
+    try:
+        return int(status.split(' ', 1)[0]), response_headers, b''.join(app_iter)
+    finally:
+        if hasattr(app_iter, 'close'):
+            app_iter.close()
+
+
+async def forward_to_flask(request):
+    body = await request.read()
+    headers = [(k, v) for k, v in request.headers.items() if k.lower() not in ('content-length', 'transfer-encoding')]
+    status, response_headers, data = await asyncio.get_running_loop().run_in_executor(
+        request.app[WSGI_EXECUTOR], _call_flask,
+        request.method, request.path, request.query_string, headers, body, request.remote
+    )
+    headers = CIMultiDict((k, v) for k, v in response_headers.items() if k.lower() not in ('content-length', 'transfer-encoding'))
+    return web.Response(status=status, body=data, headers=headers)
+
+
+# ============================================================================
+# App
+# ============================================================================
+
+@web.middleware
+async def track_request(request, handler):
+    """In-flight gauge and Server-Timing start for the native routes (Flask handles the forwarded ones itself)"""
+    if handler is forward_to_flask:
+        return await handler(request)
+    request['request_start'] = time.perf_counter()
+    with metrics.IN_FLIGHT.labels(handler.__name__).track_inprogress():
+        return await handler(request)
+
+
+async def on_startup(aio_app):
+    await aio_app[INFERENCE].start()
+    # Load the detector pool before the first frame arrives
+    await asyncio.get_running_loop().run_in_executor(aio_app[PREPROCESS_EXECUTOR], flask_backend.get_face_detector)
+
+
+async def on_cleanup(aio_app):
+    await aio_app[INFERENCE].close()
+    aio_app[PREPROCESS_EXECUTOR].shutdown(wait=False)
+    aio_app[WSGI_EXECUTOR].shutdown(wait=False)
+
+
+def create_app():
+    aio_app = web.Application(client_max_size=MAX_CONTENT_LENGTH, middlewares=[track_request])
+    aio_app[PREPROCESS_EXECUTOR] = ThreadPoolExecutor(max_workers=PREPROCESS_THREADS, thread_name_prefix='preprocess')
+    aio_app[WSGI_EXECUTOR] = ThreadPoolExecutor(max_workers=WSGI_THREADS, thread_name_prefix='wsgi')
+    aio_app[ADMISSION] = AsyncAdmissionController(
+        max_in_flight=QUALITY_MAX_IN_FLIGHT,
+        max_queue=QUALITY_MAX_QUEUE,
+        max_queue_wait_ms=QUALITY_MAX_QUEUE_WAIT_MS,
+        retry_after_ms=QUALITY_RETRY_AFTER_MS
+    ) if QUALITY_MAX_IN_FLIGHT > 0 else None
+    if INFERENCE_BACKEND == 'triton' and not INFERENCE_FALLBACK:
+        aio_app[INFERENCE] = AsyncTritonInference()
+    else:
+        aio_app[INFERENCE] = ThreadedInference(aio_app[PREPROCESS_EXECUTOR])
+
+    aio_app.router.add_post('/api/quality/check', check_quality)
+    aio_app.router.add_get('/api/quality/stats', quality_stats)
+    aio_app.router.add_route('*', '/{tail:.*}', forward_to_flask)
+    aio_app.on_startup.append(on_startup)
+    aio_app.on_cleanup.append(on_cleanup)
+    return aio_app
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("Facial Data Collection + AI Quality - Async Backend")
+    print("=" * 60)
+    print(f"Backend (internal): http://{ASYNC_HOST}:{ASYNC_PORT}")
+    print(f"Quality inference: {INFERENCE_BACKEND}{' (async Triton client)' if INFERENCE_BACKEND == 'triton' and not INFERENCE_FALLBACK else ''}")
+    print(f"Preprocessing threads: {PREPROCESS_THREADS}, Flask route threads: {WSGI_THREADS}")
+    print("=" * 60)
+
+    web.run_app(create_app(), host=ASYNC_HOST, port=ASYNC_PORT, print=None)
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+In-process micro-batching for quality inference
+Request threads submit single preprocessed tensors; dispatcher threads stack
+them into one (N, 3, 352, 352) batch and fan the scores back out, so Triton
+receives the batch sizes its dynamic batcher is configured for.
+AsyncMicroBatcher does the same with coroutines for the asyncio server.
+"""
+
+import asyncio
+import logging
+import queue
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class BatcherFullError(RuntimeError):
+    """Raised when the batching queue is at capacity"""
+
+
+class BatchMetrics:
+    """Thread-safe batch-size and queue-wait counters shared by both batchers"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._batch_sizes = Counter()
+        self._queue_waits_ms = deque(maxlen=1000)  # Recent samples for percentiles
+        self._frames = 0
+        self._batches = 0
+        self._rejected = 0
+        self._errors = 0
+        self._queue_wait_total_ms = 0.0
+
+    def record_batch(self, waits_ms, failed):
+        with self._lock:
+            self._batches += 1
+            self._frames += len(waits_ms)
+            self._batch_sizes[len(waits_ms)] += 1
+            self._queue_waits_ms.extend(waits_ms)
+            self._queue_wait_total_ms += sum(waits_ms)
+            if failed:
+                self._errors += 1
+
+    def record_rejected(self):
+        with self._lock:
+            self._rejected += 1
+
+    def snapshot(self, max_batch_size, max_wait_ms, queue_depth):
+        with self._lock:
+            waits = sorted(self._queue_waits_ms)
+            batch_sizes = dict(sorted(self._batch_sizes.items()))
+            frames, batches = self._frames, self._batches
+            rejected, errors = self._rejected, self._errors
+            wait_total = self._queue_wait_total_ms
+
+        def percentile(p):
+            return round(waits[min(len(waits) - 1, int(len(waits) * p))], 2) if waits else None
+
+        return {
+            'max_batch_size': max_batch_size,
+            'max_wait_ms': max_wait_ms,
+            'queue_depth': queue_depth,
+            'frames': frames,
+            'batches': batches,
+            'rejected': rejected,
+            'failed_batches': errors,
+            'mean_batch_size': round(frames / batches, 2) if batches else None,
+            'batch_size_distribution': batch_sizes,
+            'queue_wait_ms': {
+                'mean': round(wait_total / frames, 2) if frames else None,
+                'p50': percentile(0.50),
+                'p99': percentile(0.99),
+                'max': round(waits[-1], 2) if waits else None
+            }
+        }
+
+
+class MicroBatcher:
+    """
+    Aggregates single-frame inference requests into batches
+
+    A batch is dispatched as soon as it reaches `max_batch_size` or when the
+    oldest queued request has waited `max_wait_ms`, whichever comes first.
+    `num_dispatchers` batches may be in flight at once (one per Triton model
+    instance is a good default).
+
+    Args:
+        infer_fn: callable taking a float32 (N, 3, 352, 352) array and
+            returning an (N,) array of scores
+        max_batch_size: upper bound on frames per batch (<= model max_batch_size)
+        max_wait_ms: how long the first frame of a batch may wait for company
+        max_queue_size: bound on queued frames; submit() fails fast beyond it
+        num_dispatchers: number of concurrent dispatcher threads
+    """
+
+    def __init__(self, infer_fn, max_batch_size=8, max_wait_ms=5.0, max_queue_size=256, num_dispatchers=2):
+        self.infer_fn = infer_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_s = max_wait_ms / 1000.0
+        self.num_dispatchers = num_dispatchers
+
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._stop = threading.Event()
+        self._threads = []
+
+        self._metrics = BatchMetrics()
+
+    def start(self):
+        if self._threads:
+            return self
+        self._stop.clear()
+        for i in range(self.num_dispatchers):
+            thread = threading.Thread(target=self._dispatch_loop, name=f'batch-dispatcher-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"✅ Micro-batcher started (max_batch={self.max_batch_size}, max_wait={self.max_wait_s * 1000:.1f}ms, dispatchers={self.num_dispatchers})")
+        return self
+
+    def stop(self):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout=1.0)
+        self._threads = []
+
+    def submit(self, tensor):
+        """
+        Queue one preprocessed frame
+
+        Args:
+            tensor: float32 numpy array (1, 3, 352, 352)
+
+        Returns:
+            Future resolving to the float quality score
+
+        Raises:
+            BatcherFullError: the queue is at capacity
+        """
+        return self._enqueue(tensor)[0]
+
+    def _enqueue(self, tensor):
+        future, copied = Future(), threading.Event()
+        try:
+            self._queue.put_nowait((tensor, future, time.perf_counter(), copied))
+        except queue.Full:
+            self._metrics.record_rejected()
+            raise BatcherFullError('Quality inference queue is full')
+        return future, copied
+
+    def infer(self, tensor, timeout=None):
+        """
+        Submit one frame and wait for its score
+
+        The tensor is read when its batch is stacked, not when it is queued. On
+        timeout the frame is withdrawn from the queue, or, when a dispatcher
+        already took it, waited for until its batch has been stacked, so the
+        caller may reuse the buffer (e.g. a TensorArena slot) as soon as this
+        returns or raises.
+
+        Raises:
+            BatcherFullError: the queue is at capacity
+            concurrent.futures.TimeoutError: no score within timeout seconds
+        """
+        future, copied = self._enqueue(tensor)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            if not future.cancel():
+                copied.wait()
+            raise
+
+    def _collect(self):
+        try:
+            first = self._queue.get(timeout=0.1)
+        except queue.Empty:
+            return []
+
+        items = [first]
+        deadline = first[2] + self.max_wait_s
+        while len(items) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining <= 0:
+                    items.append(self._queue.get_nowait())
+                else:
+                    items.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return items
+
+    def _dispatch_loop(self):
+        while not self._stop.is_set():
+            # Frames whose caller gave up (infer() timeout) are dropped; the rest can no longer be cancelled
+            items = [item for item in self._collect() if item[1].set_running_or_notify_cancel()]
+            if not items:
+                continue
+
+            dispatch_time = time.perf_counter()
+            waits_ms = [(dispatch_time - submitted) * 1000 for _, _, submitted, _ in items]
+            futures = [future for _, future, _, _ in items]
+
+            try:
+                try:
+                    batch = np.concatenate([tensor for tensor, _, _, _ in items], axis=0)
+                finally:
+                    for _, _, _, copied in items:
+                        copied.set()  # The callers' buffers are free again
+                scores = self.infer_fn(batch)
+                for future, score in zip(futures, scores):
+                    future.set_result(float(score))
+                failed = False
+            except Exception as e:
+                for future in futures:
+                    future.set_exception(e)
+                failed = True
+
+            self._metrics.record_batch(waits_ms, failed)
+
+    def stats(self):
+        """Batch-size distribution and queue-wait metrics for tuning against config.pbtxt"""
+        return self._metrics.snapshot(self.max_batch_size, self.max_wait_s * 1000, self._queue.qsize())
+
+
+class AsyncMicroBatcher:
+    """
+    asyncio counterpart of MicroBatcher for the async server
+
+    Same batching policy and stats; `infer_fn` is a coroutine function, and
+    waiting frames are futures on the event loop instead of blocked threads.
+    start() must be called from within the running loop.
+    """
+
+    def __init__(self, infer_fn, max_batch_size=8, max_wait_ms=5.0, max_queue_size=256, num_dispatchers=2):
+        self.infer_fn = infer_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_s = max_wait_ms / 1000.0
+        self.num_dispatchers = num_dispatchers
+        self.max_queue_size = max_queue_size
+
+        self._queue = None
+        self._tasks = []
+        self._metrics = BatchMetrics()
+
+    def start(self):
+        if self._tasks:
+            return self
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        loop = asyncio.get_running_loop()
+        self._tasks = [loop.create_task(self._dispatch_loop()) for _ in range(self.num_dispatchers)]
+        logger.info(f"✅ Async micro-batcher started (max_batch={self.max_batch_size}, max_wait={self.max_wait_s * 1000:.1f}ms, dispatchers={self.num_dispatchers})")
+        return self
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, tensor):
+        """
+        Queue one preprocessed (1, 3, 352, 352) frame
+
+        Returns:
+            asyncio.Future resolving to the float quality score
+
+        Raises:
+            BatcherFullError: the queue is at capacity
+        """
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((tensor, future, time.perf_counter()))
+        except asyncio.QueueFull:
+            self._metrics.record_rejected()
+            raise BatcherFullError('Quality inference queue is full')
+        return future
+
+    async def infer(self, tensor):
+        """Submit one frame and wait for its score"""
+        return await self.submit(tensor)
+
+    async def _collect(self):
+        first = await self._queue.get()
+        items = [first]
+        deadline = first[2] + self.max_wait_s
+        while len(items) < self.max_batch_size:
+            if not self._queue.empty():
+                items.append(self._queue.get_nowait())
+                continue
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                items.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return items
+
+    async def _dispatch_loop(self):
+        while True:
+            items = await self._collect()
+
+            dispatch_time = time.perf_counter()
+            waits_ms = [(dispatch_time - submitted) * 1000 for _, _, submitted in items]
+            futures = [future for _, future, _ in items]
+
+            try:
+                batch = np.concatenate([tensor for tensor, _, _ in items], axis=0)
+                scores = await self.infer_fn(batch)
+                for future, score in zip(futures, scores):
+                    if not future.done():  # The request may have been cancelled (client went away)
+                        future.set_result(float(score))
+                failed = False
+            except asyncio.CancelledError:
+                for future in futures:
+                    future.cancel()
+                raise
+            except Exception as e:
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+                failed = True
+
+            self._metrics.record_batch(waits_ms, failed)
+
+    def stats(self):
+        """Batch-size distribution and queue-wait metrics (same schema as MicroBatcher)"""
+        queue_depth = self._queue.qsize() if self._queue is not None else 0
+        return self._metrics.snapshot(self.max_batch_size, self.max_wait_s * 1000, queue_depth)
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Benchmark: chunk completion tracking, directory glob vs. ChunkManifest
+Simulates an upload of N chunks into a fresh chunk directory. After each chunk
+is written (not timed), the old upload_chunk() counted `chunk_*` files with
+glob; the new one marks the chunk in the upload's ChunkManifest. Reports the
+tracking time per upload and for the last chunk (the glob cost grows with the
+directory, the manifest cost does not).
+
+Usage:
+    python3 bench_chunk_tracking.py [chunk_counts...]    # default 100 1000 10000
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from chunk_manifest import ChunkManifest
+
+CHUNK_BYTES = b'\0' * 1024  # Chunk size does not affect tracking cost
+
+
+def glob_count(chunks_dir, index, total_chunks):
+    return len(list(chunks_dir.glob('chunk_*')))
+
+
+def manifest_count(chunks_dir, index, total_chunks):
+    return ChunkManifest(chunks_dir, total_chunks).mark_received(index)
+
+
+def run(track, total_chunks):
+    """(total tracking seconds, last chunk ms)"""
+    with tempfile.TemporaryDirectory(dir=Path(__file__).parent) as tmp:
+        chunks_dir = Path(tmp)
+        elapsed = last = 0.0
+        for index in range(total_chunks):
+            (chunks_dir / f"chunk_{index:04d}").write_bytes(CHUNK_BYTES)
+            start = time.perf_counter()
+            received = track(chunks_dir, index, total_chunks)
+            last = time.perf_counter() - start
+            elapsed += last
+        assert received == total_chunks
+    return elapsed, last * 1000
+
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or [100, 1000, 10000]
+
+    print("=" * 78)
+    print("Chunk completion tracking - time spent deciding 'is the upload complete?'")
+    print("=" * 78)
+    print(f"{'Chunks':>8} {'glob total':>12} {'glob last':>11} {'manifest total':>16} {'manifest last':>15} {'Speedup':>9}")
+    print("-" * 78)
+    for total_chunks in counts:
+        glob_total, glob_last = run(glob_count, total_chunks)
+        manifest_total, manifest_last = run(manifest_count, total_chunks)
+        print(f"{total_chunks:>8} {glob_total * 1000:>10.1f}ms {glob_last:>9.3f}ms "
+              f"{manifest_total * 1000:>14.1f}ms {manifest_last:>13.3f}ms {glob_total / manifest_total:>8.1f}x")
+    print("=" * 78)
+
+
+if __name__ == '__main__':
+    main()
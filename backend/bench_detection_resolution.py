@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Accuracy/latency report: full-resolution vs. downscaled YuNet detection
+For every image in a directory, runs the preprocessing pipeline with detection
+at full resolution and at each downscaled long side, then reports detection
+latency, status agreement, bbox IoU and the difference in the model input
+tensor relative to the full-resolution baseline.
+
+Usage:
+    python3 bench_detection_resolution.py <image_dir> [long_side ...]
+    python3 bench_detection_resolution.py ../data/frames 480 320
+"""
+
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from face_preprocessing import FaceDetectorPool, detect_raw_faces, preprocess_with_face_detection
+
+MODEL_PATH = Path(__file__).parent.parent / 'ai-models' / 'yunet' / 'face_detection_yunet_2023mar.onnx'
+IMAGE_SUFFIXES = {'.jpg', '.jpeg', '.png', '.webp'}
+TIMING_REPEATS = 5
+
+
+def bbox_iou(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    ix = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    iy = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = ix * iy
+    union = aw * ah + bw * bh - inter
+    return inter / union if union > 0 else 0.0
+
+
+def detection_ms(detector, img_bgr, long_side):
+    detect_raw_faces(detector, img_bgr, long_side)  # Warm up this resolution
+    start = time.perf_counter()
+    for _ in range(TIMING_REPEATS):
+        detect_raw_faces(detector, img_bgr, long_side)
+    return (time.perf_counter() - start) / TIMING_REPEATS * 1000
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    image_dir = Path(sys.argv[1])
+    long_sides = [int(v) for v in sys.argv[2:]] or [480, 320]
+
+    images = sorted(p for p in image_dir.iterdir() if p.suffix.lower() in IMAGE_SUFFIXES)
+    if not images:
+        print(f"❌ No images found in {image_dir}")
+        sys.exit(1)
+
+    if not MODEL_PATH.exists():
+        print(f"❌ YuNet model not found: {MODEL_PATH}")
+        sys.exit(1)
+
+    cv2.setNumThreads(1)
+    detector = FaceDetectorPool(MODEL_PATH, warm_resolutions=[], warm_per_resolution=0)
+    settings = [None] + long_sides
+    rows = {setting: {'ms': [], 'agree': 0, 'iou': [], 'tensor_diff': []} for setting in settings}
+
+    for path in images:
+        image_bytes = path.read_bytes()
+        img_bgr = cv2.imdecode(np.frombuffer(image_bytes, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if img_bgr is None:
+            continue
+
+        baseline = None
+        for setting in settings:
+            result = preprocess_with_face_detection(image_bytes, detector, detection_long_side=setting)
+            row = rows[setting]
+            row['ms'].append(detection_ms(detector, img_bgr, setting))
+
+            if setting is None:
+                baseline = result
+                row['agree'] += 1
+                continue
+
+            if result['status'] == baseline['status']:
+                row['agree'] += 1
+            if result.get('face_bbox') and baseline.get('face_bbox'):
+                row['iou'].append(bbox_iou(result['face_bbox'], baseline['face_bbox']))
+            if result['status'] == 'OK' and baseline['status'] == 'OK':
+                row['tensor_diff'].append(float(np.abs(result['tensor'] - baseline['tensor']).mean()))
+
+    print("=" * 90)
+    print(f"Detection resolution report - {len(images)} images from {image_dir}")
+    print("=" * 90)
+    print(f"{'Detection':<12} {'Detect p50':>11} {'Speedup':>8} {'Status agree':>13} "
+          f"{'Mean IoU':>9} {'Min IoU':>8} {'Tensor |diff|':>14}")
+    print("-" * 90)
+    base_ms = statistics.median(rows[None]['ms'])
+    for setting in settings:
+        row = rows[setting]
+        p50 = statistics.median(row['ms'])
+        label = 'full-res' if setting is None else f'{setting}px'
+        mean_iou = f"{statistics.mean(row['iou']):.3f}" if row['iou'] else '-'
+        min_iou = f"{min(row['iou']):.3f}" if row['iou'] else '-'
+        diff = f"{statistics.mean(row['tensor_diff']):.4f}" if row['tensor_diff'] else '-'
+        print(f"{label:<12} {p50:>9.2f}ms {base_ms / p50:>7.1f}x "
+              f"{row['agree'] / len(row['ms']) * 100:>12.1f}% {mean_iou:>9} {min_iou:>8} {diff:>14}")
+    print("=" * 90)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark: shared YuNet detector vs. FaceDetectorPool under mixed resolutions
+"shared" is the old get_face_detector() behaviour made thread-safe: one global
+detector, a lock around setInputSize()+detect(). "pool" uses FaceDetectorPool,
+where each in-flight frame gets a detector already sized for its resolution.
+
+Usage:
+    python3 bench_face_detector.py [threads] [frames_per_thread]
+"""
+
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from face_preprocessing import FaceDetectorPool, COMMON_RESOLUTIONS
+
+MODEL_PATH = Path(__file__).parent.parent / 'ai-models' / 'yunet' / 'face_detection_yunet_2023mar.onnx'
+# Mixed traffic: mostly common webcam sizes plus the occasional odd phone resolution
+TRAFFIC = COMMON_RESOLUTIONS * 3 + [(720, 1280), (960, 540)]
+
+
+class SharedDetector:
+    """Single detector reconfigured per frame (serialised by a lock)"""
+
+    def __init__(self):
+        self.detector = cv2.FaceDetectorYN.create(str(MODEL_PATH), "", (320, 320), 0.6, 0.3)
+        self.lock = threading.Lock()
+
+    def detect(self, img_bgr):
+        with self.lock:
+            self.detector.setInputSize((img_bgr.shape[1], img_bgr.shape[0]))
+            _, faces = self.detector.detect(img_bgr)
+        return faces
+
+
+def run(label, detector, frames, threads, frames_per_thread):
+    def worker(seed):
+        latencies = []
+        for i in range(frames_per_thread):
+            frame = frames[(seed + i) % len(frames)]
+            start = time.perf_counter()
+            detector.detect(frame)
+            latencies.append((time.perf_counter() - start) * 1000)
+        return latencies
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        latencies = [l for chunk in executor.map(worker, range(threads)) for l in chunk]
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    print(f"\n{label}")
+    print(f"   Throughput: {len(latencies) / elapsed:.1f} frames/s")
+    print(f"   p50:        {statistics.median(latencies):.2f}ms")
+    print(f"   p99:        {latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]:.2f}ms")
+
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    frames_per_thread = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    if not MODEL_PATH.exists():
+        print(f"❌ Detector not found: {MODEL_PATH}")
+        sys.exit(1)
+
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 255, (h, w, 3), dtype=np.uint8) for w, h in TRAFFIC]
+
+    print("=" * 60)
+    print(f"Face detector benchmark - {threads} threads x {frames_per_thread} frames, "
+          f"{len(set(TRAFFIC))} resolutions")
+    print("=" * 60)
+
+    run("BEFORE: shared detector + setInputSize per frame", SharedDetector(), frames, threads, frames_per_thread)
+
+    pool = FaceDetectorPool(MODEL_PATH, warm_per_resolution=2)
+    run("AFTER: detector pool keyed by resolution", pool, frames, threads, frames_per_thread)
+    print(f"   Pool:       {pool.stats()}")
+
+
+if __name__ == '__main__':
+    main()
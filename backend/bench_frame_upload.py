@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark: base64-in-JSON vs. binary frame upload for /api/quality/check
+Measures request bytes and server-side CPU time per frame for everything up to
+and including cv2.imdecode (face detection and inference are identical for both).
+
+Usage:
+    python3 bench_frame_upload.py [iterations]
+"""
+
+import base64
+import json
+import sys
+import time
+
+import cv2
+import numpy as np
+
+RESOLUTIONS = [(640, 480), (1280, 720), (1280, 960)]
+JPEG_QUALITY = 95  # Same as canvas.toDataURL('image/jpeg', 0.95) in the frontend
+
+
+def make_jpeg(width, height):
+    """Synthetic camera-like frame: smooth gradient plus sensor noise"""
+    rng = np.random.default_rng(0)
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    img = np.stack([x + 0 * y, y + 0 * x, (x + y) / 2], axis=2)
+    img += rng.normal(0, 8, img.shape)
+    ok, buf = cv2.imencode('.jpg', np.clip(img, 0, 255).astype(np.uint8), [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY])
+    assert ok
+    return buf.tobytes()
+
+
+def json_path(body):
+    data = json.loads(body)
+    image_data = data['image']
+    if 'base64,' in image_data:
+        image_data = image_data.split('base64,')[1]
+    image_bytes = base64.b64decode(image_data)
+    return cv2.imdecode(np.frombuffer(image_bytes, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+
+def binary_path(body):
+    return cv2.imdecode(np.frombuffer(body, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+
+def measure(fn, body, iterations):
+    fn(body)  # Warm up
+    start = time.process_time()
+    for _ in range(iterations):
+        fn(body)
+    return (time.process_time() - start) / iterations * 1000
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    cv2.setNumThreads(1)  # Per-request cost, not multi-core throughput
+
+    print("=" * 90)
+    print(f"Frame upload benchmark - {iterations} iterations, CPU time per frame")
+    print("=" * 90)
+    print(f"{'Resolution':<12} {'JSON bytes':>12} {'Binary bytes':>13} {'Saved':>7} "
+          f"{'JSON CPU':>10} {'Binary CPU':>11} {'Saved':>9} {'(pre-imdecode)':>15}")
+    print("-" * 90)
+
+    for width, height in RESOLUTIONS:
+        jpeg = make_jpeg(width, height)
+        json_body = json.dumps({'image': 'data:image/jpeg;base64,' + base64.b64encode(jpeg).decode()}).encode()
+
+        json_ms = measure(json_path, json_body, iterations)
+        binary_ms = measure(binary_path, jpeg, iterations)
+
+        # Overhead that exists only on the JSON path
+        def json_overhead(body):
+            image_data = json.loads(body)['image'].split('base64,')[1]
+            return np.frombuffer(base64.b64decode(image_data), dtype=np.uint8)
+        overhead_ms = measure(json_overhead, json_body, iterations)
+
+        print(f"{f'{width}x{height}':<12} {len(json_body):>12,} {len(jpeg):>13,} "
+              f"{(1 - len(jpeg) / len(json_body)) * 100:>6.1f}% "
+              f"{json_ms:>8.2f}ms {binary_ms:>9.2f}ms {json_ms - binary_ms:>7.2f}ms {overhead_ms:>13.2f}ms")
+
+    print("=" * 90)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Benchmark: inference backends (ONNX Runtime / OpenCV DNN on CPU, or Triton)
+Reports latency and throughput per batch size for one backend, so CPU-only
+nodes can be sized before switching INFERENCE_BACKEND.
+
+Usage:
+    python3 bench_inference_backend.py [backend] [intra_op_threads] [onnx_path]
+    python3 bench_inference_backend.py onnxruntime 4
+    python3 bench_inference_backend.py triton
+
+The whole pipeline can then be load-tested with stress_test.py against a
+backend started with e.g. INFERENCE_BACKEND=onnxruntime.
+"""
+
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from inference_backends import create_inference_backend
+
+BATCH_SIZES = [1, 4, 8, 16]
+ITERATIONS = 20
+DEFAULT_ONNX_PATH = Path(__file__).parent.parent / 'ai-models' / 'efficient_fiqa_student.onnx'
+
+
+def make_triton_pool():
+    from triton_pool import TritonClientPool
+    return TritonClientPool(os.environ.get('TRITON_URL', 'localhost:8003'), 'efficient_fiqa').start()
+
+
+def main():
+    name = sys.argv[1] if len(sys.argv) > 1 else 'onnxruntime'
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    model_path = sys.argv[3] if len(sys.argv) > 3 else DEFAULT_ONNX_PATH
+
+    if name == 'opencv' and threads:
+        import cv2
+        cv2.setNumThreads(threads)  # OpenCV DNN runs on OpenCV's process-wide pool (the server's OPENCV_THREADS_PER_WORKER)
+
+    backend = create_inference_backend(name, model_path=model_path, triton_pool_factory=make_triton_pool,
+                                       intra_op_threads=threads, max_batch_size=max(BATCH_SIZES), num_buffers=1)
+
+    print("=" * 70)
+    print(f"Inference backend benchmark - {backend.name} (threads={threads or 'default'})")
+    print("=" * 70)
+    print(f"{'Batch':<8} {'p50 (ms)':>10} {'p99 (ms)':>10} {'ms/frame':>10} {'frames/s':>10}")
+    print("-" * 70)
+
+    try:
+        for batch_size in BATCH_SIZES:
+            batch = np.random.default_rng(0).standard_normal((batch_size, 3, 352, 352)).astype(np.float32)
+            backend.infer(batch)  # Warm up
+
+            latencies = []
+            for _ in range(ITERATIONS):
+                start = time.perf_counter()
+                scores = backend.infer(batch)
+                latencies.append((time.perf_counter() - start) * 1000)
+            assert scores.shape == (batch_size,)
+
+            latencies.sort()
+            p50 = statistics.median(latencies)
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+            print(f"{batch_size:<8} {p50:>10.2f} {p99:>10.2f} {p50 / batch_size:>10.2f} {batch_size / p50 * 1000:>10.1f}")
+    finally:
+        backend.close()
+
+    print("=" * 70)
+
+
+if __name__ == '__main__':
+    main()
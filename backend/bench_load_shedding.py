@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark: /api/quality/check past saturation, with and without admission control
+Starts the Triton stand-in (triton_standin.py), then the Flask app (threaded
+Werkzeug server) twice - QUALITY_MAX_IN_FLIGHT=0 (every frame queues) and with
+the admission limits from the environment / app.py defaults - and runs
+stress_test.run_stress_test() at concurrency levels beyond what the server can
+absorb. Reports goodput (answered frames/s), the shed share (fast 429s) and
+latency of answered frames; with admission control p99 should stop growing
+with the number of users.
+
+The result cache is disabled, since stress_test.py resends the same frames.
+stress_test.py's generated images contain no face, so they stop at face
+detection; pass a JPEG with a face to exercise inference as well. Needs the
+YuNet model in ai-models/yunet/.
+
+Usage:
+    python3 bench_load_shedding.py [face_image.jpg | -] [triton_latency_ms]
+"""
+
+import asyncio
+import base64
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import stress_test
+from bench_serving_modes import wait_healthy
+from triton_standin import start_standin
+
+LEVELS = [50, 100, 200, 400]
+REQUESTS_PER_USER = 3
+STANDIN_PORT = 8012
+PORT = 5104
+MODES = {
+    'no admission': {'QUALITY_MAX_IN_FLIGHT': '0'},
+    'admission': {},
+}
+
+
+def main():
+    images = None
+    if len(sys.argv) > 1 and sys.argv[1] != '-':
+        images = ['data:image/jpeg;base64,' + base64.b64encode(Path(sys.argv[1]).read_bytes()).decode()]
+    latency_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 10.0
+
+    server, _ = start_standin(STANDIN_PORT, latency_ms)
+    env = dict(os.environ, TRITON_URL=f'localhost:{STANDIN_PORT}', INFERENCE_BACKEND='triton', INFERENCE_FALLBACK='',
+               RESULT_CACHE_ENABLED='0')
+    command = [sys.executable, '-c', f'import app; app.app.run(host="127.0.0.1", port={PORT}, threaded=True)']
+    rows = []
+    try:
+        for label, overrides in MODES.items():
+            process = subprocess.Popen(command, cwd=Path(__file__).parent, env=dict(env, **overrides),
+                                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            try:
+                if not wait_healthy(PORT):
+                    print(f"❌ {label} did not start on port {PORT}")
+                    continue
+                stress_test.BACKEND_URL = f'http://127.0.0.1:{PORT}'
+                for users in LEVELS:
+                    summary = asyncio.run(stress_test.run_stress_test(users, REQUESTS_PER_USER, images=images))
+                    rows.append((label, users, summary))
+                    time.sleep(2)
+            finally:
+                process.terminate()
+                process.wait(timeout=10)
+    finally:
+        server.shutdown()
+
+    def ms(value):
+        return f"{value:.0f}" if value is not None else '-'
+
+    print("=" * 92)
+    print(f"Load shedding - {REQUESTS_PER_USER} requests/user, Triton stand-in {latency_ms:.0f}ms/batch")
+    print("=" * 92)
+    print(f"{'Mode':<14} {'Users':>6} {'OK':>6} {'Shed':>6} {'Failed':>7} {'OK/s':>7} "
+          f"{'OK p50 (ms)':>12} {'OK p99 (ms)':>12} {'All p99 (ms)':>13}")
+    print("-" * 92)
+    for label, users, summary in rows:
+        print(f"{label:<14} {users:>6} {summary['successful']:>6} {summary['shed']:>6} {summary['failed']:>7} "
+              f"{summary['goodput']:>7.1f} {ms(summary['p50_ms']):>12} {ms(summary['p99_ms']):>12} "
+              f"{ms(summary['p99_all_ms']):>13}")
+    print("=" * 92)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Load test: chunked video upload throughput vs. parallel chunk streams
+Starts the backend under gunicorn (gunicorn.conf.py, GUNICORN_WORKERS worker
+processes, so chunks of one video land on different workers), then uploads
+videos in 1MB chunks (uploader.js CHUNK_SIZE) with 1, 2, 4 and 8 chunks in
+flight per video, for both chunk layouts (chunk files + reassembly, and
+direct-offset writes with chunk_size). Each request is delayed by an emulated
+network round trip (default 50ms; localhost has none), which is what a
+single stream pays once per chunk. Reports MB/s and speedup over one stream.
+
+Every upload sends a few random chunks and the last one twice in a row (in
+parallel with more than one stream), as retries after lost responses do. Each
+video is then checked: byte-identical, and no chunk directory or .part file
+left behind, only the completion tombstone (the video is completed exactly
+once).
+
+Usage:
+    python3 bench_parallel_upload.py [video_mb] [rtt_ms]    # default 32MB, 50ms
+"""
+
+import asyncio
+import hashlib
+import os
+import random
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import aiohttp
+
+from bench_serving_modes import wait_healthy
+from chunk_manifest import COMPLETED_SUFFIX
+
+PORT = 5106
+CHUNK_SIZE = 1024 * 1024
+STREAMS = [1, 2, 4, 8]
+LAYOUTS = ['chunk files', 'direct']
+DUPLICATES = 4  # Chunks per upload sent twice, back to back (in parallel with more than one stream)
+DATA_DIR = Path(__file__).parent.parent / 'data' / 'facial_recordings'  # app.BASE_DATA_DIR
+
+
+async def send_chunk(http, session_id, video_id, index, video, layout, rtt_s):
+    await asyncio.sleep(rtt_s)
+    form = aiohttp.FormData()
+    form.add_field('session_id', session_id)
+    form.add_field('video_id', video_id)
+    form.add_field('chunk_index', str(index))
+    form.add_field('total_chunks', str(-(-len(video) // CHUNK_SIZE)))
+    if layout == 'direct':
+        form.add_field('chunk_size', str(CHUNK_SIZE))
+    form.add_field('chunk', video[index * CHUNK_SIZE:(index + 1) * CHUNK_SIZE], filename=f'chunk_{index}')
+    async with http.post(f'http://127.0.0.1:{PORT}/api/upload/chunk', data=form) as response:
+        response.raise_for_status()
+        return (await response.json())['status']
+
+
+async def upload(http, session_id, video_id, video, layout, streams, rtt_s):
+    """Upload one video over `streams` parallel streams, like uploader.js; returns seconds"""
+    total_chunks = -(-len(video) // CHUNK_SIZE)
+    duplicates = set(random.sample(range(total_chunks), DUPLICATES)) | {total_chunks - 1}
+    pending = [i for index in range(total_chunks) for i in [index] * (2 if index in duplicates else 1)]
+    statuses = []
+
+    async def stream():
+        while pending:
+            index = pending.pop(0)
+            statuses.append(await send_chunk(http, session_id, video_id, index, video, layout, rtt_s))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(stream() for _ in range(streams)))
+    elapsed = time.perf_counter() - start
+    assert 'video_complete' in statuses, f'{video_id}: no chunk completed the video'
+    return elapsed
+
+
+async def run(video_mb, rtt_s):
+    video = os.urandom(video_mb * 1024 * 1024)
+    rows = []
+    async with aiohttp.ClientSession() as http:
+        async with http.post(f'http://127.0.0.1:{PORT}/api/session/create', json={}) as response:
+            session_id = (await response.json())['session_id']
+        session_dir = DATA_DIR / session_id
+        for layout in LAYOUTS:
+            for streams in STREAMS:
+                video_id = f"bench_{layout.split()[0]}_{streams}"
+                elapsed = await upload(http, session_id, video_id, video, layout, streams, rtt_s)
+                video_path = session_dir / f"{video_id}.webm"
+                assert hashlib.sha256(video_path.read_bytes()).digest() == hashlib.sha256(video).digest(), video_id
+                expected = {video_path.name, f"{video_id}_chunks{COMPLETED_SUFFIX}"}
+                leftovers = [p.name for p in session_dir.iterdir() if p.name.startswith(video_id) and p.name not in expected]
+                assert not leftovers, f'{video_id}: left behind {leftovers}'
+                rows.append((layout, streams, elapsed))
+    return session_dir, rows
+
+
+def main():
+    video_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    rtt_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 50.0
+
+    env = dict(os.environ, GUNICORN_BIND=f'127.0.0.1:{PORT}', GUNICORN_PIDFILE=f'/tmp/bench_parallel_upload_{PORT}.pid')
+    process = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py'], cwd=Path(__file__).parent,
+                               env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        if not wait_healthy(PORT, timeout=60):
+            print(f"❌ gunicorn did not start on port {PORT}")
+            return
+        session_dir, rows = asyncio.run(run(video_mb, rtt_ms / 1000))
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+    print("=" * 64)
+    print(f"Parallel chunk upload - {video_mb}MB video, 1MB chunks, {rtt_ms:.0f}ms emulated RTT")
+    print("=" * 64)
+    print(f"{'Layout':<13} {'Streams':>8} {'Time (s)':>10} {'MB/s':>8} {'Speedup':>9}")
+    print("-" * 64)
+    baseline = {}
+    for layout, streams, elapsed in rows:
+        baseline.setdefault(layout, elapsed)
+        print(f"{layout:<13} {streams:>8} {elapsed:>10.2f} {video_mb / elapsed:>8.1f} {baseline[layout] / elapsed:>8.1f}x")
+    print("=" * 64)
+    print(f"Videos verified (byte-identical, no leftovers) in {session_dir}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark: unfused per-frame preprocessing vs. fused arena preprocessing
+Compares the old crop -> resize -> cvtColor -> astype -> normalize ->
+transpose -> expand_dims chain (plus the per-request gc.collect() it needed)
+with normalize_face_into() writing into a reused TensorArena slot.
+
+Reports latency per frame, bytes allocated per frame (tracemalloc tracks numpy
+and cv2 output arrays) and process RSS growth over the run.
+
+Usage:
+    python3 bench_preprocess_alloc.py [frames]
+"""
+
+import gc
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from face_preprocessing import IMAGENET_MEAN, IMAGENET_STD, TensorArena, normalize_face_into
+
+CROP_SIZES = [(260, 260), (420, 420), (610, 610)]  # Face crops from 640x480 .. 1280x960 frames
+
+
+def unfused(crop):
+    face_resized = cv2.resize(crop, (352, 352), interpolation=cv2.INTER_LINEAR)
+    face_rgb = cv2.cvtColor(face_resized, cv2.COLOR_BGR2RGB)
+    face_normalized = face_rgb.astype(np.float32) / 255.0
+    face_normalized = (face_normalized - IMAGENET_MEAN) / IMAGENET_STD
+    face_tensor = np.transpose(face_normalized, (2, 0, 1))
+    face_tensor = np.expand_dims(face_tensor, axis=0)
+    result = np.ascontiguousarray(face_tensor)  # What the inference client serialises
+    del face_tensor
+    gc.collect()  # Old check_quality() did this on every request
+    return result
+
+
+def fused(crop, arena):
+    slot = arena.acquire()
+    try:
+        return normalize_face_into(crop, slot[0][0], slot[1])
+    finally:
+        arena.release(slot)
+
+
+def rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run(label, fn, crops, frames):
+    for crop in crops:
+        fn(crop)  # Warm up
+
+    rss_before = rss_mb()
+    latencies = []
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    traced_before, _ = tracemalloc.get_traced_memory()
+    for i in range(frames):
+        start = time.perf_counter()
+        fn(crops[i % len(crops)])
+        latencies.append((time.perf_counter() - start) * 1000)
+    _, peak = tracemalloc.get_traced_memory()
+    snapshot = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(stat.size for stat in snapshot.statistics('filename'))
+
+    latencies.sort()
+    print(f"\n{label}")
+    print(f"   p50 latency:        {statistics.median(latencies):.3f}ms")
+    print(f"   p99 latency:        {latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]:.3f}ms")
+    print(f"   Peak traced memory: {(peak - traced_before) / 1024 / 1024:.2f}MB")
+    print(f"   Retained after run: {allocated / 1024:.1f}KB")
+    print(f"   Max RSS growth:     {rss_mb() - rss_before:.1f}MB")
+
+
+def main():
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    cv2.setNumThreads(1)
+    rng = np.random.default_rng(0)
+    crops = [rng.integers(0, 255, (h, w, 3), dtype=np.uint8) for w, h in CROP_SIZES]
+
+    print("=" * 60)
+    print(f"Preprocessing allocation benchmark - {frames} frames")
+    print("=" * 60)
+
+    run("BEFORE: unfused pipeline + gc.collect() per frame", unfused, crops, frames)
+    arena = TensorArena(preallocate=1)
+    run("AFTER: fused LUT normalize into arena buffers", lambda crop: fused(crop, arena), crops, frames)
+    print(f"   Arena:              {arena.stats()}")
+
+
+if __name__ == '__main__':
+    main()
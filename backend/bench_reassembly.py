@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark: chunk-directory reassembly, read/write loop vs. reassemble_chunks()
+Writes a recording of each size as chunk files (1MB by default, uploader.js
+CHUNK_SIZE; up to MAX_CONTENT_LENGTH from other clients), then reassembles it in a fresh subprocess per method, so peak RSS is measured
+per method:
+    loop        the old upload_chunk() loop: outfile.write(chunk.read())
+    kernel      reassemble_chunks() (copy_file_range / sendfile), fsync 'none'
+    kernel+end  reassemble_chunks() with UPLOAD_FSYNC='end'
+Reports wall time, CPU time and peak RSS growth over the process baseline.
+Chunk files are usually still in the page cache right after an upload, as here.
+
+The old loop holds one whole chunk in memory, so its peak RSS grows with the
+chunk size; reassemble_chunks() holds none.
+
+Usage:
+    python3 bench_reassembly.py [--chunk-mb=N] [size_mb ...]    # default 1MB chunks; 100 500 1000 2000
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from upload_storage import reassemble_chunks
+
+MB = 1024 * 1024
+METHODS = ['loop', 'kernel', 'kernel+end']
+
+
+def loop_reassemble(chunk_paths, video_path):
+    with open(video_path, 'wb') as outfile:
+        for chunk_path in chunk_paths:
+            with open(chunk_path, 'rb') as chunk:
+                outfile.write(chunk.read())
+
+
+def peak_rss_kb():
+    """VmHWM: unlike ru_maxrss it is not inherited from the parent across fork + exec"""
+    with open('/proc/self/status') as status:
+        return int(next(line for line in status if line.startswith('VmHWM:')).split()[1])
+
+
+def child(method, chunks_dir, count, size_mb):
+    """Runs in the subprocess: reassemble once, print the measurements as JSON"""
+    chunks_dir = Path(chunks_dir)
+    chunk_paths = [chunks_dir / f"chunk_{i:04d}" for i in range(int(count))]
+    video_path = chunks_dir.parent / 'video.webm'
+    baseline_kb = peak_rss_kb()
+    cpu_before = time.process_time()
+    start = time.perf_counter()
+    if method == 'loop':
+        loop_reassemble(chunk_paths, video_path)
+    else:
+        reassemble_chunks(chunk_paths, video_path, fsync='end' if method == 'kernel+end' else 'none')
+    elapsed = time.perf_counter() - start
+    assert video_path.stat().st_size == int(size_mb) * MB
+    video_path.unlink()
+    print(json.dumps({
+        'seconds': elapsed,
+        'cpu_seconds': time.process_time() - cpu_before,
+        'rss_growth_mb': (peak_rss_kb() - baseline_kb) / 1024
+    }))
+
+
+def main():
+    chunk_mb = next((int(arg.split('=', 1)[1]) for arg in sys.argv[1:] if arg.startswith('--chunk-mb=')), 1)
+    sizes_mb = [int(arg) for arg in sys.argv[1:] if not arg.startswith('--')] or [100, 500, 1000, 2000]
+    block = os.urandom(chunk_mb * MB)
+    rows = []
+    for size_mb in sizes_mb:
+        count = -(-size_mb // chunk_mb)
+        with tempfile.TemporaryDirectory(dir=Path(__file__).parent) as tmp:
+            chunks_dir = Path(tmp) / 'chunks'
+            chunks_dir.mkdir()
+            for i in range(count):
+                (chunks_dir / f"chunk_{i:04d}").write_bytes(block[:(size_mb - i * chunk_mb) * MB])
+            for method in METHODS:
+                command = [sys.executable, __file__, '--child', method, str(chunks_dir), str(count), str(size_mb)]
+                output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+                rows.append((size_mb, method, json.loads(output)))
+
+    print("=" * 70)
+    print(f"Reassembly of {chunk_mb}MB chunk files")
+    print("=" * 70)
+    print(f"{'Size':>8} {'Method':<12} {'Wall (s)':>9} {'CPU (s)':>9} {'MB/s':>8} {'Peak RSS growth':>17}")
+    print("-" * 70)
+    for size_mb, method, result in rows:
+        print(f"{size_mb:>6}MB {method:<12} {result['seconds']:>9.2f} {result['cpu_seconds']:>9.2f} "
+              f"{size_mb / result['seconds']:>8.0f} {result['rss_growth_mb']:>15.1f}MB")
+    print("=" * 70)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == '--child':
+        child(*sys.argv[2:])
+    else:
+        main()
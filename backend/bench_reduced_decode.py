@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Benchmark: full JPEG decode vs. header-first DCT-reduced decode per resolution
+For each source resolution, times the whole decode path of a frame before
+YuNet runs, for a face whose larger side is a given fraction of the frame
+height:
+    before      full cv2.imdecode + INTER_AREA resize to the detection size
+    after       header read, decode at the scale choose_decode_scale() picks
+                from the face size (FaceTracker.get_face_size), resize, plus
+                the full re-decode preprocessing does if the crop would be
+                under 352px (never, when the estimate holds)
+    no estimate the previous no-ROI rule: reduced as far as detection allows,
+                then a full re-decode whenever the crop is under 352px
+Also reports the cost of rejecting an oversized frame from its header.
+
+Usage:
+    python3 bench_reduced_decode.py [detection_long_side] [iterations] [face_fraction]    # default 480, 30, 0.35
+"""
+
+import statistics
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from face_preprocessing import (
+    CROP_MARGIN_RATIO, FIQA_INPUT_SIZE, MAX_IMAGE_PIXELS, choose_decode_scale, decode_image, detection_size,
+    read_image_header
+)
+
+RESOLUTIONS = [(640, 480), (1280, 720), (1920, 1080), (2560, 1440), (3840, 2160)]
+
+
+def synthetic_frame(width, height):
+    """Smooth gradients + mild noise, so JPEG size is close to a webcam frame"""
+    rng = np.random.default_rng(0)
+    xs = np.linspace(0, 255, width, dtype=np.float32)
+    ys = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    base = np.stack([np.broadcast_to(xs, (height, width)), np.broadcast_to(ys, (height, width)),
+                     np.full((height, width), 128, np.float32)], axis=2)
+    noise = rng.normal(0, 6, (height, width, 3)).astype(np.float32)
+    return np.clip(base + noise, 0, 255).astype(np.uint8)
+
+
+def time_ms(fn, iterations):
+    fn()  # Warm up
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def before(image_bytes, long_side):
+    img = decode_image(image_bytes)
+    size = detection_size(img.shape[1], img.shape[0], long_side)
+    if size != (img.shape[1], img.shape[0]):
+        img = cv2.resize(img, size, interpolation=cv2.INTER_AREA)
+    return img
+
+
+def crop_too_small(face_size, scale):
+    """The check before cropping: a crop under 352px from the reduced frame is redone at full resolution"""
+    return scale > 1 and face_size * (1 + 2 * CROP_MARGIN_RATIO) / scale < FIQA_INPUT_SIZE
+
+
+def reduced(image_bytes, long_side, scale, face_size):
+    img = decode_image(image_bytes, scale)
+    size = detection_size(img.shape[1], img.shape[0], long_side)
+    if size != (img.shape[1], img.shape[0]):
+        img = cv2.resize(img, size, interpolation=cv2.INTER_AREA)
+    if crop_too_small(face_size, scale):
+        decode_image(image_bytes)
+    return img
+
+
+def after(image_bytes, long_side, face_size):
+    image_format, width, height = read_image_header(image_bytes)
+    scale = choose_decode_scale(image_format, width, height, long_side, face_size=face_size)
+    return reduced(image_bytes, long_side, scale, face_size)
+
+
+def detection_only_scale(width, height, long_side):
+    """Scale the no-ROI rule used to pick: as reduced as detection allows, crop ignored"""
+    return next((scale for scale in (4, 2) if max(width, height) / scale >= long_side), 1)
+
+
+def main():
+    long_side = int(sys.argv[1]) if len(sys.argv) > 1 else 480
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    face_fraction = float(sys.argv[3]) if len(sys.argv) > 3 else 0.35
+    cv2.setNumThreads(1)
+
+    print("=" * 96)
+    print(f"Reduced decode benchmark - detection long side {long_side}px, face {face_fraction:.0%} of frame height, "
+          f"{iterations} iterations, 1 thread")
+    print("=" * 96)
+    print(f"{'Source':<11} {'Face':>5} {'Header':>9} {'Scale':>6} {'Before':>9} {'After':>9} {'Speedup':>8} "
+          f"{'No estimate':>21}")
+    print("-" * 96)
+
+    for width, height in RESOLUTIONS:
+        _, encoded = cv2.imencode('.jpg', synthetic_frame(width, height), [cv2.IMWRITE_JPEG_QUALITY, 85])
+        image_bytes = encoded.tobytes()
+        image_format, w, h = read_image_header(image_bytes)
+        face_size = int(h * face_fraction)
+        scale = choose_decode_scale(image_format, w, h, long_side, face_size=face_size)
+        old_scale = detection_only_scale(w, h, long_side)
+
+        header_us = time_ms(lambda: read_image_header(image_bytes), iterations) * 1000
+        before_ms = time_ms(lambda: before(image_bytes, long_side), iterations)
+        after_ms = time_ms(lambda: after(image_bytes, long_side, face_size), iterations)
+        old_ms = time_ms(lambda: reduced(image_bytes, long_side, old_scale, face_size), iterations)
+        old_note = f"1/{old_scale}{' + full' if crop_too_small(face_size, old_scale) else ''}"
+
+        print(f"{f'{w}x{h}':<11} {face_size:>5} {header_us:>7.1f}us {'1/' + str(scale):>6} "
+              f"{before_ms:>7.2f}ms {after_ms:>7.2f}ms {before_ms / after_ms:>7.1f}x "
+              f"{old_note:>11} {old_ms:>7.2f}ms")
+
+    # Decompression bomb: a tiny JPEG whose header claims 65535x65535 (12 GB decoded)
+    _, encoded = cv2.imencode('.jpg', np.zeros((16, 16, 3), np.uint8))
+    bomb = bytearray(encoded.tobytes())
+    sof = bomb.find(b'\xff\xc0')
+    bomb[sof + 5:sof + 9] = b'\xff\xff\xff\xff'
+    bomb = bytes(bomb)
+
+    def reject():
+        _, w, h = read_image_header(bomb)
+        assert w * h > MAX_IMAGE_PIXELS
+
+    print("-" * 96)
+    print(f"Oversized frame ({len(bomb)} bytes claiming 65535x65535) rejected from header in "
+          f"{time_ms(reject, iterations) * 1000:.1f}us, before any decode buffer is allocated")
+    print("=" * 96)
+
+
+if __name__ == '__main__':
+    main()
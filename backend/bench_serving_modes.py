@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Comparison: threaded Flask vs. async vs. gunicorn serving modes under stress_test.py
+Starts the Triton stand-in (triton_standin.py), then each server in turn
+against it - the Flask app on Werkzeug's threaded server (one process, one
+thread per in-flight request), async_server.py (one coroutine per in-flight
+request) and gunicorn.conf.py (preloaded, warmed worker processes; set
+GUNICORN_WORKERS to override one per CPU) - and runs
+stress_test.run_stress_test() at each concurrency level.
+
+stress_test.py's generated images contain no face, so they stop at face
+detection; pass a JPEG with a face to exercise inference as well. Needs the
+YuNet model in ai-models/yunet/.
+
+Usage:
+    python3 bench_serving_modes.py [face_image.jpg | -] [triton_latency_ms]
+"""
+
+import asyncio
+import base64
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+import stress_test
+from triton_standin import start_standin
+
+LEVELS = [50, 100, 200]
+REQUESTS_PER_USER = 5
+STANDIN_PORT = 8012
+SERVERS = {
+    'flask (threaded)': (5101, [sys.executable, '-c',
+                                'import app; app.app.run(host="127.0.0.1", port=5101, threaded=True)']),
+    'async (aiohttp)': (5102, [sys.executable, 'async_server.py']),
+    'gunicorn': (5103, [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py']),
+}
+
+
+def wait_healthy(port, timeout=30.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{port}/health', timeout=1) as response:
+                if response.status == 200:
+                    return True
+        except OSError:
+            time.sleep(0.3)
+    return False
+
+
+def main():
+    images = None
+    if len(sys.argv) > 1 and sys.argv[1] != '-':
+        images = ['data:image/jpeg;base64,' + base64.b64encode(Path(sys.argv[1]).read_bytes()).decode()]
+    latency_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 10.0
+
+    server, _ = start_standin(STANDIN_PORT, latency_ms)
+    # Measure raw capacity: no result cache (stress_test.py resends the same frames), no load shedding
+    env = dict(os.environ, TRITON_URL=f'localhost:{STANDIN_PORT}', INFERENCE_BACKEND='triton', INFERENCE_FALLBACK='',
+               RESULT_CACHE_ENABLED='0', QUALITY_MAX_IN_FLIGHT='0')
+    rows = []
+    try:
+        for label, (port, command) in SERVERS.items():
+            process = subprocess.Popen(command, cwd=Path(__file__).parent, env=dict(env, ASYNC_PORT=str(port), GUNICORN_BIND=f'127.0.0.1:{port}'),
+                                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            try:
+                if not wait_healthy(port):
+                    print(f"❌ {label} did not start on port {port}")
+                    continue
+                stress_test.BACKEND_URL = f'http://127.0.0.1:{port}'
+                for users in LEVELS:
+                    summary = asyncio.run(stress_test.run_stress_test(users, REQUESTS_PER_USER, images=images))
+                    rows.append((label, users, summary))
+                    time.sleep(2)
+            finally:
+                process.terminate()
+                process.wait(timeout=10)
+    finally:
+        server.shutdown()
+
+    print("=" * 84)
+    print(f"Serving mode comparison - {REQUESTS_PER_USER} requests/user, Triton stand-in {latency_ms:.0f}ms/batch")
+    print("=" * 84)
+    print(f"{'Server':<18} {'Users':>6} {'OK':>7} {'Failed':>7} {'req/s':>9} {'p50 (ms)':>10} {'p99 (ms)':>10}")
+    print("-" * 84)
+    for label, users, summary in rows:
+        p50 = f"{summary['p50_ms']:.1f}" if summary['p50_ms'] is not None else '-'
+        p99 = f"{summary['p99_ms']:.1f}" if summary['p99_ms'] is not None else '-'
+        print(f"{label:<18} {users:>6} {summary['successful']:>7} {summary['failed']:>7} "
+              f"{summary['throughput']:>9.1f} {p50:>10} {p99:>10}")
+    print("=" * 84)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-request Triton client vs. persistent client pool
+Runs against the local Triton stand-in (triton_standin.py) so it needs no GPU.
+
+"before" reproduces the old check_quality() flow: new client, is_server_ready(),
+is_model_ready(), infer(), close(). "after" uses TritonClientPool, which makes
+one infer() call on a pooled keep-alive connection.
+
+Usage:
+    python3 bench_triton_client.py [concurrency] [requests_per_thread]
+"""
+
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import tritonclient.http as httpclient
+
+from triton_pool import TritonClientPool
+from triton_standin import start_standin
+
+PORT = 8011
+URL = f'localhost:{PORT}'
+MODEL_NAME = 'efficient_fiqa'
+MODEL_VERSION = '1'
+
+
+def infer_per_request(tensor):
+    """Old flow: 3 requests and a fresh TCP connection per frame"""
+    client = httpclient.InferenceServerClient(url=URL, verbose=False)
+    try:
+        if not client.is_server_ready():
+            raise RuntimeError('server not ready')
+        if not client.is_model_ready(MODEL_NAME, MODEL_VERSION):
+            raise RuntimeError('model not ready')
+        infer_input = httpclient.InferInput('input', tensor.shape, 'FP32')
+        infer_input.set_data_from_numpy(tensor)
+        output = httpclient.InferRequestedOutput('output')
+        response = client.infer(model_name=MODEL_NAME, model_version=MODEL_VERSION,
+                                inputs=[infer_input], outputs=[output])
+        return float(response.as_numpy('output')[0][0])
+    finally:
+        client.close()
+
+
+def run(label, fn, concurrency, requests_per_thread, stats):
+    tensor = np.zeros((1, 3, 352, 352), dtype=np.float32)
+    requests_before = stats['requests']
+    connections_before = len(stats['connections'])
+
+    def worker(_):
+        latencies = []
+        for _ in range(requests_per_thread):
+            start = time.perf_counter()
+            fn(tensor)
+            latencies.append((time.perf_counter() - start) * 1000)
+        return latencies
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = [l for chunk in executor.map(worker, range(concurrency)) for l in chunk]
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    total = len(latencies)
+    print(f"\n{label}")
+    print(f"   Requests:         {total} ({total / elapsed:.1f} req/s)")
+    print(f"   p50:              {statistics.median(latencies):.2f}ms")
+    print(f"   p99:              {latencies[min(total - 1, int(total * 0.99))]:.2f}ms")
+    print(f"   HTTP requests:    {stats['requests'] - requests_before} ({(stats['requests'] - requests_before) / total:.1f} per frame)")
+    print(f"   TCP connections:  {len(stats['connections']) - connections_before}")
+
+
+def main():
+    concurrency = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    requests_per_thread = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    server, stats = start_standin(PORT, latency_ms=4.0)
+    print("=" * 60)
+    print(f"Triton client benchmark - {concurrency} threads x {requests_per_thread} requests")
+    print("=" * 60)
+
+    try:
+        run("BEFORE: client per request + readiness checks", infer_per_request,
+            concurrency, requests_per_thread, stats)
+
+        pool = TritonClientPool(URL, MODEL_NAME, MODEL_VERSION, size=concurrency).start()
+        try:
+            run("AFTER: pooled keep-alive clients + cached readiness", pool.infer,
+                concurrency, requests_per_thread, stats)
+        finally:
+            pool.close()
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
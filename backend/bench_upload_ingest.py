@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Benchmark: chunk ingestion, multipart POST vs. raw-body PUT /api/upload/chunk
+Starts the backend under gunicorn (gunicorn.conf.py), then uploads a video in
+chunks over 8 parallel streams with no added latency (the server is the
+bottleneck) through each route:
+    multipart         POST, form data: parsed and spooled by Werkzeug, saved as
+                      a chunk file, reassembled after the last chunk
+    multipart+offset  POST with chunk_size: parsed and spooled, then copied to
+                      the chunk's offset in the video file
+    raw PUT           PUT + Content-Range: the body is streamed from the socket
+                      to its offset, no parsing or spooling
+Reports chunk throughput (MB/s, chunks/s) and the server's CPU time per MB
+(user + system of the gunicorn master and workers, from /proc).
+
+Client and server share the machine, so absolute throughput is a floor; CPU
+per MB is the server's own.
+
+Usage:
+    python3 bench_upload_ingest.py [video_mb] [chunk_mb ...]    # default 256MB; 1MB and 4MB chunks
+"""
+
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import aiohttp
+
+from bench_serving_modes import wait_healthy
+
+PORT = 5107
+STREAMS = 8
+ROUTES = ['multipart', 'multipart+offset', 'raw PUT']
+PIDFILE = f'/tmp/bench_upload_ingest_{PORT}.pid'
+
+
+def server_cpu_seconds(master_pid):
+    """user + system CPU seconds of the gunicorn master and its workers"""
+    total = 0
+    for pid in filter(str.isdigit, os.listdir('/proc')):
+        try:
+            with open(f'/proc/{pid}/stat') as stat:
+                fields = stat.read().rsplit(')', 1)[1].split()  # From field 3 (state)
+        except OSError:
+            continue  # Exited meanwhile
+        if int(pid) == master_pid or int(fields[1]) == master_pid:  # ppid
+            total += int(fields[11]) + int(fields[12])  # utime, stime
+    return total / os.sysconf('SC_CLK_TCK')
+
+
+async def send_chunk(http, route, session_id, video_id, index, video, chunk_size):
+    url = f'http://127.0.0.1:{PORT}/api/upload/chunk'
+    start = index * chunk_size
+    body = video[start:start + chunk_size]
+    total_chunks = -(-len(video) // chunk_size)
+    if route == 'raw PUT':
+        params = {'session_id': session_id, 'video_id': video_id, 'chunk_size': str(chunk_size)}
+        headers = {'Content-Type': 'application/octet-stream',
+                   'Content-Range': f'bytes {start}-{start + len(body) - 1}/{len(video)}'}
+        request = http.put(url, params=params, data=body, headers=headers)
+    else:
+        form = aiohttp.FormData()
+        form.add_field('session_id', session_id)
+        form.add_field('video_id', video_id)
+        form.add_field('chunk_index', str(index))
+        form.add_field('total_chunks', str(total_chunks))
+        if route == 'multipart+offset':
+            form.add_field('chunk_size', str(chunk_size))
+        form.add_field('chunk', body, filename=f'chunk_{index}')
+        request = http.post(url, data=form)
+    async with request as response:
+        response.raise_for_status()
+        return (await response.json())['status']
+
+
+async def upload(http, route, session_id, video_id, video, chunk_size):
+    pending = list(range(-(-len(video) // chunk_size)))
+    statuses = []
+
+    async def stream():
+        while pending:
+            statuses.append(await send_chunk(http, route, session_id, video_id, pending.pop(0), video, chunk_size))
+
+    await asyncio.gather(*(stream() for _ in range(STREAMS)))
+    assert 'video_complete' in statuses, f'{video_id}: no chunk completed the video'
+
+
+async def run(master_pid, video_mb, chunk_sizes_mb):
+    video = os.urandom(video_mb * 1024 * 1024)
+    rows = []
+    async with aiohttp.ClientSession() as http:
+        async with http.post(f'http://127.0.0.1:{PORT}/api/session/create', json={}) as response:
+            session_id = (await response.json())['session_id']
+        for chunk_mb in chunk_sizes_mb:
+            for route in ROUTES:
+                video_id = f"bench_{route.replace(' ', '_').replace('+', '_')}_{chunk_mb}mb"
+                cpu_before = server_cpu_seconds(master_pid)
+                start = time.perf_counter()
+                await upload(http, route, session_id, video_id, video, chunk_mb * 1024 * 1024)
+                elapsed = time.perf_counter() - start
+                rows.append((chunk_mb, route, elapsed, server_cpu_seconds(master_pid) - cpu_before))
+    return rows
+
+
+def main():
+    video_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 256
+    chunk_sizes_mb = [int(arg) for arg in sys.argv[2:]] or [1, 4]
+
+    env = dict(os.environ, GUNICORN_BIND=f'127.0.0.1:{PORT}', GUNICORN_PIDFILE=PIDFILE)
+    process = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py'], cwd=Path(__file__).parent,
+                               env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        if not wait_healthy(PORT, timeout=60):
+            print(f"❌ gunicorn did not start on port {PORT}")
+            return
+        rows = asyncio.run(run(process.pid, video_mb, chunk_sizes_mb))
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+    print("=" * 76)
+    print(f"Chunk ingestion - {video_mb}MB video, {STREAMS} parallel streams")
+    print("=" * 76)
+    print(f"{'Chunk':>6} {'Route':<17} {'Time (s)':>9} {'MB/s':>8} {'Chunks/s':>9} {'Server CPU (ms/MB)':>20}")
+    print("-" * 76)
+    for chunk_mb, route, elapsed, cpu_seconds in rows:
+        print(f"{chunk_mb:>4}MB {route:<17} {elapsed:>9.2f} {video_mb / elapsed:>8.0f} "
+              f"{video_mb / chunk_mb / elapsed:>9.0f} {cpu_seconds * 1000 / video_mb:>20.2f}")
+    print("=" * 76)
+
+
+if __name__ == '__main__':
+    main()
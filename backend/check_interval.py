@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Adaptive per-session quality check interval
+A participant whose score is good and steady and whose face is not moving does
+not need a check every 2 seconds; one who is still adjusting (no face, poor or
+fluctuating score, moving face) benefits from faster feedback. The server keeps
+each session's recent scores and face position and recommends when the client
+should send its next frame (`next_check_ms` in the quality response), so load
+follows what participants are doing rather than participants x a fixed rate.
+"""
+
+import statistics
+import threading
+import time
+from collections import OrderedDict, deque
+
+GOOD_SCORE = 0.7        # quality_level 'good'
+ACCEPTABLE_SCORE = 0.5  # threshold_met
+
+STABLE_SCORE_STDEV = 0.03    # Recent scores this steady count as stable...
+STABLE_MOTION = 0.05         # ...with the face moving less than 5% of its size between checks
+CHANGING_SCORE_STDEV = 0.08  # Beyond either of these the session is changing
+CHANGING_MOTION = 0.15
+
+
+def bbox_motion(previous, current):
+    """Face movement between two (x, y, w, h) boxes: center shift + size change, relative to face size"""
+    px, py, pw, ph = previous
+    x, y, w, h = current
+    size = max(pw, ph, 1)
+    shift = ((x + w / 2 - px - pw / 2) ** 2 + (y + h / 2 - py - ph / 2) ** 2) ** 0.5
+    return shift / size + abs(max(w, h) - size) / size
+
+
+class CheckIntervalAdvisor:
+    """
+    LRU of sessions, each holding its recent scores, last face box and interval
+
+    Stable sessions back off geometrically (x `growth` per check) up to
+    `max_ms` when the score is good, or halfway to it when only acceptable;
+    poor, faceless or changing sessions drop straight to `min_ms`.
+
+    Args:
+        default_ms: interval for sessions with too little history (and for
+            frames without a session)
+        min_ms: interval while the participant is adjusting
+        max_ms: interval for a steady, good session
+        growth: back-off factor per stable check
+        history: recent scores kept per session
+        max_age_seconds: history older than this is discarded
+        max_sessions: sessions kept before the least recently used is evicted
+    """
+
+    def __init__(self, default_ms=2000, min_ms=1500, max_ms=6000, growth=1.5, history=5,
+                 max_age_seconds=30.0, max_sessions=1000):
+        self.default_ms = default_ms
+        self.min_ms = min_ms
+        self.max_ms = max_ms
+        self.growth = growth
+        self.history = history
+        self.max_age_seconds = max_age_seconds
+        self.max_sessions = max_sessions
+
+        self._sessions = OrderedDict()  # session_id -> {'scores', 'bbox', 'interval_ms', 'updated_at'}
+        self._lock = threading.Lock()
+        self.recommendations = {'min': 0, 'default': 0, 'backoff': 0}
+
+    def _interval(self, state, result):
+        if result.get('status') != 'OK' or result.get('quality_score') is None:
+            state['scores'].clear()
+            state['bbox'] = None
+            return self.min_ms, 'min'
+
+        bbox = result.get('face_bbox')
+        motion = bbox_motion(state['bbox'], bbox) if state['bbox'] is not None and bbox else 0.0
+        state['bbox'] = bbox
+        state['scores'].append(result['quality_score'])
+        if len(state['scores']) < 3:
+            return self.default_ms, 'default'
+
+        score = result['quality_score']
+        spread = statistics.pstdev(state['scores'])
+        if score < ACCEPTABLE_SCORE or spread > CHANGING_SCORE_STDEV or motion > CHANGING_MOTION:
+            return self.min_ms, 'min'
+        if spread < STABLE_SCORE_STDEV and motion < STABLE_MOTION:
+            cap = self.max_ms if score >= GOOD_SCORE else (self.default_ms + self.max_ms) / 2
+            return min(cap, max(state['interval_ms'], self.default_ms) * self.growth), 'backoff'
+        return self.default_ms, 'default'
+
+    def recommend(self, session_id, result):
+        """
+        Record a quality result for the session and return the recommended
+        delay before its next check, in ms
+
+        Args:
+            result: quality response dict (status, quality_score, face_bbox)
+        """
+        if not session_id:
+            return self.default_ms
+
+        now = time.monotonic()
+        with self._lock:
+            state = self._sessions.get(session_id)
+            if state is None or now - state['updated_at'] > self.max_age_seconds:
+                state = {'scores': deque(maxlen=self.history), 'bbox': None, 'interval_ms': self.default_ms}
+                self._sessions[session_id] = state
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+            self._sessions.move_to_end(session_id)
+
+            interval_ms, kind = self._interval(state, result)
+            state['interval_ms'] = interval_ms
+            state['updated_at'] = now
+            self.recommendations[kind] += 1
+        return int(interval_ms)
+
+    def stats(self):
+        with self._lock:
+            intervals = [state['interval_ms'] for state in self._sessions.values()]
+            return {
+                'sessions': len(self._sessions),
+                'recommendations': dict(self.recommendations),
+                'mean_interval_ms': round(statistics.mean(intervals)) if intervals else None,
+                'min_ms': self.min_ms,
+                'default_ms': self.default_ms,
+                'max_ms': self.max_ms
+            }
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Per-upload record of received video chunks
+upload_chunk() used to count `chunk_*` files in the upload's chunk directory
+after every chunk, so an upload of N chunks scanned a growing directory N
+times (O(N^2) filesystem work per video). ChunkManifest keeps a bitmap of the
+received chunk indices plus a running count in one small file next to the
+chunks: marking a chunk and checking for completion read and write a few
+bytes, whatever the number of chunks.
+
+The file persists across restarts, and updates hold an exclusive flock, so
+request threads and gunicorn worker processes can record chunks of the same
+upload concurrently. It also answers /api/upload/status (which chunks a
+resuming client still has to send) without listing the chunk directory.
+
+The header also fixes the upload's layout: total_chunks, chunk_size (0 for
+chunk files, else the direct-offset stride) and the video size (0 if the
+client did not send it). A chunk whose request disagrees is refused with
+UploadMismatch before anything is written, so chunk-file and direct-offset
+chunks, or two chunk sizes, never mix in one upload.
+
+Completion happens exactly once: the request that completes an upload holds
+the manifest lock (completing()) until it has written the upload's tombstone
+(`<chunk directory>.complete`: its layout and the video's size, see
+mark_completed()) and removed the chunk directory, manifest included.
+Concurrent final chunks and retries of them wait on the lock and then find
+the manifest unlinked, or the tombstone in place (a late duplicate may have
+recreated the chunk directory), and record nothing. Chunk files are written,
+and direct-offset .part files created and truncated, under a shared flock on
+the chunk directory (storing()) that completion takes exclusively, so no file
+lands in an upload being completed or already complete. A direct-offset body
+is streamed without it: a stalled client never holds up completion, and a
+duplicate only rewrites the bytes already there.
+
+The tombstone, not the video file, says an upload is over: a retry of a
+chunk of the finished upload (same layout, same bytes as the video at the
+chunk's offset) is answered without storing anything, while a new upload
+under the same video_id (a client reusing fixed ids) removes the tombstone
+(forget_completed()) and replaces the video once it completes. Tombstones
+are honoured for a limited time (completed_upload(..., max_age)).
+"""
+
+import errno
+import fcntl
+import json
+import os
+import struct
+import tempfile
+import time
+from contextlib import contextmanager
+
+MANIFEST_NAME = 'received.bitmap'  # Inside the chunk directory (does not match chunk_*)
+_HEADER = struct.Struct('<4sIIIQ')  # magic, total_chunks, received count, chunk_size, video_size
+_MAGIC = b'CHK2'
+COMPLETED_SUFFIX = '.complete'  # Tombstone of a completed upload, next to (and named after) its chunk directory
+
+
+class UploadMismatch(ValueError):
+    """A chunk's total_chunks, chunk_size or video size differs from its upload's manifest"""
+
+
+def _is_new(header):
+    """No header yet: just created, or a crash between the ftruncate and the header write left it zeroed"""
+    return len(header) < _HEADER.size or not any(header)
+
+
+class ChunkManifest:
+    """
+    Bitmap of the received chunk indices of one upload
+
+    Args:
+        chunks_dir: the upload's chunk directory (must exist)
+        total_chunks: chunks in the upload
+        chunk_size: direct-offset stride, 0 for the chunk-file layout
+        video_size: video length in bytes, 0 if unknown
+        (total_chunks, chunk_size and video_size must match the manifest if one exists)
+
+    Raises (from the methods):
+        UploadMismatch: the layout differs from the upload's existing manifest
+        ValueError: chunk index out of range, or not a manifest
+        FileNotFoundError: the upload was completed (chunk directory removed,
+            or tombstone in place)
+    """
+
+    def __init__(self, chunks_dir, total_chunks, chunk_size=0, video_size=0):
+        self.chunks_dir = chunks_dir
+        self.path = os.path.join(chunks_dir, MANIFEST_NAME)
+        self.completed_path = os.fspath(chunks_dir) + COMPLETED_SUFFIX
+        self.total_chunks = total_chunks
+        self.chunk_size = chunk_size
+        self.video_size = video_size
+
+    @classmethod
+    def open(cls, chunks_dir):
+        """Manifest of an upload in progress (layout from the file), or None if it has none"""
+        try:
+            with open(os.path.join(chunks_dir, MANIFEST_NAME), 'rb') as manifest:
+                header = manifest.read(_HEADER.size)
+        except FileNotFoundError:
+            return None
+        if _is_new(header):
+            return None  # Being created by the upload's first chunk
+        magic, total_chunks, _, chunk_size, video_size = _HEADER.unpack(header)
+        if magic != _MAGIC:
+            raise ValueError(f'Not a chunk manifest: {os.path.join(chunks_dir, MANIFEST_NAME)}')
+        return cls(chunks_dir, total_chunks, chunk_size=chunk_size, video_size=video_size)
+
+    def _completed(self, fd):
+        """Whether the upload is over: fd's manifest or chunk directory removed, or the tombstone in place"""
+        return os.fstat(fd).st_nlink == 0 or os.path.exists(self.completed_path)
+
+    @contextmanager
+    def _locked(self, create=True):
+        """(fd, received count) with the manifest created if needed (and create) and locked"""
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT if create else os.O_RDWR, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            header = os.pread(fd, _HEADER.size, 0)
+            if self._completed(fd):
+                if _is_new(header) and os.fstat(fd).st_nlink:
+                    os.unlink(self.path)  # Created just now, by a chunk of the finished upload
+                raise FileNotFoundError(errno.ENOENT, 'Upload already complete', self.path)
+            if _is_new(header):
+                # New manifest: header plus a zeroed bitmap (sparse until chunks arrive)
+                os.ftruncate(fd, _HEADER.size + (self.total_chunks + 7) // 8)
+                self._write_count(fd, 0)
+                received = 0
+            else:
+                magic, total_chunks, received, chunk_size, video_size = _HEADER.unpack(header)
+                if magic != _MAGIC:
+                    raise ValueError(f'Not a chunk manifest: {self.path}')
+                if (total_chunks, chunk_size, video_size) != (self.total_chunks, self.chunk_size, self.video_size):
+                    raise UploadMismatch(
+                        f'Upload has total_chunks={total_chunks}, chunk_size={chunk_size}, video_size={video_size}; '
+                        f'chunk has {self.total_chunks}, {self.chunk_size}, {self.video_size}')
+            yield fd, received
+        finally:
+            os.close(fd)  # Releases the lock
+
+    def _write_count(self, fd, received):
+        os.pwrite(fd, _HEADER.pack(_MAGIC, self.total_chunks, received, self.chunk_size, self.video_size), 0)
+
+    def mark_received(self, index):
+        """
+        Record chunk `index` (idempotent: a resent chunk is counted once)
+
+        Returns:
+            chunks received so far, including this one
+        """
+        if not 0 <= index < self.total_chunks:
+            raise ValueError(f'Chunk index {index} out of range (0-{self.total_chunks - 1})')
+        offset, bit = _HEADER.size + index // 8, 1 << (index % 8)
+        with self._locked() as (fd, received):
+            byte = os.pread(fd, 1, offset)[0]
+            if byte & bit:
+                # Resent chunk: usually a retry after a lost response, possibly after a
+                # crash between the bit and count writes below, so recount from the bitmap
+                received = self._count_bits(fd)
+            else:
+                os.pwrite(fd, bytes([byte | bit]), offset)
+                received += 1
+            self._write_count(fd, received)
+            return received
+
+    @contextmanager
+    def storing(self):
+        """
+        Hold while a chunk file is written, or the .part file created or truncated
+
+        Shared by the chunks being written, exclusive with completing(): a
+        chunk of an upload being completed waits, and one of a finished upload
+        raises FileNotFoundError instead of writing anything. The manifest is
+        created (or its layout checked, UploadMismatch) first.
+        """
+        with self._locked():
+            pass  # Not while holding the directory lock: completing() takes them in the other order
+        fd = os.open(self.chunks_dir, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_SH)
+            if self._completed(fd):
+                raise FileNotFoundError(errno.ENOENT, 'Upload already complete', self.chunks_dir)
+            yield
+        finally:
+            os.close(fd)  # Releases the lock
+
+    @contextmanager
+    def completing(self):
+        """
+        Lock the upload while it is completed, so that happens exactly once
+
+        Yields True to the one caller that must complete the upload (every
+        chunk recorded, chunk directory still there) and False to any other,
+        in any thread or worker process. Call it after mark_received() returned
+        total_chunks. The caller yielded True must remove the chunk directory
+        before leaving the block; if it raises instead, the next final chunk
+        or retry gets True.
+        """
+        try:
+            fd = os.open(self.path, os.O_RDWR)
+        except FileNotFoundError:
+            yield False  # Chunk directory already removed by the completing request
+            return
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            _, total_chunks, received, _, _ = _HEADER.unpack(os.pread(fd, _HEADER.size, 0))
+            if self._completed(fd) or received < total_chunks:
+                yield False  # Completed by another request while this one waited for the lock
+                return
+            dir_fd = os.open(self.chunks_dir, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                fcntl.flock(dir_fd, fcntl.LOCK_EX)  # Waits for duplicate chunks still in storing()
+                yield True
+            finally:
+                os.close(dir_fd)
+        finally:
+            os.close(fd)  # Releases the locks
+
+    def mark_completed(self, size, chunk_lengths=None):
+        """
+        Write the upload's tombstone; call it while completing(), before removing the chunk directory
+
+        Args:
+            size: the finished video's size in bytes
+            chunk_lengths: length of every chunk, in order (chunk-file layout;
+                direct-offset chunk ranges follow from chunk_size)
+        """
+        tombstone = {'total_chunks': self.total_chunks, 'chunk_size': self.chunk_size,
+                     'video_size': self.video_size, 'size': size}
+        if chunk_lengths is not None:
+            tombstone['chunk_lengths'] = list(chunk_lengths)
+        directory, name = os.path.split(self.completed_path)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f'.{name}.')
+        try:
+            with os.fdopen(fd, 'w') as out:
+                json.dump(tombstone, out)
+            os.replace(tmp_path, self.completed_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    @classmethod
+    def completed_upload(cls, chunks_dir, max_age):
+        """
+        Tombstone of the upload completed under chunks_dir within max_age
+        seconds (dict, see mark_completed), or None; an older one is removed
+        """
+        path = os.fspath(chunks_dir) + COMPLETED_SUFFIX
+        try:
+            with open(path) as f:
+                age = time.time() - os.fstat(f.fileno()).st_mtime
+                tombstone = json.load(f)
+        except FileNotFoundError:
+            return None
+        if age > max_age:
+            cls(chunks_dir, tombstone['total_chunks']).forget_completed()
+            return None
+        return tombstone
+
+    def forget_completed(self):
+        """Remove the tombstone: chunks are recorded as a new upload again"""
+        try:
+            os.unlink(self.completed_path)
+        except FileNotFoundError:
+            pass
+
+    def chunk_range(self, tombstone, index):
+        """
+        (offset, length) of chunk `index` of this upload in the video the
+        tombstone describes, or None if the layouts differ (not the same upload)
+        """
+        layout = (tombstone['total_chunks'], tombstone['chunk_size'], tombstone['video_size'])
+        if layout != (self.total_chunks, self.chunk_size, self.video_size) or not 0 <= index < self.total_chunks:
+            return None
+        if 'chunk_lengths' in tombstone:
+            lengths = tombstone['chunk_lengths']
+            return sum(lengths[:index]), lengths[index]
+        offset = index * self.chunk_size
+        length = min(self.chunk_size, tombstone['size'] - offset)
+        return (offset, length) if length > 0 else None
+
+    def received_count(self):
+        with self._locked(create=False) as (fd, received):
+            return received
+
+    def received_indices(self):
+        """Sorted list of the received chunk indices"""
+        with self._locked(create=False) as (fd, _):
+            bitmap = os.pread(fd, (self.total_chunks + 7) // 8, _HEADER.size)
+        return [i for i in range(self.total_chunks) if bitmap[i // 8] & (1 << (i % 8))]
+
+    def progress(self):
+        """
+        Received and missing chunks as inclusive [first, last] index ranges
+
+        Returns:
+            dict with total_chunks, received_count, received, missing
+        """
+        received, missing = [], []
+        for i in self.received_indices() + [self.total_chunks]:
+            start = received[-1][1] + 1 if received else 0
+            if i > start:
+                missing.append([start, i - 1])
+            if i < self.total_chunks:
+                if received and received[-1][1] == i - 1:
+                    received[-1][1] = i
+                else:
+                    received.append([i, i])
+        return {
+            'total_chunks': self.total_chunks,
+            'received_count': sum(last - first + 1 for first, last in received),
+            'received': received,
+            'missing': missing
+        }
+
+    def _count_bits(self, fd):
+        bitmap = os.pread(fd, (self.total_chunks + 7) // 8, _HEADER.size)
+        return int.from_bytes(bitmap, 'little').bit_count()
@@ -5,9 +5,14 @@ Replaces the old direct-resize approach with proper face detection + cropping
 """
 
 import base64
+import struct
 import numpy as np
 import cv2
 import logging
+import queue
+import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
@@ -16,72 +21,630 @@ logger = logging.getLogger(__name__)
 IMAGENET_MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
 IMAGENET_STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
 
+FIQA_INPUT_SIZE = 352
+
+# uint8 -> normalized float lookup per RGB channel: ((v / 255) - mean) / std,
+# computed with the same float32 operations as the unfused pipeline (cv2.LUT layout: 1x256)
+_CHANNEL_LUTS = [
+    np.ascontiguousarray(((np.arange(256, dtype=np.float32) / np.float32(255.0)) - IMAGENET_MEAN[c]) / IMAGENET_STD[c]).reshape(1, 256)
+    for c in range(3)
+]
+
+ROI_DETECTION_SIZE = 224  # Tracked-face search regions are resized to this square before YuNet
+ROI_EDGE_TOLERANCE_PX = 2  # A tracked face this close to an ROI edge may be cut off
+
+MAX_IMAGE_PIXELS = 4096 * 4096  # Larger frames are rejected from the header, before any decode
+CROP_MARGIN_RATIO = 0.20  # Margin added on each side of the face bbox before cropping
+# The tracker's ROI is 2x the face and the crop 1.4x, so the crop is ~0.7x the ROI side
+ROI_CROP_FRACTION = (1 + 2 * CROP_MARGIN_RATIO) / 2.0
+_REDUCED_DECODE_FLAGS = {1: cv2.IMREAD_COLOR, 2: cv2.IMREAD_REDUCED_COLOR_2, 4: cv2.IMREAD_REDUCED_COLOR_4}
+_JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+# Camera resolutions seen in practice; detectors for these are created at startup
+COMMON_RESOLUTIONS = [(640, 480), (1280, 720), (1280, 960)]
+
+
+class FaceDetectorPool:
+    """
+    Thread-safe pool of YuNet detectors keyed by input resolution
+
+    cv2.FaceDetectorYN is not thread-safe, and setInputSize() re-plans the
+    network whenever the frame size changes. The pool hands each concurrent
+    request its own detector that was created for exactly that resolution, so
+    detectors are never shared or reconfigured. Warm instances are kept for
+    COMMON_RESOLUTIONS; other resolutions are pooled on demand and the least
+    recently used ones are dropped beyond `max_resolutions`.
+    """
+
+    def __init__(
+        self,
+        model_path,
+        conf_threshold=0.6,
+        nms_threshold=0.3,
+        warm_resolutions=COMMON_RESOLUTIONS,
+        warm_per_resolution=2,
+        max_resolutions=8
+    ):
+        self.model_path = str(model_path)
+        self.conf_threshold = conf_threshold
+        self.nms_threshold = nms_threshold
+        self.warm_resolutions = [tuple(size) for size in warm_resolutions]
+        self.max_resolutions = max(max_resolutions, len(self.warm_resolutions))
+
+        self._pools = OrderedDict()  # (width, height) -> LifoQueue of idle detectors (LRU order)
+        self._lock = threading.Lock()
+        self._created = 0
+
+        for size in self.warm_resolutions:
+            for _ in range(warm_per_resolution):
+                self.release(size, self._create(size, warm_up=True))
+
+    def _create(self, size, warm_up=False):
+        detector = cv2.FaceDetectorYN.create(self.model_path, "", size, self.conf_threshold, self.nms_threshold)
+        if warm_up:
+            detector.detect(np.zeros((size[1], size[0], 3), dtype=np.uint8))
+        with self._lock:
+            self._created += 1
+        return detector
+
+    def _pool_for(self, size):
+        with self._lock:
+            pool = self._pools.get(size)
+            if pool is None:
+                pool = self._pools[size] = queue.LifoQueue()
+                # Evict least recently used non-warm resolutions
+                for key in list(self._pools):
+                    if len(self._pools) <= self.max_resolutions:
+                        break
+                    if key != size and key not in self.warm_resolutions:
+                        del self._pools[key]
+            else:
+                self._pools.move_to_end(size)
+            return pool
+
+    def acquire(self, size):
+        """Check out a detector configured for `size` = (width, height)"""
+        try:
+            return self._pool_for(size).get_nowait()
+        except queue.Empty:
+            return self._create(size)
+
+    def release(self, size, detector):
+        """Return a detector checked out with acquire()"""
+        self._pool_for(size).put(detector)
+
+    def detect(self, img_bgr):
+        """Run YuNet on a BGR frame; returns the raw faces array (or None)"""
+        size = (img_bgr.shape[1], img_bgr.shape[0])
+        detector = self.acquire(size)
+        try:
+            _, faces = detector.detect(img_bgr)
+        finally:
+            self.release(size, detector)
+        return faces
+
+    def stats(self):
+        with self._lock:
+            return {
+                'detectors_created': self._created,
+                'idle_by_resolution': {f'{w}x{h}': pool.qsize() for (w, h), pool in self._pools.items()}
+            }
+
+
+class TensorArena:
+    """
+    Free list of preallocated model-input buffers
+
+    Each slot is (tensor, scratch): a float32 (1, 3, 352, 352) input tensor and
+    the uint8 buffers used to fill it (see normalize_face_into). Requests check a slot
+    out for the lifetime of the frame and give it back after inference, so the
+    number of buffers is bounded by peak concurrency instead of growing with
+    request count.
+    """
+
+    def __init__(self, preallocate=0):
+        self._free = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self.allocated = 0
+        for _ in range(preallocate):
+            self._free.put(self._new_slot())
+
+    def _new_slot(self):
+        with self._lock:
+            self.allocated += 1
+        return (
+            np.empty((1, 3, FIQA_INPUT_SIZE, FIQA_INPUT_SIZE), dtype=np.float32),
+            (
+                np.empty((FIQA_INPUT_SIZE, FIQA_INPUT_SIZE, 3), dtype=np.uint8),
+                np.empty((FIQA_INPUT_SIZE, FIQA_INPUT_SIZE), dtype=np.uint8)
+            )
+        )
+
+    def acquire(self):
+        try:
+            return self._free.get_nowait()
+        except queue.Empty:
+            return self._new_slot()
+
+    def release(self, slot):
+        self._free.put(slot)
+
+    def stats(self):
+        return {'allocated': self.allocated, 'free': self._free.qsize()}
+
+
+def normalize_stack_into(stack, out, channel_buf=None):
+    """
+    BGR->RGB + ImageNet normalization + HWC->CHW for a stack of resized crops
+
+    Each channel of the whole stack is extracted in one call and mapped through
+    a 256-entry float LUT, so the cost is three passes regardless of batch size
+    and the values are identical to normalizing frame by frame.
+
+    Args:
+        stack: uint8 (M, 352, 352, 3) BGR crops, contiguous
+        out: float32 (M, 3, 352, 352) destination, written in place
+        channel_buf: optional uint8 (M * 352, 352) scratch buffer
+
+    Returns:
+        out
+    """
+    m = stack.shape[0]
+    flat = stack.reshape(m * FIQA_INPUT_SIZE, FIQA_INPUT_SIZE, 3)
+    for channel in range(3):
+        # RGB channel c comes from BGR channel 2 - c
+        bgr_channel = cv2.extractChannel(flat, 2 - channel, dst=channel_buf)
+        if m == 1:
+            cv2.LUT(bgr_channel, _CHANNEL_LUTS[channel], dst=out[0, channel])
+        else:
+            # out[:, c] is strided across frames, so map into a plane and copy it in
+            planes = cv2.LUT(bgr_channel, _CHANNEL_LUTS[channel])
+            np.copyto(out[:, channel], planes.reshape(m, FIQA_INPUT_SIZE, FIQA_INPUT_SIZE))
+    return out
+
+
+def normalize_face_into(face_crop, out, scratch=None):
+    """
+    Fused resize + BGR->RGB + ImageNet normalization + HWC->CHW
+
+    Each channel is extracted from the resized crop and mapped through a
+    256-entry float LUT straight into its CHW plane, so with scratch buffers
+    nothing is allocated per frame.
+
+    Args:
+        face_crop: BGR uint8 crop (any size)
+        out: float32 (3, 352, 352) destination, written in place
+        scratch: optional (resized, channel) uint8 buffers of shape
+            (352, 352, 3) and (352, 352), e.g. from TensorArena
+
+    Returns:
+        out
+    """
+    resized_buf, channel_buf = scratch if scratch is not None else (None, None)
+    resized = cv2.resize(face_crop, (FIQA_INPUT_SIZE, FIQA_INPUT_SIZE), dst=resized_buf, interpolation=cv2.INTER_LINEAR)
+    normalize_stack_into(resized[np.newaxis], out[np.newaxis], channel_buf)
+    return out
+
+
+def detection_size(width, height, long_side=None):
+    """
+    Frame size YuNet runs at when detection is downscaled
+
+    Args:
+        width, height: full-resolution frame size
+        long_side: target length of the longer side (None/0 = full resolution)
+
+    Returns:
+        (width, height) - never upscaled
+    """
+    if not long_side or max(width, height) <= long_side:
+        return (width, height)
+    scale = long_side / max(width, height)
+    return (max(1, round(width * scale)), max(1, round(height * scale)))
+
+
+def fit_roi(roi, width, height):
+    """
+    Shift a square (x1, y1, x2, y2) search region inside the frame, keeping its
+    size where possible, and clip it if it is larger than the frame
+    """
+    x1, y1, x2, y2 = (int(v) for v in roi)
+    side = min(x2 - x1, y2 - y1, width, height)
+    x1 = min(max(0, x1), width - side)
+    y1 = min(max(0, y1), height - side)
+    return (x1, y1, x1 + side, y1 + side)
+
+
+def detect_raw_faces(face_detector, img_bgr, detection_long_side=None, roi=None):
+    """
+    Run YuNet with either a FaceDetectorPool or a bare cv2.FaceDetectorYN
+
+    With detection_long_side set, detection runs on a downscaled copy of the
+    frame and bboxes + landmarks are mapped back to full-resolution
+    coordinates, so the crop is still taken from the original pixels.
+    With roi = (x1, y1, x2, y2), only that region is searched and results are
+    offset back to frame coordinates.
+
+    Returns:
+        raw YuNet faces array (N, 15) in full-resolution coordinates, or None
+    """
+    if roi is not None:
+        # Every ROI is resized to one fixed size, so the pool needs a single extra resolution
+        x1, y1, x2, y2 = fit_roi(roi, img_bgr.shape[1], img_bgr.shape[0])
+        roi_img = cv2.resize(img_bgr[y1:y2, x1:x2], (ROI_DETECTION_SIZE, ROI_DETECTION_SIZE), interpolation=cv2.INTER_AREA)
+        faces = detect_raw_faces(face_detector, roi_img)
+        if faces is not None:
+            faces = faces.copy()
+            faces[:, 0:14:2] = faces[:, 0:14:2] * ((x2 - x1) / ROI_DETECTION_SIZE)
+            faces[:, 1:14:2] = faces[:, 1:14:2] * ((y2 - y1) / ROI_DETECTION_SIZE)
+            # Offset positions (bbox x/y and landmarks), not the bbox width/height
+            faces[:, [0, 4, 6, 8, 10, 12]] += x1
+            faces[:, [1, 5, 7, 9, 11, 13]] += y1
+        return faces
+
+    height, width = img_bgr.shape[:2]
+    det_width, det_height = detection_size(width, height, detection_long_side)
+    if (det_width, det_height) != (width, height):
+        det_img = cv2.resize(img_bgr, (det_width, det_height), interpolation=cv2.INTER_AREA)
+    else:
+        det_img = img_bgr
+
+    if isinstance(face_detector, FaceDetectorPool):
+        faces = face_detector.detect(det_img)
+    else:
+        face_detector.setInputSize((det_width, det_height))
+        _, faces = face_detector.detect(det_img)
+
+    if faces is not None and det_img is not img_bgr:
+        # Back-project bbox (x, y, w, h) and 5 landmarks to full resolution; column 14 is confidence
+        faces = faces.copy()
+        faces[:, 0:14:2] *= width / det_width
+        faces[:, 1:14:2] *= height / det_height
+    return faces
+
+
+def decode_image_bytes(image_data):
+    """
+    Get the encoded image bytes from a request payload
+
+    Args:
+        image_data: base64 string / data URL, or bytes-like (returned as-is, no copy)
+
+    Raises:
+        binascii.Error / ValueError if the base64 is invalid
+    """
+    if isinstance(image_data, (bytes, bytearray, memoryview)):
+        return image_data
+    if 'base64,' in image_data:
+        image_data = image_data.split('base64,')[1]
+    return base64.b64decode(image_data)
+
+
+def read_image_header(image_bytes):
+    """
+    Read format and dimensions from a JPEG, PNG or WebP header without decoding
+
+    Returns:
+        (format, width, height) with format 'jpeg' | 'png' | 'webp', or None if
+        the header is not recognised or is truncated
+    """
+    data = bytes(image_bytes[:64]) if len(image_bytes) >= 64 else bytes(image_bytes)
+
+    if data[:8] == b'\x89PNG\r\n\x1a\n' and len(data) >= 24 and data[12:16] == b'IHDR':
+        width, height = struct.unpack('>II', data[16:24])
+        return 'png', width, height
+
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP' and len(data) >= 30:
+        chunk = data[12:16]
+        if chunk == b'VP8 ' and data[23:26] == b'\x9d\x01\x2a':
+            width, height = struct.unpack('<HH', data[26:30])
+            return 'webp', width & 0x3FFF, height & 0x3FFF
+        if chunk == b'VP8L' and data[20] == 0x2F:
+            bits = struct.unpack('<I', data[21:25])[0]
+            return 'webp', (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+        if chunk == b'VP8X':
+            return 'webp', int.from_bytes(data[24:27], 'little') + 1, int.from_bytes(data[27:30], 'little') + 1
+        return None
+
+    if data[:2] == b'\xff\xd8':
+        # Walk the marker segments up to the start-of-frame (usually within the first few KB)
+        view = memoryview(image_bytes)
+        pos = 2
+        while pos + 4 <= len(view):
+            if view[pos] != 0xFF:
+                return None
+            marker = view[pos + 1]
+            if marker == 0xFF:  # Fill byte
+                pos += 1
+                continue
+            if marker in (0x01, 0xD8) or 0xD0 <= marker <= 0xD7:  # Standalone markers
+                pos += 2
+                continue
+            if marker in (0xD9, 0xDA):  # EOI / start of scan before any SOF
+                return None
+            length = (view[pos + 2] << 8) | view[pos + 3]
+            if marker in _JPEG_SOF_MARKERS:
+                if pos + 9 > len(view):
+                    return None
+                height = (view[pos + 5] << 8) | view[pos + 6]
+                width = (view[pos + 7] << 8) | view[pos + 8]
+                return 'jpeg', width, height
+            pos += 2 + length
+        return None
+
+    return None
+
+
+def choose_decode_scale(image_format, width, height, detection_long_side=None, roi=None, face_size=None):
+    """
+    Pick a DCT-scaled JPEG decode (1/2 or 1/4) that loses nothing downstream
+
+    The reduced frame must still be at least detection_long_side on its long
+    side (YuNet would downscale to that anyway), and the expected crop must
+    still cover the 352x352 model input. The crop is estimated from a
+    tracked-face ROI, else from face_size (larger side of the face last seen
+    in the session, full-resolution pixels); with neither the frame is decoded
+    at full size, since at 720p/1080p a webcam face rarely yields a 352px crop
+    from a reduced frame and the caller would decode it again. If the actual
+    crop turns out too small the caller still re-decodes at full resolution.
+    PNG/WebP gain nothing from reduced decoding (cv2 decodes full, then resizes).
+
+    Returns:
+        1, 2 or 4
+    """
+    if image_format != 'jpeg' or not detection_long_side:
+        return 1
+    if roi is not None:
+        expected_crop = (roi[2] - roi[0]) * ROI_CROP_FRACTION
+    elif face_size:
+        expected_crop = face_size * (1 + 2 * CROP_MARGIN_RATIO)
+    else:
+        return 1
+    for scale in (4, 2):
+        if max(width, height) / scale < detection_long_side or expected_crop / scale < FIQA_INPUT_SIZE:
+            continue
+        return scale
+    return 1
+
+
+def decode_image(image_bytes, scale=1):
+    """cv2.imdecode at full resolution (scale=1) or DCT-reduced by 2 or 4 (BGR)"""
+    return cv2.imdecode(np.frombuffer(image_bytes, dtype=np.uint8), _REDUCED_DECODE_FLAGS[scale])
+
 
 def preprocess_with_face_detection(
     image_data,
     face_detector,
     min_face_ratio=0.12,
     max_padding_ratio=0.10,
-    multi_face_ambiguity_ratio=0.35
+    multi_face_ambiguity_ratio=0.35,
+    detection_long_side=None,
+    out=None,
+    scratch=None,
+    roi=None,
+    max_image_pixels=MAX_IMAGE_PIXELS,
+    face_size=None
 ):
     """
     NEW preprocessing pipeline with face detection for Efficient-FIQA
 
+    Single-frame form of preprocess_batch (same implementation).
+
     Args:
-        image_data: Base64-encoded image string
-        face_detector: YuNet detector instance
+        image_data: Base64-encoded image string (optionally a data URL), or the
+            raw encoded JPEG/WebP/PNG bytes (bytes, bytearray or memoryview)
+        face_detector: FaceDetectorPool, or a single YuNet detector instance
         min_face_ratio: Minimum face size as fraction of frame width
         max_padding_ratio: Maximum acceptable padding ratio
         multi_face_ambiguity_ratio: Threshold for ambiguous multiple faces
+        detection_long_side: Run YuNet with the frame's long side scaled down to
+            this many pixels (None = full resolution); the crop always uses
+            the full-resolution frame
+        out: Optional preallocated float32 (1, 3, 352, 352) array (e.g. from
+            TensorArena) to write the tensor into
+        scratch: Optional preallocated uint8 buffers (see normalize_face_into)
+        roi: Optional (x1, y1, x2, y2) search region from a FaceTracker; falls
+            back to a full-frame pass if no face is found fully inside it
+        face_size: Optional larger side of the session's last face (from a
+            FaceTracker); without it or an ROI the frame is decoded at full size
+        max_image_pixels: Frames with more pixels (per the header) are rejected
+            before decoding
 
     Returns:
         dict with keys:
             - status: "OK" | "NO_FACE" | "MULTIPLE_FACES" | "PARTIAL_FACE" | "FACE_TOO_SMALL"
             - tensor: numpy array (1, 3, 352, 352) if status="OK", else None
+              (`out` itself when provided)
             - face_confidence: float (0-1), detector confidence
             - face_bbox: (x, y, w, h) if face found
+            - detection: "full" | "roi" | "roi_fallback" (which detection pass decided)
             - message: human-readable status message
     """
-    try:
-        # 1. Decode base64 image
-        if 'base64,' in image_data:
-            image_data = image_data.split('base64,')[1]
+    batch_scratch = (scratch[0][np.newaxis], scratch[1]) if scratch is not None else None
+    tensor, (result,) = preprocess_batch(
+        [image_data], face_detector, min_face_ratio, max_padding_ratio, multi_face_ambiguity_ratio,
+        detection_long_side=detection_long_side, rois=[roi], max_image_pixels=max_image_pixels,
+        out=out, scratch=batch_scratch, face_sizes=[face_size]
+    )
+    del result['batch_index']
+    result['tensor'] = (tensor if out is None else out) if result['status'] == 'OK' else None
+    return result
+
+
+def preprocess_batch(
+    frames,
+    face_detector,
+    min_face_ratio=0.12,
+    max_padding_ratio=0.10,
+    multi_face_ambiguity_ratio=0.35,
+    detection_long_side=None,
+    rois=None,
+    max_image_pixels=MAX_IMAGE_PIXELS,
+    executor=None,
+    out=None,
+    scratch=None,
+    face_sizes=None
+):
+    """
+    Preprocess N encoded frames into one stacked model input
 
+    Decode + detection + crop run per frame (in parallel on `executor` when
+    given; cv2 releases the GIL), then the OK crops are resized into one uint8
+    stack and normalized in a single vectorized pass.
+
+    Args:
+        frames: list of encoded frames (bytes-like or base64 / data URL strings)
+        face_detector: FaceDetectorPool (must be thread-safe if executor is set)
+        min_face_ratio, max_padding_ratio, multi_face_ambiguity_ratio,
+        detection_long_side, max_image_pixels: see preprocess_with_face_detection
+        rois: optional per-frame tracked-face ROI (or None entries)
+        face_sizes: optional per-frame size of the last face seen (or None entries)
+        executor: optional concurrent.futures executor for the per-frame stage
+        out: optional float32 (>=M, 3, 352, 352) array to write the stack into
+        scratch: optional (stack, channel) uint8 buffers of shape (>=M, 352, 352, 3)
+            and (>=M * 352, 352)
+
+    Returns:
+        (tensor, results):
+            - tensor: float32 (M, 3, 352, 352) for the M frames with status OK,
+              in frame order (a view of `out` when provided)
+            - results: one dict per frame with status, face_confidence,
+              face_bbox, detection and message as in
+              preprocess_with_face_detection, plus batch_index (row in tensor,
+              None if the frame was not OK) and timings (ms per stage reached:
+              base64_decode, image_decode, face_detection, crop_normalize)
+    """
+    rois = rois if rois is not None else [None] * len(frames)
+    face_sizes = face_sizes if face_sizes is not None else [None] * len(frames)
+
+    def analyze(i):
+        timings = {}
+        result = _analyze_frame(frames[i], face_detector, min_face_ratio, max_padding_ratio, multi_face_ambiguity_ratio,
+                                detection_long_side, rois[i], face_sizes[i], max_image_pixels, timings)
+        result['timings'] = timings
+        return result
+
+    if executor is not None and len(frames) > 1:
+        results = list(executor.map(analyze, range(len(frames))))
+    else:
+        results = [analyze(i) for i in range(len(frames))]
+
+    ok = [i for i, result in enumerate(results) if result['status'] == 'OK']
+    for i, result in enumerate(results):
+        result['batch_index'] = None
+    m = len(ok)
+
+    if out is None:
+        out = np.empty((m, 3, FIQA_INPUT_SIZE, FIQA_INPUT_SIZE), dtype=np.float32)
+    tensor = out[:m]
+    if m == 0:
+        return tensor, results
+
+    start = time.perf_counter()
+    stack_buf, channel_buf = scratch if scratch is not None else (None, None)
+    stack = stack_buf[:m] if stack_buf is not None else np.empty((m, FIQA_INPUT_SIZE, FIQA_INPUT_SIZE, 3), dtype=np.uint8)
+
+    def resize(row):
+        result = results[ok[row]]
+        cv2.resize(result.pop('face_crop'), (FIQA_INPUT_SIZE, FIQA_INPUT_SIZE), dst=stack[row], interpolation=cv2.INTER_LINEAR)
+        result['batch_index'] = row
+
+    if executor is not None and m > 1:
+        list(executor.map(resize, range(m)))
+    else:
+        for row in range(m):
+            resize(row)
+
+    normalize_stack_into(stack, tensor, channel_buf[:m * FIQA_INPUT_SIZE] if channel_buf is not None else None)
+
+    # The stacked resize + normalize is shared evenly by the OK frames
+    share_ms = (time.perf_counter() - start) * 1000 / m
+    for i in ok:
+        timings = results[i]['timings']
+        timings['crop_normalize'] = timings.get('crop_normalize', 0.0) + share_ms
+    return tensor, results
+
+
+def _lap(timings, stage, start):
+    """Add the ms since `start` to timings[stage]; returns the new start"""
+    now = time.perf_counter()
+    timings[stage] = timings.get(stage, 0.0) + (now - start) * 1000
+    return now
+
+
+def _analyze_frame(image_data, face_detector, min_face_ratio, max_padding_ratio, multi_face_ambiguity_ratio,
+                   detection_long_side, roi, face_size, max_image_pixels, timings):
+    """
+    Decode, detect and crop one frame (steps 1-8 of the pipeline), adding the
+    time spent per stage to `timings`
+
+    Returns:
+        status dict as described in preprocess_with_face_detection, without
+        'tensor'; OK results also carry 'face_crop' (square BGR uint8 crop)
+    """
+    start = time.perf_counter()
+    try:
+        # 1. Get the encoded image bytes (raw binary upload or base64 data URL)
         try:
-            image_bytes = base64.b64decode(image_data)
+            image_bytes = decode_image_bytes(image_data)
         except Exception as e:
+            _lap(timings, 'base64_decode', start)
             logger.error(f"Base64 decode failed: {e}")
             return {
                 'status': 'ERROR',
-                'tensor': None,
                 'face_confidence': 0.0,
                 'message': f'Base64 decode failed: {str(e)}'
             }
 
-        img_array = np.frombuffer(image_bytes, dtype=np.uint8)
-        img_bgr = cv2.imdecode(img_array, cv2.IMREAD_COLOR)  # OpenCV uses BGR
+        start = _lap(timings, 'base64_decode', start)
+
+        # 1b. Check dimensions from the header before allocating a decode buffer
+        header = read_image_header(image_bytes)
+        if header is None:
+            return {
+                'status': 'ERROR',
+                'face_confidence': 0.0,
+                'message': 'Unsupported or corrupt image (expected JPEG, PNG or WebP)'
+            }
+        image_format, width, height = header
+        if width <= 0 or height <= 0 or width * height > max_image_pixels:
+            logger.warning(f"Rejected {image_format} frame from header: {width}x{height}")
+            return {
+                'status': 'ERROR',
+                'face_confidence': 0.0,
+                'message': f'Image too large ({width}x{height}, max {max_image_pixels} pixels)'
+            }
+
+        # 1c. Decode, DCT-reduced when detection and the expected crop allow it
+        scale = choose_decode_scale(image_format, width, height, detection_long_side, roi, face_size)
+        img_bgr = decode_image(image_bytes, scale)  # OpenCV uses BGR
+        start = _lap(timings, 'image_decode', start)
 
         if img_bgr is None:
-            logger.error(f"cv2.imdecode failed - image_bytes length: {len(image_bytes)}, first 50 chars of base64: {image_data[:50] if len(image_data) > 50 else image_data}")
+            logger.error(f"cv2.imdecode failed - image_bytes length: {len(image_bytes)}, first 50 bytes: {bytes(image_bytes[:50])}")
             return {
                 'status': 'ERROR',
-                'tensor': None,
                 'face_confidence': 0.0,
                 'message': 'Failed to decode image - cv2.imdecode returned None'
             }
 
-        height, width = img_bgr.shape[:2]
+        # Full-resolution frame size (decoded, so EXIF rotation is accounted for)
+        height, width = (d * scale for d in img_bgr.shape[:2])
 
-        # 2. Detect faces
-        face_detector.setInputSize((width, height))
-        _, faces = face_detector.detect(img_bgr)
+        # 2. Detect faces (around the tracked face if an ROI is given, else full frame)
+        scaled_roi = tuple(v // scale for v in roi) if roi is not None and scale > 1 else roi
+        faces, detection_mode = _detect_with_roi(face_detector, img_bgr, detection_long_side, scaled_roi)
+        if faces is not None and scale > 1:
+            faces = faces.copy()
+            faces[:, :14] *= scale  # Back to full-resolution coordinates
+        start = _lap(timings, 'face_detection', start)
 
         # 3. Edge case: No face detected
         if faces is None or len(faces) == 0:
             logger.debug("No face detected in frame")
             return {
                 'status': 'NO_FACE',
-                'tensor': None,
+                'detection': detection_mode,
                 'face_confidence': 0.0,
                 'message': 'No face detected in frame'
             }
@@ -89,7 +652,7 @@ def preprocess_with_face_detection(
         # Parse face results
         detected_faces = []
         for face in faces:
-            x, y, w, h = face[:4].astype(int)
+            x, y, w, h = (int(v) for v in face[:4])  # Plain ints so results are JSON-serialisable
             confidence = float(face[14])
             area = w * h
             detected_faces.append({
@@ -109,7 +672,7 @@ def preprocess_with_face_detection(
                 logger.debug(f"Multiple ambiguous faces detected: {len(detected_faces)} faces")
                 return {
                     'status': 'MULTIPLE_FACES',
-                    'tensor': None,
+                    'detection': detection_mode,
                     'face_confidence': detected_faces[0]['confidence'],
                     'message': f'Multiple faces detected ({len(detected_faces)}), unable to select one'
                 }
@@ -123,66 +686,81 @@ def preprocess_with_face_detection(
             logger.debug(f"Face too small: {w}px ({w/width*100:.1f}% of frame width)")
             return {
                 'status': 'FACE_TOO_SMALL',
-                'tensor': None,
+                'detection': detection_mode,
                 'face_confidence': best_face['confidence'],
                 'face_bbox': (x, y, w, h),
                 'message': f'Face too small ({w}px, need >{int(width*min_face_ratio)}px)'
             }
 
-        # 7. Crop face with margin
-        crop_result = _square_crop_with_margin(img_bgr, best_face['bbox'], margin_ratio=0.20)
+        # 7. Crop face with margin (from the reduced frame if the crop still covers the model input)
+        if scale > 1 and max(w, h) * (1 + 2 * CROP_MARGIN_RATIO) / scale < FIQA_INPUT_SIZE:
+            full_bgr = decode_image(image_bytes)
+            if full_bgr is not None:
+                img_bgr, scale = full_bgr, 1
+            start = _lap(timings, 'image_decode', start)
+        crop_bbox = tuple(int(v) // scale for v in best_face['bbox'])
+        crop_result = _square_crop_with_margin(img_bgr, crop_bbox, margin_ratio=CROP_MARGIN_RATIO)
         face_crop = crop_result['crop']
         padding_ratio = crop_result['padding_ratio']
+        _lap(timings, 'crop_normalize', start)
 
         # 8. Edge case: Too much padding (face at boundary)
         if padding_ratio > max_padding_ratio:
             logger.debug(f"Face too close to boundary: {padding_ratio*100:.1f}% padding")
             return {
                 'status': 'PARTIAL_FACE',
-                'tensor': None,
+                'detection': detection_mode,
                 'face_confidence': best_face['confidence'],
                 'face_bbox': (x, y, w, h),
                 'message': f'Face partially out of frame ({padding_ratio*100:.0f}% padding)'
             }
 
-        # 9. Resize to FIQA input size (352x352)
-        face_resized = cv2.resize(face_crop, (352, 352), interpolation=cv2.INTER_LINEAR)
-
-        # 10. Convert BGR to RGB
-        face_rgb = cv2.cvtColor(face_resized, cv2.COLOR_BGR2RGB)
-
-        # 11. Normalize to [0, 1]
-        face_normalized = face_rgb.astype(np.float32) / 255.0
-
-        # 12. Apply ImageNet normalization
-        face_normalized = (face_normalized - IMAGENET_MEAN) / IMAGENET_STD
-
-        # 13. Convert from HWC to CHW format (channels first)
-        face_tensor = np.transpose(face_normalized, (2, 0, 1))
-
-        # 14. Add batch dimension
-        face_tensor = np.expand_dims(face_tensor, axis=0)
-
-        logger.debug(f"✅ Face preprocessed: conf={best_face['confidence']:.2f}, bbox={best_face['bbox']}, padding={padding_ratio:.2%}")
+        logger.debug(f"✅ Face found: conf={best_face['confidence']:.2f}, bbox={best_face['bbox']}, padding={padding_ratio:.2%}")
 
         return {
             'status': 'OK',
-            'tensor': face_tensor,
+            'detection': detection_mode,
             'face_confidence': best_face['confidence'],
             'face_bbox': (x, y, w, h),
-            'message': 'Face detected and preprocessed successfully'
+            'message': 'Face detected and preprocessed successfully',
+            'face_crop': face_crop
         }
 
     except Exception as e:
         logger.exception("Error in face preprocessing pipeline")
         return {
             'status': 'ERROR',
-            'tensor': None,
             'face_confidence': 0.0,
             'message': f'Preprocessing error: {str(e)}'
         }
 
 
+def _detect_with_roi(face_detector, img_bgr, detection_long_side, roi):
+    """
+    Detect inside the ROI first, falling back to the full frame when the ROI
+    has no face or the face touches an ROI edge that is not a frame edge
+    (it may extend outside the ROI)
+
+    Returns:
+        (faces, detection_mode)
+    """
+    if roi is None:
+        return detect_raw_faces(face_detector, img_bgr, detection_long_side), 'full'
+
+    faces = detect_raw_faces(face_detector, img_bgr, detection_long_side, roi=roi)
+    if faces is not None and len(faces) > 0:
+        height, width = img_bgr.shape[:2]
+        x1, y1, x2, y2 = fit_roi(roi, width, height)
+        x, y, w, h = faces[np.argmax(faces[:, 2] * faces[:, 3]), :4]
+        edge = ROI_EDGE_TOLERANCE_PX
+        clipped = ((x1 > 0 and x <= x1 + edge) or (y1 > 0 and y <= y1 + edge) or
+                   (x2 < width and x + w >= x2 - edge) or (y2 < height and y + h >= y2 - edge))
+        if not clipped:
+            return faces, 'roi'
+
+    return detect_raw_faces(face_detector, img_bgr, detection_long_side), 'roi_fallback'
+
+
 def _select_best_face(faces, img_shape):
     """
     Select the best face for quality assessment
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Per-session face tracking for quality checks
+During a recording the participant's face barely moves between frames, so
+after one full-frame detection the next frames only need YuNet to search a
+region around the last known face. A full-frame pass still runs every
+`full_every` frames (to notice a second person entering the shot), whenever
+the tracked face is lost, and whenever the state is older than `max_age_seconds`.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class FaceTracker:
+    """
+    LRU of sessions, each holding the last face bbox seen in that session
+
+    Args:
+        roi_scale: ROI side as a multiple of the tracked face's larger side
+        full_every: force a full-frame detection after this many ROI frames
+        max_age_seconds: tracked faces older than this are not reused
+        max_sessions: sessions kept before the least recently used is evicted
+    """
+
+    def __init__(self, roi_scale=2.0, full_every=10, max_age_seconds=5.0, max_sessions=1000):
+        self.roi_scale = roi_scale
+        self.full_every = full_every
+        self.max_age_seconds = max_age_seconds
+        self.max_sessions = max_sessions
+
+        self._sessions = OrderedDict()  # session_id -> {'bbox', 'updated_at', 'roi_frames'}
+        self._lock = threading.Lock()
+        self.detections = {'full': 0, 'roi': 0, 'roi_fallback': 0}
+
+    def get_roi(self, session_id):
+        """
+        Search region for the next frame of a session
+
+        Returns:
+            square (x1, y1, x2, y2) centred on the tracked face (may extend past
+            the frame; detection shifts it inside, see fit_roi), or None if a
+            full-frame pass is due
+        """
+        now = time.monotonic()
+        with self._lock:
+            state = self._sessions.get(session_id)
+            if state is None:
+                return None
+            self._sessions.move_to_end(session_id)
+            if now - state['updated_at'] > self.max_age_seconds or state['roi_frames'] >= self.full_every:
+                return None
+
+            x, y, w, h = state['bbox']
+            side = max(w, h) * self.roi_scale
+            cx, cy = x + w / 2, y + h / 2
+            x1, y1 = int(cx - side / 2), int(cy - side / 2)
+            return (x1, y1, x1 + int(side), y1 + int(side))  # Not clamped here: that would shrink one side
+
+    def get_face_size(self, session_id):
+        """
+        Larger side of the session's tracked face (px), or None if there is
+        none recent enough; still known when get_roi() asks for a full-frame pass
+        """
+        with self._lock:
+            state = self._sessions.get(session_id)
+            if state is None or time.monotonic() - state['updated_at'] > self.max_age_seconds:
+                return None
+            return max(state['bbox'][2:])
+
+    def touch(self, session_id):
+        """Keep a session's tracked face current without a detection (its frame was answered from cache)"""
+        now = time.monotonic()
+        with self._lock:
+            state = self._sessions.get(session_id)
+            if state is not None and now - state['updated_at'] <= self.max_age_seconds:
+                state['updated_at'] = now
+                self._sessions.move_to_end(session_id)
+
+    def update(self, session_id, bbox, detection):
+        """
+        Record the outcome of a frame
+
+        Args:
+            bbox: (x, y, w, h) of the selected face, or None if no single face was found
+            detection: 'full', 'roi' or 'roi_fallback' (from the preprocessing result)
+        """
+        with self._lock:
+            if detection in self.detections:
+                self.detections[detection] += 1
+
+            if bbox is None:
+                self._sessions.pop(session_id, None)
+                return
+
+            state = self._sessions.get(session_id)
+            roi_frames = state['roi_frames'] + 1 if state is not None and detection == 'roi' else 0
+            self._sessions[session_id] = {
+                'bbox': tuple(int(v) for v in bbox),
+                'updated_at': time.monotonic(),
+                'roi_frames': roi_frames
+            }
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            total = sum(self.detections.values())
+            return {
+                'sessions': len(self._sessions),
+                'detections': dict(self.detections),
+                'roi_rate': round(self.detections['roi'] / total, 4) if total else 0.0
+            }
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Quality-check result caches
+Participants sit fairly still, so consecutive frames from one session are often
+nearly identical. Frames are keyed by a difference hash (dHash) computed from a
+DCT-reduced grayscale decode; a new frame within `max_distance` bits of a
+recent frame from the same session reuses that frame's result, skipping full
+decode, face detection and inference (NearDuplicateCache).
+
+Client retries and service-worker replays resend the exact same bytes, from any
+session. ResultCache / SharedResultCache key the full response by a hash of the
+raw image bytes, so a repeat costs one hash and one lookup.
+"""
+
+import fcntl
+import hashlib
+import json
+import mmap
+import tempfile
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+import cv2
+import numpy as np
+
+from face_preprocessing import MAX_IMAGE_PIXELS, read_image_header
+
+HASH_SIZE = 16  # 16x16 dHash = 256 bits
+
+
+def perceptual_hash(image_bytes, hash_size=HASH_SIZE):
+    """
+    Difference hash of an encoded image
+
+    Uses IMREAD_REDUCED_GRAYSCALE_8, which for JPEG decodes at 1/8 scale
+    directly from the DCT coefficients, so hashing costs a fraction of a full
+    decode.
+
+    Returns:
+        int with hash_size * hash_size bits, or None if the image cannot be
+        decoded or is too large (preprocessing then reports the error)
+    """
+    header = read_image_header(image_bytes)
+    if header is None or header[1] * header[2] > MAX_IMAGE_PIXELS:
+        return None
+    img_array = np.frombuffer(image_bytes, dtype=np.uint8)
+    gray = cv2.imdecode(img_array, cv2.IMREAD_REDUCED_GRAYSCALE_8)
+    if gray is None:
+        return None
+    small = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = np.packbits((small[:, 1:] > small[:, :-1]).ravel())
+    return int.from_bytes(bits.tobytes(), 'big')
+
+
+class NearDuplicateCache:
+    """
+    LRU of sessions, each holding its most recent frame hashes and results
+
+    Args:
+        max_distance: max Hamming distance (bits) for a frame to count as a duplicate
+        ttl_seconds: entries older than this are never reused
+        entries_per_session: recent frames remembered per session
+        max_sessions: sessions kept before the least recently used is evicted
+    """
+
+    def __init__(self, max_distance=8, ttl_seconds=10.0, entries_per_session=4, max_sessions=1000):
+        self.max_distance = max_distance
+        self.ttl_seconds = ttl_seconds
+        self.entries_per_session = entries_per_session
+        self.max_sessions = max_sessions
+
+        self._sessions = OrderedDict()  # session_id -> deque of (hash, stored_at, result)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def lookup(self, session_id, frame_hash):
+        """Return a copy of the cached result for a near-duplicate frame, or None"""
+        now = time.monotonic()
+        with self._lock:
+            entries = self._sessions.get(session_id)
+            if entries is not None:
+                self._sessions.move_to_end(session_id)
+                while entries and now - entries[0][1] > self.ttl_seconds:
+                    entries.popleft()
+                # Newest first: the most recent similar frame is the best stand-in
+                for cached_hash, _, result in reversed(entries):
+                    if bin(cached_hash ^ frame_hash).count('1') <= self.max_distance:
+                        self.hits += 1
+                        return dict(result)
+            self.misses += 1
+            return None
+
+    def store(self, session_id, frame_hash, result):
+        with self._lock:
+            entries = self._sessions.get(session_id)
+            if entries is None:
+                entries = self._sessions[session_id] = deque(maxlen=self.entries_per_session)
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+                    self.evictions += 1
+            else:
+                self._sessions.move_to_end(session_id)
+            entries.append((frame_hash, time.monotonic(), dict(result)))
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'sessions': len(self._sessions),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+                'evicted_sessions': self.evictions,
+                'max_distance': self.max_distance,
+                'ttl_seconds': self.ttl_seconds
+            }
+
+
+def content_hash(image_bytes):
+    """128-bit BLAKE2b digest of the encoded image bytes (several GB/s, no decode)"""
+    return hashlib.blake2b(image_bytes, digest_size=16).digest()
+
+
+def _encode_result(result):
+    return json.dumps(result, separators=(',', ':')).encode()
+
+
+class ResultCache:
+    """
+    In-process LRU of quality-check responses keyed by content_hash()
+
+    Responses are stored JSON-encoded, so the memory bound counts real bytes
+    and every hit returns a fresh dict.
+
+    Args:
+        max_bytes: total size of stored responses (+ per-entry overhead) before
+            the least recently used are evicted
+    """
+
+    ENTRY_OVERHEAD_BYTES = 160  # OrderedDict node + key and value objects
+
+    def __init__(self, max_bytes=32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # content hash -> JSON bytes
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def lookup(self, key):
+        """Return a copy of the cached response for these exact bytes, or None"""
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return json.loads(payload)
+
+    def store(self, key, result):
+        payload = _encode_result(result)
+        size = len(key) + len(payload) + self.ENTRY_OVERHEAD_BYTES
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(key) + len(previous) + self.ENTRY_OVERHEAD_BYTES
+            self._entries[key] = payload
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                old_key, old_payload = self._entries.popitem(last=False)
+                self._bytes -= len(old_key) + len(old_payload) + self.ENTRY_OVERHEAD_BYTES
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'shared': False,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+                'evictions': self.evictions
+            }
+
+
+class SharedResultCache:
+    """
+    ResultCache in anonymous shared memory, shared by every process forked
+    after it is created (gunicorn workers with preload_app)
+
+    The segment is a set-associative table: a key maps to one set of `ways`
+    fixed-size slots, and a store evicts the least recently used slot of that
+    set (LRU per set, not global). Responses larger than a slot are not cached.
+    Hit/miss counters live in the segment too, so stats() covers all workers.
+
+    The table is guarded by a POSIX record lock (lockf) on an unlinked lock
+    file, across processes, plus a thread lock within each worker (record
+    locks do not exclude threads of one process). The kernel drops a record
+    lock when its process dies, so a worker killed while holding it (e.g.
+    gunicorn's timeout) blocks no one. A slot it was writing is left empty
+    (its length is set last); lookup() also treats an unreadable payload as a
+    miss.
+
+    Args:
+        max_bytes: size of the shared segment
+        slot_bytes: response bytes per slot
+        ways: slots per set
+    """
+
+    _COUNTERS = ('clock', 'hits', 'misses', 'evictions', 'too_large', 'torn')
+
+    def __init__(self, max_bytes=32 * 1024 * 1024, slot_bytes=512, ways=8):
+        self.slot_bytes = slot_bytes
+        self.ways = ways
+        row_bytes = 16 + 8 + 4 + slot_bytes  # key, stamp, length, payload
+        self.num_sets = max(1, max_bytes // (row_bytes * ways))
+        slots = self.num_sets * ways
+        self.max_bytes = slots * row_bytes
+
+        counter_bytes = 8 * len(self._COUNTERS)
+        self._segment = mmap.mmap(-1, counter_bytes + self.max_bytes)  # MAP_SHARED | MAP_ANONYMOUS
+        offset = 0
+
+        def carve(dtype, shape):
+            nonlocal offset
+            array = np.frombuffer(self._segment, dtype=dtype, count=int(np.prod(shape)), offset=offset).reshape(shape)
+            offset += array.nbytes
+            return array
+
+        self._counters = carve(np.uint64, (len(self._COUNTERS),))
+        self._keys = carve(np.uint64, (self.num_sets, ways, 2))
+        self._stamps = carve(np.uint64, (self.num_sets, ways))
+        self._lengths = carve(np.uint32, (self.num_sets, ways))
+        self._payloads = carve(np.uint8, (self.num_sets, ways, slot_bytes))
+        self._lock_file = tempfile.TemporaryFile()  # Inherited by forked workers; only its lock is used
+        self._thread_lock = threading.Lock()
+
+    @contextmanager
+    def _locked(self):
+        with self._thread_lock:
+            fcntl.lockf(self._lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.lockf(self._lock_file, fcntl.LOCK_UN)
+
+    def _locate(self, key):
+        words = np.frombuffer(key, dtype=np.uint64)
+        set_index = int(words[0] % self.num_sets)
+        matches = (self._keys[set_index] == words).all(axis=1) & (self._lengths[set_index] > 0)
+        way = int(matches.argmax()) if matches.any() else None
+        return set_index, words, way
+
+    def _count(self, name):
+        self._counters[self._COUNTERS.index(name)] += 1
+
+    def _tick(self):
+        self._counters[0] += 1
+        return self._counters[0]
+
+    def lookup(self, key):
+        """Return a copy of the cached response for these exact bytes, or None"""
+        with self._locked():
+            set_index, _, way = self._locate(key)
+            if way is None:
+                self._count('misses')
+                return None
+            payload = self._payloads[set_index, way, :self._lengths[set_index, way]].tobytes()
+            try:
+                result = json.loads(payload)
+            except ValueError:
+                self._lengths[set_index, way] = 0  # Torn by a worker killed while storing it
+                self._count('torn')
+                self._count('misses')
+                return None
+            self._stamps[set_index, way] = self._tick()
+            self._count('hits')
+        return result
+
+    def store(self, key, result):
+        payload = _encode_result(result)
+        if len(payload) > self.slot_bytes:
+            with self._locked():
+                self._count('too_large')
+            return
+        with self._locked():
+            set_index, words, way = self._locate(key)
+            if way is None:
+                free = np.flatnonzero(self._lengths[set_index] == 0)
+                if len(free):
+                    way = int(free[0])
+                else:
+                    way = int(self._stamps[set_index].argmin())
+                    self._count('evictions')
+                self._keys[set_index, way] = words
+            self._lengths[set_index, way] = 0  # Empty until fully written, should this worker die meanwhile
+            self._payloads[set_index, way, :len(payload)] = np.frombuffer(payload, dtype=np.uint8)
+            self._lengths[set_index, way] = len(payload)
+            self._stamps[set_index, way] = self._tick()
+
+    def stats(self):
+        with self._locked():
+            counters = dict(zip(self._COUNTERS, (int(c) for c in self._counters)))
+            entries = int(np.count_nonzero(self._lengths))
+            stored_bytes = int(self._lengths.sum())
+        lookups = counters['hits'] + counters['misses']
+        return {
+            'shared': True,
+            'entries': entries,
+            'bytes': stored_bytes,
+            'max_bytes': self.max_bytes,
+            'hits': counters['hits'],
+            'misses': counters['misses'],
+            'hit_rate': round(counters['hits'] / lookups, 4) if lookups else None,
+            'evictions': counters['evictions'],
+            'too_large': counters['too_large'],
+            'torn': counters['torn']
+        }
@@ -0,0 +1,85 @@
+"""
+Production serving config for the combined backend (gunicorn)
+N worker processes x T threads each, replacing Werkzeug's development server.
+
+    gunicorn -c gunicorn.conf.py          # or ./start-production.sh
+
+The app is imported once in the master (preload_app) and YuNet is loaded there,
+so the detector weights are shared copy-on-write by every worker. Triton
+clients, the micro-batcher and ONNX Runtime start threads, so each worker
+creates its own after fork and warms up with a synthetic frame before it
+accepts traffic.
+
+Restarts (the master's pid is written to `pidfile`):
+    kill -HUP <master>   graceful: new workers start (forked from the preloaded
+                         master), old ones finish in-flight requests
+                         (graceful_timeout) and exit
+    kill -USR2 <master>  then -QUIT the old master: zero-downtime code upgrade
+                         (HUP does not re-import code with preload_app)
+    kill -TERM <master>  graceful shutdown
+Workers are also recycled after max_requests (+ jitter) requests.
+
+The exact-repeat result cache (RESULT_CACHE_SHARED) is a shared-memory segment
+created at import, so all workers share it. The near-duplicate frame cache and
+face tracker are per worker; with several workers a session's frames may land
+on different workers. Admission limits (QUALITY_MAX_IN_FLIGHT, QUALITY_MAX_QUEUE)
+apply per worker too.
+
+Prometheus metrics (/metrics) are written per worker to PROMETHEUS_MULTIPROC_DIR
+(a fresh temporary directory unless set; a directory you set must be empty at
+startup) and summed over all workers on each scrape; a dead worker's in-flight
+gauges are dropped.
+"""
+
+import multiprocessing
+import os
+import tempfile
+
+wsgi_app = 'app:app'
+bind = os.environ.get('GUNICORN_BIND', '127.0.0.1:5001')  # nginx terminates TLS in front
+
+workers = int(os.environ.get('GUNICORN_WORKERS', max(2, multiprocessing.cpu_count())))
+threads = int(os.environ.get('GUNICORN_THREADS', '8'))  # Requests in flight per worker
+worker_class = 'gthread'
+preload_app = True
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '120'))  # Large chunk uploads on slow links
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+keepalive = 5
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', '20000'))
+max_requests_jitter = max_requests // 10
+
+# OpenCV threads per worker, so workers x threads does not oversubscribe the CPUs
+opencv_threads = int(os.environ.get('OPENCV_THREADS_PER_WORKER', max(1, multiprocessing.cpu_count() // workers)))
+
+# Must be set before the app (and prometheus_client) is imported; kept across HUP config reloads
+if 'PROMETHEUS_MULTIPROC_DIR' not in os.environ:
+    os.environ['PROMETHEUS_MULTIPROC_DIR'] = tempfile.mkdtemp(prefix='facial-metrics-')
+
+pidfile = os.environ.get('GUNICORN_PIDFILE', 'gunicorn.pid')
+accesslog = None  # The app logs requests itself
+errorlog = '-'
+loglevel = 'info'
+
+
+def when_ready(server):
+    """Master, after the app is imported and before workers are forked"""
+    import app
+    app.preload_models()
+
+
+def post_worker_init(worker):
+    """Worker, after fork and before it accepts connections"""
+    import app
+    app.warm_up_worker(opencv_threads=opencv_threads)
+
+
+def worker_exit(server, worker):
+    import app
+    app.shutdown_worker()
+
+
+def child_exit(server, worker):
+    """Master, after a worker exited: drop its live gauge samples"""
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Pluggable inference backends for the Efficient-FIQA quality model
+Every backend takes a preprocessed float32 (N, 3, 352, 352) batch and returns
+an (N,) array of quality scores, so the endpoints and the micro-batcher do not
+care whether the model runs on Triton (GPU) or in-process on the CPU.
+
+Backends:
+    triton       - Triton Inference Server over HTTP (TritonClientPool)
+    onnxruntime  - in-process ONNX Runtime on CPU, using the ONNX file from
+                   ai-models/export_onnx.py
+    opencv       - in-process OpenCV DNN on CPU (no extra dependency)
+"""
+
+import logging
+import os
+import queue
+import threading
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+INPUT_SHAPE = (3, 352, 352)
+
+
+class InferenceNotReadyError(RuntimeError):
+    """Raised when a backend cannot serve requests right now (maps to HTTP 503)"""
+
+
+class InferenceBackend:
+    """Base class: subclasses implement infer() and may override readiness"""
+
+    name = 'base'
+
+    def infer(self, batch):
+        """
+        Args:
+            batch: float32 numpy array (N, 3, 352, 352)
+
+        Returns:
+            numpy array (N,) of quality scores
+        """
+        raise NotImplementedError
+
+    def is_ready(self):
+        return True
+
+    @property
+    def ready_reason(self):
+        return 'ready'
+
+    def close(self):
+        pass
+
+
+class TritonBackend(InferenceBackend):
+    """Triton Inference Server via the persistent client pool"""
+
+    name = 'triton'
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    def infer(self, batch):
+        from triton_pool import TritonNotReadyError
+        try:
+            return self.pool.infer(batch)
+        except TritonNotReadyError as e:
+            raise InferenceNotReadyError(str(e))
+
+    def is_ready(self):
+        return self.pool.is_ready()
+
+    @property
+    def ready_reason(self):
+        return self.pool.ready_reason
+
+    def close(self):
+        self.pool.close()
+
+
+class OnnxRuntimeBackend(InferenceBackend):
+    """
+    In-process CPU inference with ONNX Runtime
+
+    The exported model has a dynamic batch axis, so a whole batch runs in one
+    session.run(). Input/output buffers are preallocated at max_batch_size and
+    bound with IO binding; a batch of N uses the first N rows, so steady-state
+    inference allocates nothing. One buffer set exists per concurrent caller
+    (`num_buffers`, typically the number of batch dispatchers).
+    """
+
+    name = 'onnxruntime'
+
+    def __init__(self, model_path, intra_op_threads=None, max_batch_size=16, num_buffers=2):
+        # Imported here, not at module level: importing onnxruntime starts a native
+        # thread, and a process forked after that (gunicorn preload_app) aborts on exit
+        try:
+            import onnxruntime as ort
+        except ImportError:
+            raise ImportError("onnxruntime is not installed (pip install onnxruntime) - required for INFERENCE_BACKEND=onnxruntime")
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"ONNX model not found: {model_path} (run ai-models/export_onnx.py)")
+
+        self.model_path = str(model_path)
+        self.max_batch_size = max_batch_size
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = intra_op_threads or max(1, (os.cpu_count() or 2) // 2)
+        options.inter_op_num_threads = 1
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(self.model_path, sess_options=options, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+        self.output_name = self.session.get_outputs()[0].name
+
+        self._buffers = queue.Queue()
+        for _ in range(num_buffers):
+            self._buffers.put((
+                np.zeros((max_batch_size,) + INPUT_SHAPE, dtype=np.float32),
+                np.zeros((max_batch_size, 1), dtype=np.float32)
+            ))
+
+        logger.info(f"✅ ONNX Runtime backend loaded: {os.path.basename(self.model_path)} "
+                    f"(intra_op_threads={options.intra_op_num_threads}, max_batch={max_batch_size}, buffers={num_buffers})")
+
+    def _run(self, batch, input_buf, output_buf):
+        n = batch.shape[0]
+        input_buf[:n] = batch
+        binding = self.session.io_binding()
+        binding.bind_input(self.input_name, 'cpu', 0, np.float32, [n, *INPUT_SHAPE], input_buf.ctypes.data)
+        binding.bind_output(self.output_name, 'cpu', 0, np.float32, [n, 1], output_buf.ctypes.data)
+        self.session.run_with_iobinding(binding)
+        return output_buf[:n, 0].copy()
+
+    def infer(self, batch):
+        scores = []
+        input_buf, output_buf = self._buffers.get()
+        try:
+            for start in range(0, batch.shape[0], self.max_batch_size):
+                scores.append(self._run(batch[start:start + self.max_batch_size], input_buf, output_buf))
+        finally:
+            self._buffers.put((input_buf, output_buf))
+        return np.concatenate(scores) if len(scores) > 1 else scores[0]
+
+
+class OpenCVDnnBackend(InferenceBackend):
+    """
+    In-process CPU inference with OpenCV DNN
+
+    cv2.dnn.Net is not thread-safe, so each calling thread gets its own net.
+    Inference runs on OpenCV's thread pool, which is process-wide and shared
+    with decoding and face detection; its size is the worker's
+    OPENCV_THREADS_PER_WORKER (gunicorn.conf.py), not set here.
+    """
+
+    name = 'opencv'
+
+    def __init__(self, model_path):
+        import cv2
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"ONNX model not found: {model_path} (run ai-models/export_onnx.py)")
+        self.model_path = str(model_path)
+        self._cv2 = cv2
+        self._local = threading.local()
+        self._thread_net()  # Fail fast if OpenCV cannot parse the model
+        logger.info(f"✅ OpenCV DNN backend loaded: {os.path.basename(self.model_path)}")
+
+    def _thread_net(self):
+        net = getattr(self._local, 'net', None)
+        if net is None:
+            net = self._local.net = self._cv2.dnn.readNetFromONNX(self.model_path)
+            net.setPreferableBackend(self._cv2.dnn.DNN_BACKEND_OPENCV)
+            net.setPreferableTarget(self._cv2.dnn.DNN_TARGET_CPU)
+        return net
+
+    def infer(self, batch):
+        net = self._thread_net()
+        net.setInput(np.ascontiguousarray(batch, dtype=np.float32))
+        return net.forward().reshape(-1)
+
+
+class FallbackBackend(InferenceBackend):
+    """Use the primary backend while it is ready, otherwise the fallback (e.g. Triton -> CPU)"""
+
+    def __init__(self, primary, fallback):
+        self.primary = primary
+        self.fallback = fallback
+        self.name = f'{primary.name}+{fallback.name}'
+
+    def infer(self, batch):
+        if self.primary.is_ready():
+            try:
+                return self.primary.infer(batch)
+            except InferenceNotReadyError:
+                pass
+        return self.fallback.infer(batch)
+
+    def is_ready(self):
+        return self.primary.is_ready() or self.fallback.is_ready()
+
+    @property
+    def ready_reason(self):
+        if self.primary.is_ready():
+            return self.primary.ready_reason
+        return f'{self.primary.name}: {self.primary.ready_reason} (serving from {self.fallback.name})'
+
+    def close(self):
+        self.primary.close()
+        self.fallback.close()
+
+
+def create_inference_backend(name, model_path=None, triton_pool_factory=None, intra_op_threads=None,
+                             max_batch_size=16, num_buffers=2):
+    """
+    Build a backend by config name
+
+    Args:
+        name: 'triton', 'onnxruntime' or 'opencv'
+        model_path: ONNX file for the CPU backends
+        triton_pool_factory: callable returning a started TritonClientPool
+        intra_op_threads: CPU threads per inference (ONNX Runtime; OpenCV DNN
+            uses OpenCV's process-wide pool)
+        max_batch_size: largest batch per run (ONNX Runtime buffer size)
+        num_buffers: preallocated buffer sets (ONNX Runtime)
+    """
+    if name == 'triton':
+        return TritonBackend(triton_pool_factory())
+    if name == 'onnxruntime':
+        return OnnxRuntimeBackend(model_path, intra_op_threads=intra_op_threads,
+                                  max_batch_size=max_batch_size, num_buffers=num_buffers)
+    if name == 'opencv':
+        return OpenCVDnnBackend(model_path)
+    raise ValueError(f"Unknown inference backend: {name} (expected triton, onnxruntime or opencv)")
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Prometheus metrics for the quality and upload endpoints
+Per-stage latency histograms for /api/quality/check (base64 decode, image
+decode, face detection, crop/normalize, inference round trip, JSON encode),
+frame counts per preprocessing status, upload chunk bytes and latency, and
+in-flight request gauges, served in the Prometheus text format by /metrics.
+The same stage timings of a single request go out in its Server-Timing header.
+
+With PROMETHEUS_MULTIPROC_DIR set (gunicorn.conf.py sets it before the app
+is imported) every worker process writes its samples to files in that
+directory and a scrape of any worker returns the sum over all workers.
+"""
+
+import os
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+)
+
+STAGES = ('base64_decode', 'image_decode', 'face_detection', 'crop_normalize', 'inference', 'json_encode')
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+UPLOAD_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Server-Timing metric names per stage (quality check stages, then upload stages)
+SERVER_TIMING_NAMES = {
+    'base64_decode': 'b64', 'image_decode': 'decode', 'face_detection': 'detect', 'crop_normalize': 'preprocess',
+    'inference': 'infer', 'json_encode': 'json',
+    'multipart_parse': 'parse', 'disk_write': 'disk', 'reassembly': 'reassemble'
+}
+
+STAGE_SECONDS = Histogram(
+    'facial_quality_stage_seconds', 'Time spent per frame in each quality check stage',
+    ['stage'], buckets=STAGE_BUCKETS
+)
+PREPROCESS_FRAMES = Counter(
+    'facial_quality_preprocess', 'Frames preprocessed, by status (OK, NO_FACE, MULTIPLE_FACES, ...)', ['status']
+)
+UPLOAD_CHUNK_BYTES = Counter('facial_upload_chunk_bytes', 'Video chunk bytes stored')
+UPLOAD_CHUNK_SECONDS = Histogram(
+    'facial_upload_chunk_seconds', 'Time to store one video chunk (including reassembly after the last)',
+    buckets=UPLOAD_BUCKETS
+)
+IN_FLIGHT = Gauge(
+    'facial_http_requests_in_flight', 'Requests being handled, by endpoint', ['endpoint'],
+    multiprocess_mode='livesum'  # Summed over the live workers
+)
+
+# Pre-create the stage series so every stage is exported (as zero) from the first scrape
+for _stage in STAGES:
+    STAGE_SECONDS.labels(_stage)
+
+
+def observe_stages(timings_ms):
+    """Record one frame's {stage: ms} timings (stages it did not reach are absent)"""
+    for stage, ms in timings_ms.items():
+        STAGE_SECONDS.labels(stage).observe(ms / 1000.0)
+
+
+def count_preprocess_status(status):
+    PREPROCESS_FRAMES.labels(status).inc()
+
+
+def observe_upload_chunk(size_bytes, seconds):
+    UPLOAD_CHUNK_BYTES.inc(size_bytes)
+    UPLOAD_CHUNK_SECONDS.observe(seconds)
+
+
+def server_timing(timings_ms, total_ms):
+    """
+    {stage: ms} as Server-Timing names and ms rounded to 0.01, plus 'total'
+
+    Returns:
+        (header value, dict for ?debug_timing=1 responses)
+    """
+    breakdown = {SERVER_TIMING_NAMES.get(stage, stage): round(ms, 2) for stage, ms in timings_ms.items()}
+    breakdown['total'] = round(total_ms, 2)
+    return ', '.join(f'{name};dur={ms}' for name, ms in breakdown.items()), breakdown
+
+
+def render():
+    """(body, content_type) for a /metrics response, aggregated over workers in multiprocess mode"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
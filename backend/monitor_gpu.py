@@ -1,15 +1,22 @@
 #!/usr/bin/env python3
 """
 Real-time GPU monitoring for Triton AI inference
-Tracks GPU utilization, memory usage, temperature, and Triton metrics
+Tracks GPU utilization, memory usage, temperature, and Triton metrics, next to
+the backend's own /metrics (face detection time, Triton round trip as seen by
+the backend, requests in flight)
 """
 
+import os
+import re
 import subprocess
 import time
 import requests
 from datetime import datetime
 import sys
 
+BACKEND_METRICS_URL = os.environ.get('BACKEND_METRICS_URL', 'http://localhost:5001/metrics')
+STAGE_SAMPLE = re.compile(r'^facial_quality_stage_seconds_(sum|count)\{stage="(\w+)"\} (\S+)$')
+
 def get_gpu_stats():
     """Get current GPU statistics using nvidia-smi"""
     try:
@@ -61,15 +68,42 @@ def get_triton_metrics():
     except Exception as e:
         return None
 
+def get_backend_metrics():
+    """Get the backend's per-stage totals and in-flight requests (all workers)"""
+    try:
+        response = requests.get(BACKEND_METRICS_URL, timeout=2)
+        if response.status_code == 200:
+            metrics = {'stage_seconds': {}, 'stage_count': {}, 'in_flight': 0}
+            for line in response.text.split('\n'):
+                match = STAGE_SAMPLE.match(line)
+                if match:
+                    kind, stage, value = match.groups()
+                    metrics['stage_seconds' if kind == 'sum' else 'stage_count'][stage] = float(value)
+                elif line.startswith('facial_http_requests_in_flight{'):
+                    metrics['in_flight'] += int(float(line.split()[-1]))
+            return metrics
+        return None
+    except Exception as e:
+        return None
+
+def stage_mean_ms(backend_metrics, prev_backend, stage):
+    """Mean ms of a backend stage over the last interval, or '-'"""
+    count = backend_metrics['stage_count'].get(stage, 0) - prev_backend['stage_count'].get(stage, 0)
+    if count <= 0:
+        return "-"
+    seconds = backend_metrics['stage_seconds'].get(stage, 0) - prev_backend['stage_seconds'].get(stage, 0)
+    return f"{seconds / count * 1000:.2f}ms"
+
 def print_header():
     """Print monitoring header"""
-    print("=" * 100)
+    print("=" * 134)
     print("GPU MONITORING - Facial App AI Quality System")
-    print("=" * 100)
-    print(f"{'Time':<12} {'GPU%':<6} {'Mem%':<6} {'MemUsed':<10} {'Temp':<6} {'Power':<8} {'Requests':<10} {'QueueMs':<10} {'InferMs':<10}")
-    print("-" * 100)
+    print("=" * 134)
+    print(f"{'Time':<12} {'GPU%':<6} {'Mem%':<6} {'MemUsed':<10} {'Temp':<6} {'Power':<8} {'Requests':<10} {'QueueMs':<10} {'InferMs':<10} "
+          f"{'DetectMs':<10} {'RoundTripMs':<12} {'InFlight':<8}")
+    print("-" * 134)
 
-def print_stats(gpu_stats, triton_metrics, prev_triton=None):
+def print_stats(gpu_stats, triton_metrics, prev_triton=None, backend_metrics=None, prev_backend=None):
     """Print current statistics"""
     timestamp = datetime.now().strftime("%H:%M:%S")
 
@@ -103,29 +137,40 @@ def print_stats(gpu_stats, triton_metrics, prev_triton=None):
     else:
         req_str = queue_str = infer_str = "-"
 
-    print(f"{timestamp:<12} {gpu_str:<6} {mem_str:<6} {mem_used_str:<10} {temp_str:<6} {power_str:<8} {req_str:<10} {queue_str:<10} {infer_str:<10}")
+    if backend_metrics and prev_backend:
+        detect_str = stage_mean_ms(backend_metrics, prev_backend, 'face_detection')
+        round_trip_str = stage_mean_ms(backend_metrics, prev_backend, 'inference')
+    else:
+        detect_str = round_trip_str = "-"
+    in_flight_str = str(backend_metrics['in_flight']) if backend_metrics else "-"
+
+    print(f"{timestamp:<12} {gpu_str:<6} {mem_str:<6} {mem_used_str:<10} {temp_str:<6} {power_str:<8} {req_str:<10} {queue_str:<10} {infer_str:<10} "
+          f"{detect_str:<10} {round_trip_str:<12} {in_flight_str:<8}")
 
 def main():
     """Main monitoring loop"""
     print_header()
 
     prev_triton = None
+    prev_backend = None
 
     try:
         while True:
             gpu_stats = get_gpu_stats()
             triton_metrics = get_triton_metrics()
+            backend_metrics = get_backend_metrics()
 
-            print_stats(gpu_stats, triton_metrics, prev_triton)
+            print_stats(gpu_stats, triton_metrics, prev_triton, backend_metrics, prev_backend)
 
             prev_triton = triton_metrics.copy() if triton_metrics else None
+            prev_backend = backend_metrics
 
             time.sleep(1)  # Update every second
 
     except KeyboardInterrupt:
-        print("\n" + "=" * 100)
+        print("\n" + "=" * 134)
         print("Monitoring stopped by user")
-        print("=" * 100)
+        print("=" * 134)
         sys.exit(0)
 
 if __name__ == '__main__':
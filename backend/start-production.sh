@@ -0,0 +1,24 @@
+#!/bin/bash
+
+# Start the backend with gunicorn (multi-worker production mode)
+
+cd "$(dirname "$0")"
+
+echo "============================================================"
+echo "Facial Data Collection - Backend Server (production)"
+echo "============================================================"
+echo ""
+
+# Check if virtual environment exists
+if [ ! -d "venv" ]; then
+    echo "⚠️  Creating Python virtual environment..."
+    python3 -m venv venv
+    echo "⚠️  Installing dependencies..."
+    venv/bin/pip install -r requirements.txt
+fi
+
+echo "✅ Starting gunicorn (workers=${GUNICORN_WORKERS:-auto}, threads=${GUNICORN_THREADS:-8})..."
+echo "   Graceful restart: kill -HUP \$(cat ${GUNICORN_PIDFILE:-gunicorn.pid})"
+echo ""
+
+exec venv/bin/gunicorn -c gunicorn.conf.py
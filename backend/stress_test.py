@@ -1,7 +1,9 @@
 #!/usr/bin/env python3
 """
 Stress test for AI quality endpoint
-Simulates multiple concurrent users making quality check requests
+Simulates multiple concurrent users making quality check requests.
+--simulate-adaptive compares fixed-interval polling with the server's adaptive
+next_check_ms offline (no server needed).
 """
 
 import asyncio
@@ -9,6 +11,7 @@ import aiohttp
 import time
 import base64
 import io
+import os
 import sys
 from PIL import Image
 import numpy as np
@@ -16,7 +19,7 @@ from datetime import datetime
 import statistics
 
 # Configuration
-BACKEND_URL = 'https://localhost:8000'
+BACKEND_URL = os.environ.get('STRESS_BACKEND_URL', 'https://localhost:8000')
 ENDPOINT = '/api/quality/check'
 
 def create_test_image(seed=None):
@@ -88,6 +91,15 @@ async def send_quality_check(session, user_id, image_data, semaphore):
                         'quality_score': result.get('quality_score', 0),
                         'inference_time_ms': result.get('inference_time_ms', 0)
                     }
+                elif response.status == 429:
+                    # Shed by admission control: a fast answer, not a failure
+                    busy = await response.json()
+                    return {
+                        'user_id': user_id,
+                        'status': 'shed',
+                        'elapsed_ms': elapsed,
+                        'next_check_ms': busy.get('next_check_ms')
+                    }
                 else:
                     return {
                         'user_id': user_id,
@@ -105,13 +117,18 @@ async def send_quality_check(session, user_id, image_data, semaphore):
                 'error': str(e)
             }
 
-async def run_stress_test(num_users, requests_per_user=1):
+async def run_stress_test(num_users, requests_per_user=1, images=None):
     """
     Run stress test with specified number of concurrent users
 
     Args:
         num_users: Number of concurrent users to simulate
         requests_per_user: Number of requests each user sends
+        images: Optional list of data URLs to send instead of generated images
+
+    Returns:
+        dict with requests, successful, shed (HTTP 429), failed, throughput, E2E
+        latency percentiles of successful requests and p99 over all answers
     """
     print("=" * 80)
     print(f"STRESS TEST - {num_users} Concurrent Users")
@@ -123,7 +140,11 @@ async def run_stress_test(num_users, requests_per_user=1):
     total_bytes = 0
 
     for i in range(num_users):
-        image_data, size = create_test_image(seed=i)
+        if images:
+            image_data = images[i % len(images)]
+            size = len(image_data) * 3 // 4
+        else:
+            image_data, size = create_test_image(seed=i)
         test_images.append(image_data)
         total_bytes += size
 
@@ -158,11 +179,13 @@ async def run_stress_test(num_users, requests_per_user=1):
     print("=" * 80)
 
     successful = [r for r in results if r['status'] == 'success']
+    shed = [r for r in results if r['status'] == 'shed']
     failed = [r for r in results if r['status'] == 'error']
 
     print(f"\n📊 Summary:")
     print(f"   Total Requests: {len(results)}")
     print(f"   Successful: {len(successful)} ({len(successful)/len(results)*100:.1f}%)")
+    print(f"   Shed (429): {len(shed)} ({len(shed)/len(results)*100:.1f}%)")
     print(f"   Failed: {len(failed)} ({len(failed)/len(results)*100:.1f}%)")
     print(f"   Total Time: {total_elapsed:.2f}s")
     print(f"   Throughput: {len(results)/total_elapsed:.1f} requests/second")
@@ -206,6 +229,122 @@ async def run_stress_test(num_users, requests_per_user=1):
 
     print("\n" + "=" * 80)
 
+    def p99(times):
+        return times[min(len(times) - 1, int(len(times) * 0.99))] if times else None
+
+    response_times = sorted(r['elapsed_ms'] for r in successful)
+    return {
+        'requests': len(results),
+        'successful': len(successful),
+        'shed': len(shed),
+        'failed': len(failed),
+        'throughput': len(results) / total_elapsed,
+        'goodput': len(successful) / total_elapsed,
+        'p50_ms': statistics.median(response_times) if response_times else None,
+        'p99_ms': p99(response_times),
+        'p99_all_ms': p99(sorted(r['elapsed_ms'] for r in successful + shed))
+    }
+
+def simulate_participant(rng, duration_s, step_s):
+    """
+    Synthetic ground truth for one participant, one entry per time step:
+    (status, quality_score, face_bbox). Participants alternate between adjusting
+    (face missing or moving, score poor and fluctuating) and sitting still
+    (steady score, face barely moving).
+    """
+    timeline = []
+    t = 0.0
+    adjusting, phase_end = True, rng.uniform(5, 20)
+    face = np.array([220.0, 120.0, 200.0, 200.0])
+    level = rng.uniform(0.55, 0.95)
+    score = 0.3
+    face_visible = False
+    while t < duration_s:
+        if t >= phase_end:
+            adjusting = not adjusting
+            phase_end = t + (rng.uniform(2, 8) if adjusting else rng.exponential(40))
+            if not adjusting:
+                level = rng.uniform(0.55, 0.95)
+                face_visible = True
+        if adjusting:
+            face[:2] += rng.normal(0, 15, 2)
+            score = float(np.clip(score + rng.normal(0, 0.08), 0.1, 0.8))
+            if rng.random() < 0.05:  # Face leaves / re-enters the frame for a while
+                face_visible = not face_visible
+            status = 'OK' if face_visible else 'NO_FACE'
+        else:
+            face[:2] += rng.normal(0, 1, 2)
+            score = level
+            status = 'OK'
+        timeline.append((status, score, [int(v) for v in face]))
+        t += step_s
+    return timeline
+
+def simulate_adaptive_polling(num_participants=200, duration_s=300, fixed_interval_ms=2000, seed=0):
+    """
+    Offline simulation: fixed-interval polling vs. the server's adaptive next_check_ms
+
+    Replays the same synthetic participants against CheckIntervalAdvisor (no
+    server needed). Reports the request volume and feedback quality: the share
+    of time the client shows the right state (no face / below threshold / met)
+    and the lag from a change of state to the next check, when the client
+    first sees it.
+    """
+    from check_interval import CheckIntervalAdvisor
+
+    step_s = 0.1
+    rng = np.random.default_rng(seed)
+    participants = [simulate_participant(rng, duration_s, step_s) for _ in range(num_participants)]
+
+    def state(status, score):
+        return 'no_face' if status != 'OK' else ('met' if score >= 0.5 else 'below')
+
+    def run(adaptive):
+        advisor = CheckIntervalAdvisor(default_ms=fixed_interval_ms)
+        noise = np.random.default_rng(seed + 1)
+        requests = correct = steps = 0
+        lags = []
+        for p, timeline in enumerate(participants):
+            shown, next_check, changed_at = None, 1.0, None
+            for i, (status, score, bbox) in enumerate(timeline):
+                t = i * step_s
+                truth = state(status, score)
+                if i and truth != state(*timeline[i - 1][:2]) and changed_at is None:
+                    changed_at = t
+                if t >= next_check:
+                    if changed_at is not None:
+                        lags.append(t - changed_at)
+                        changed_at = None
+                    requests += 1
+                    observed = float(np.clip(score + noise.normal(0, 0.01), 0, 1))
+                    result = {'status': status, 'quality_score': observed if status == 'OK' else None, 'face_bbox': bbox}
+                    shown = state(status, observed)
+                    delay_ms = advisor.recommend(f'p{p}', result) if adaptive else fixed_interval_ms
+                    next_check = t + delay_ms / 1000
+                correct += shown == truth
+                steps += 1
+        return {
+            'requests': requests,
+            'requests_per_participant_min': requests / num_participants / (duration_s / 60),
+            'correct_share': correct / steps,
+            'mean_lag_s': statistics.mean(lags) if lags else None,
+            'p90_lag_s': sorted(lags)[int(len(lags) * 0.9)] if lags else None
+        }
+
+    fixed, adaptive = run(False), run(True)
+    print("=" * 80)
+    print(f"ADAPTIVE POLLING SIMULATION - {num_participants} participants x {duration_s}s")
+    print("=" * 80)
+    print(f"{'Polling':<22} {'Requests':>9} {'Req/min/user':>13} {'Correct state':>14} {'Mean lag':>9} {'p90 lag':>8}")
+    print("-" * 80)
+    for label, r in ((f'fixed {fixed_interval_ms}ms', fixed), ('adaptive next_check_ms', adaptive)):
+        print(f"{label:<22} {r['requests']:>9} {r['requests_per_participant_min']:>13.1f} "
+              f"{r['correct_share'] * 100:>13.1f}% {r['mean_lag_s']:>8.2f}s {r['p90_lag_s']:>7.2f}s")
+    print("-" * 80)
+    print(f"Request volume: {(1 - adaptive['requests'] / fixed['requests']) * 100:.0f}% lower with adaptive intervals")
+    print("=" * 80)
+    return fixed, adaptive
+
 async def run_progressive_test():
     """
     Run progressive stress test: 10, 25, 50, 100 users
@@ -229,13 +368,15 @@ async def run_progressive_test():
 
 def main():
     """Main entry point"""
-    if len(sys.argv) > 1:
+    if len(sys.argv) > 1 and sys.argv[1] == '--simulate-adaptive':
+        simulate_adaptive_polling(int(sys.argv[2]) if len(sys.argv) > 2 else 200)
+    elif len(sys.argv) > 1:
         try:
             num_users = int(sys.argv[1])
             print(f"Running stress test with {num_users} concurrent users...")
             asyncio.run(run_stress_test(num_users))
         except ValueError:
-            print("Usage: python3 stress_test.py [num_users]")
+            print("Usage: python3 stress_test.py [num_users | --simulate-adaptive [participants]]")
             print("Example: python3 stress_test.py 100")
             sys.exit(1)
     else:
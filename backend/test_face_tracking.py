@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Test: face tracking keeps up with the adaptive check interval
+A steady, good session backs off to QUALITY_CHECK_MAX_MS between checks; its
+tracked face must still be current then, so checks keep using the ROI (and,
+on the periodic full-frame pass, the face size for the reduced decode).
+Uses app's configured FaceTracker and CheckIntervalAdvisor with a simulated
+clock. Run directly or with pytest.
+"""
+
+import time
+from contextlib import contextmanager
+
+import app
+from face_tracking import FaceTracker
+
+FACE_BBOX = (500, 200, 260, 300)
+
+
+@contextmanager
+def simulated_clock():
+    """time.monotonic() returns clock[0]; advance it by assigning"""
+    clock = [time.monotonic()]
+    real = time.monotonic
+    time.monotonic = lambda: clock[0]
+    try:
+        yield clock
+    finally:
+        time.monotonic = real
+
+
+def good_result():
+    return {'status': 'OK', 'quality_score': 0.85, 'face_bbox': FACE_BBOX}
+
+
+def test_roi_used_at_max_interval():
+    tracker, advisor = app.face_tracker, app.check_interval
+    assert tracker is not None and advisor is not None, 'needs FACE_TRACKING_ENABLED and ADAPTIVE_INTERVAL_ENABLED'
+    session_id = 'test-max-interval'
+
+    with simulated_clock() as clock:
+        interval_ms = advisor.recommend(session_id, good_result())
+        tracker.update(session_id, FACE_BBOX, 'full')
+        for _ in range(20):  # Back off to the ceiling
+            clock[0] += interval_ms / 1000
+            detection = 'roi' if tracker.get_roi(session_id) is not None else 'full'
+            tracker.update(session_id, FACE_BBOX, detection)
+            interval_ms = advisor.recommend(session_id, good_result())
+        assert interval_ms == app.QUALITY_CHECK_MAX_MS, f'no back-off to the ceiling: {interval_ms}ms'
+
+        checks = 2 * (tracker.full_every + 1)
+        roi_checks = 0
+        for _ in range(checks):
+            clock[0] += interval_ms / 1000
+            roi = tracker.get_roi(session_id)
+            assert roi is not None or tracker.get_face_size(session_id) is not None, 'track expired between checks'
+            roi_checks += roi is not None
+            tracker.update(session_id, FACE_BBOX, 'roi' if roi is not None else 'full')
+            interval_ms = advisor.recommend(session_id, good_result())
+        # Only the forced full-frame passes (one per full_every ROI frames) skip the ROI
+        assert roi_checks >= checks - 2, f'ROI used on {roi_checks}/{checks} checks at {interval_ms}ms'
+
+
+def test_cache_hit_keeps_track():
+    tracker = FaceTracker(max_age_seconds=5.0)
+    with simulated_clock() as clock:
+        tracker.update('s', FACE_BBOX, 'full')
+        clock[0] += 4
+        tracker.touch('s')  # Frame answered from the result cache
+        clock[0] += 4
+        assert tracker.get_roi('s') is not None
+        clock[0] += 6
+        tracker.touch('s')  # Too late: an expired track is not revived
+        assert tracker.get_roi('s') is None
+
+
+if __name__ == '__main__':
+    test_roi_used_at_max_interval()
+    test_cache_hit_keeps_track()
+    print("✅ Face tracking keeps its ROI at the longest check interval")
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Persistent Triton client pool for quality inference
+Keeps keep-alive HTTP connections open across requests and caches server/model
+readiness in a background thread, so the hot path makes exactly one infer call.
+AsyncTritonClient is the asyncio equivalent for the async server.
+"""
+
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import tritonclient.http as httpclient
+
+logger = logging.getLogger(__name__)
+
+
+class TritonNotReadyError(RuntimeError):
+    """Raised when the cached readiness state says Triton cannot serve requests"""
+
+
+class TritonClientPool:
+    """
+    Thread-safe pool of tritonclient HTTP clients
+
+    tritonclient.http is built on gevent: a client may only be used from the
+    thread that created it, and Werkzeug starts a new thread per request. The
+    pool therefore owns `size` long-lived I/O threads, each holding one client
+    with a keep-alive connection. Request threads hand their tensor to the pool
+    and block on the result. A client that raised is dropped (its connection may
+    be broken), recreated on next use, and a readiness refresh is requested.
+    """
+
+    def __init__(
+        self,
+        url,
+        model_name,
+        model_version='1',
+        size=8,
+        readiness_interval=2.0,
+        connection_timeout=5.0,
+        network_timeout=10.0
+    ):
+        self.url = url
+        self.model_name = model_name
+        self.model_version = model_version
+        self.size = size
+        self.readiness_interval = readiness_interval
+        self.connection_timeout = connection_timeout
+        self.network_timeout = network_timeout
+
+        self._local = threading.local()  # One client per I/O thread
+        self._clients = []
+        self._clients_lock = threading.Lock()
+        self._executor = None
+
+        self._ready = False
+        self._ready_reason = 'Triton readiness not checked yet'
+        self._checked = threading.Event()
+        self._refresh_now = threading.Event()
+        self._stop = threading.Event()
+        self._refresher = None
+
+    # ------------------------------------------------------------------
+    # Per-thread clients
+    # ------------------------------------------------------------------
+
+    def _new_client(self):
+        return httpclient.InferenceServerClient(
+            url=self.url,
+            verbose=False,
+            connection_timeout=self.connection_timeout,
+            network_timeout=self.network_timeout
+        )
+
+    def _thread_client(self):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self._new_client()
+            with self._clients_lock:
+                self._clients.append(client)
+        return client
+
+    def _drop_thread_client(self):
+        client = getattr(self._local, 'client', None)
+        self._local.client = None
+        if client is not None:
+            with self._clients_lock:
+                if client in self._clients:
+                    self._clients.remove(client)
+            try:
+                client.close()
+            except Exception:
+                pass  # Ignore close errors
+
+    # ------------------------------------------------------------------
+    # Readiness
+    # ------------------------------------------------------------------
+
+    def is_ready(self):
+        """Cached readiness (no network I/O)"""
+        return self._ready
+
+    @property
+    def ready_reason(self):
+        return self._ready_reason
+
+    def _check_readiness(self):
+        try:
+            client = self._thread_client()
+            if not client.is_server_ready():
+                ready, reason = False, 'Triton server not ready'
+            elif not client.is_model_ready(self.model_name, self.model_version):
+                ready, reason = False, f'Model {self.model_name} not ready'
+            else:
+                ready, reason = True, 'ready'
+        except Exception as e:
+            ready, reason = False, f'Triton unreachable: {e}'
+            self._drop_thread_client()
+
+        if ready != self._ready:
+            log = logger.info if ready else logger.warning
+            log(f"Triton readiness changed: {reason}")
+        self._ready, self._ready_reason = ready, reason
+        self._checked.set()
+
+    def _refresh_loop(self):
+        while not self._stop.is_set():
+            self._check_readiness()
+            self._refresh_now.wait(self.readiness_interval)
+            self._refresh_now.clear()
+        self._drop_thread_client()
+
+    def request_refresh(self):
+        """Ask the background thread to re-check readiness now"""
+        self._refresh_now.set()
+
+    def start(self, wait_timeout=5.0):
+        """Start the I/O threads and readiness refresher; waits for the first check"""
+        if self._refresher is not None and self._refresher.is_alive():
+            return self
+        self._stop.clear()
+        self._checked.clear()
+        self._executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix='triton-io')
+        self._refresher = threading.Thread(target=self._refresh_loop, name='triton-readiness', daemon=True)
+        self._refresher.start()
+        self._checked.wait(wait_timeout)
+        return self
+
+    def close(self):
+        """Stop the refresher and I/O threads and close their clients"""
+        self._stop.set()
+        self._refresh_now.set()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        with self._clients_lock:
+            clients, self._clients = self._clients, []
+        for client in clients:
+            try:
+                client.close()
+            except Exception:
+                pass
+
+    # ------------------------------------------------------------------
+    # Inference
+    # ------------------------------------------------------------------
+
+    def _infer_on_io_thread(self, batch):
+        infer_input = httpclient.InferInput('input', list(batch.shape), 'FP32')
+        infer_input.set_data_from_numpy(batch, binary_data=True)
+        output = httpclient.InferRequestedOutput('output', binary_data=True)
+        try:
+            response = self._thread_client().infer(
+                model_name=self.model_name,
+                model_version=self.model_version,
+                inputs=[infer_input],
+                outputs=[output]
+            )
+        except Exception:
+            self._drop_thread_client()
+            self.request_refresh()
+            raise
+        return response.as_numpy('output').reshape(-1)
+
+    def infer(self, batch, timeout=None):
+        """
+        Run the quality model on a preprocessed batch
+
+        Args:
+            batch: float32 numpy array (N, 3, 352, 352)
+            timeout: seconds to wait for the result (None = 2x network timeout)
+
+        Returns:
+            numpy array (N,) of quality scores
+
+        Raises:
+            TritonNotReadyError: cached readiness says Triton cannot serve
+        """
+        if not self._ready or self._executor is None:
+            raise TritonNotReadyError(self._ready_reason)
+
+        batch = np.ascontiguousarray(batch, dtype=np.float32)
+        future = self._executor.submit(self._infer_on_io_thread, batch)
+        return future.result(timeout=timeout if timeout is not None else self.network_timeout * 2)
+
+
+class AsyncTritonClient:
+    """
+    asyncio Triton client (tritonclient.http.aio, aiohttp-based)
+
+    One client serves the whole event loop: its aiohttp connector keeps up to
+    `conn_limit` keep-alive connections, and in-flight requests are coroutines
+    rather than threads. Readiness is cached by a background task, as in
+    TritonClientPool. start() and close() must run on the serving loop.
+    """
+
+    def __init__(self, url, model_name, model_version='1', conn_limit=64, readiness_interval=2.0, network_timeout=10.0):
+        self.url = url
+        self.model_name = model_name
+        self.model_version = model_version
+        self.conn_limit = conn_limit
+        self.readiness_interval = readiness_interval
+        self.network_timeout = network_timeout
+
+        self._client = None
+        self._ready = False
+        self._ready_reason = 'Triton readiness not checked yet'
+        self._refresh_now = None
+        self._refresher = None
+
+    def is_ready(self):
+        """Cached readiness (no network I/O)"""
+        return self._ready
+
+    @property
+    def ready_reason(self):
+        return self._ready_reason
+
+    async def _check_readiness(self):
+        try:
+            if not await self._client.is_server_ready():
+                ready, reason = False, 'Triton server not ready'
+            elif not await self._client.is_model_ready(self.model_name, self.model_version):
+                ready, reason = False, f'Model {self.model_name} not ready'
+            else:
+                ready, reason = True, 'ready'
+        except Exception as e:
+            ready, reason = False, f'Triton unreachable: {e}'
+
+        if ready != self._ready:
+            log = logger.info if ready else logger.warning
+            log(f"Triton readiness changed: {reason}")
+        self._ready, self._ready_reason = ready, reason
+
+    async def _refresh_loop(self):
+        while True:
+            await self._check_readiness()
+            try:
+                await asyncio.wait_for(self._refresh_now.wait(), self.readiness_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._refresh_now.clear()
+
+    def request_refresh(self):
+        """Ask the background task to re-check readiness now"""
+        if self._refresh_now is not None:
+            self._refresh_now.set()
+
+    async def start(self):
+        """Create the client and readiness task; waits for the first check"""
+        import tritonclient.http.aio as aiohttpclient
+        if self._client is None:
+            self._client = aiohttpclient.InferenceServerClient(
+                url=self.url,
+                verbose=False,
+                conn_limit=self.conn_limit,
+                conn_timeout=self.network_timeout
+            )
+            self._refresh_now = asyncio.Event()
+            await self._check_readiness()
+            self._refresher = asyncio.get_running_loop().create_task(self._refresh_loop())
+        return self
+
+    async def close(self):
+        if self._refresher is not None:
+            self._refresher.cancel()
+            await asyncio.gather(self._refresher, return_exceptions=True)
+            self._refresher = None
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+    async def infer(self, batch):
+        """
+        Run the quality model on a preprocessed batch
+
+        Args:
+            batch: float32 numpy array (N, 3, 352, 352)
+
+        Returns:
+            numpy array (N,) of quality scores
+
+        Raises:
+            TritonNotReadyError: cached readiness says Triton cannot serve
+        """
+        if not self._ready or self._client is None:
+            raise TritonNotReadyError(self._ready_reason)
+
+        batch = np.ascontiguousarray(batch, dtype=np.float32)
+        infer_input = httpclient.InferInput('input', list(batch.shape), 'FP32')
+        infer_input.set_data_from_numpy(batch, binary_data=True)
+        output = httpclient.InferRequestedOutput('output', binary_data=True)
+        try:
+            response = await self._client.infer(
+                model_name=self.model_name,
+                model_version=self.model_version,
+                inputs=[infer_input],
+                outputs=[output]
+            )
+        except Exception:
+            self.request_refresh()
+            raise
+        return response.as_numpy('output').reshape(-1)
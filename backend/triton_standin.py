@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Minimal local stand-in for the Triton HTTP/REST (KServe v2) API
+Serves the health, model-ready and infer endpoints for efficient_fiqa so that
+client-side benchmarks can run without a GPU. Inference is simulated with a
+fixed per-batch delay and returns a constant score for every batch item.
+
+Usage:
+    python3 triton_standin.py [port] [latency_ms]
+"""
+
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_PORT = 8010
+DEFAULT_LATENCY_MS = 4.0
+STANDIN_SCORE = 0.75
+
+
+def _make_handler(latency_s, stats):
+    class StandinHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # Keep-alive, like the real server
+
+        def log_message(self, format, *args):
+            pass  # Silence per-request logging
+
+        def _reply(self, status, body=b''):
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            if body:
+                self.wfile.write(body)
+
+        def do_GET(self):
+            with stats['lock']:
+                stats['connections'].add(self.client_address)
+                stats['requests'] += 1
+            if self.path in ('/v2/health/ready', '/v2/health/live') or self.path.endswith('/ready'):
+                self._reply(200)
+            else:
+                self._reply(404)
+
+        def do_POST(self):
+            with stats['lock']:
+                stats['connections'].add(self.client_address)
+                stats['requests'] += 1
+            length = int(self.headers.get('Content-Length', 0))
+            body = self.rfile.read(length)
+            header_length = self.headers.get('Inference-Header-Content-Length')
+            header = json.loads(body[:int(header_length)] if header_length else body)
+            batch_size = header['inputs'][0]['shape'][0]
+
+            time.sleep(latency_s)
+
+            response = {
+                'model_name': 'efficient_fiqa',
+                'model_version': '1',
+                'outputs': [{
+                    'name': 'output',
+                    'datatype': 'FP32',
+                    'shape': [batch_size, 1],
+                    'data': [STANDIN_SCORE] * batch_size
+                }]
+            }
+            self._reply(200, json.dumps(response).encode())
+
+    return StandinHandler
+
+
+def start_standin(port=DEFAULT_PORT, latency_ms=DEFAULT_LATENCY_MS):
+    """
+    Start the stand-in server in a background thread
+
+    Returns:
+        (server, stats) - call server.shutdown() to stop; stats counts
+        requests and distinct client connections seen
+    """
+    stats = {'lock': threading.Lock(), 'requests': 0, 'connections': set()}
+    server = ThreadingHTTPServer(('127.0.0.1', port), _make_handler(latency_ms / 1000.0, stats))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='triton-standin', daemon=True).start()
+    return server, stats
+
+
+def main():
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_PORT
+    latency_ms = float(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_LATENCY_MS
+    server, _ = start_standin(port, latency_ms)
+    print(f"Triton stand-in listening on 127.0.0.1:{port} (simulated latency {latency_ms}ms)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+Where uploaded video chunks land on disk
+Chunk-directory layout (the original protocol): each chunk is saved as
+`<video_id>_chunks/chunk_NNNN` and the last request concatenates them into the
+video, so every byte is written twice and the last chunk waits for the whole
+reassembly. reassemble_chunks() does the concatenation in the kernel
+(copy_file_range, else sendfile, else a fixed-size buffer), so Python never
+holds more than one small buffer of video.
+
+Direct-offset layout (clients that send chunk_size, and raw-body PUT
+uploads, whose body write_chunk_at() reads straight from the socket): the
+video is written in place as `<video>.part`, sized (sparse: no disk blocks
+until written) to total_chunks * chunk_size bytes, and chunk i goes straight
+to offset i * chunk_size as it arrives, in any order. The final chunk trims
+the file to its real length; completion is a rename.
+
+Abandoned uploads (the client never sent the rest) leave a chunk directory
+or .part file behind, and completed ones a tombstone (see ChunkManifest);
+remove_stale_uploads() deletes those idle for too long.
+
+Chunks of one upload may arrive in parallel and more than once (client
+retries): chunk files are replaced atomically (save_chunk) and direct-offset
+chunks rewrite the same bytes, so a duplicate never disturbs a reassembly in
+progress. Which request completes the upload is decided by ChunkManifest.
+"""
+
+import contextlib
+import errno
+import fcntl
+import os
+import shutil
+import tempfile
+import time
+
+COPY_BUFFER_BYTES = 256 * 1024  # Fixed-size reads from the request stream / buffered copies
+KERNEL_COPY_BYTES = 64 * 1024 * 1024  # Per copy_file_range / sendfile call (the kernel moves the bytes)
+
+# When reassembled / direct-offset videos are forced to disk before they are reported complete:
+#   'none'  - left to the page cache (fastest; a power loss can lose recent videos)
+#   'end'   - the video, then its directory entry after the rename
+#   'chunk' - as 'end', plus after each chunk copied, which bounds dirty memory for large videos
+FSYNC_POLICIES = ('none', 'end', 'chunk')
+
+# Errors meaning "this copy method is unavailable here": fall back to the next one
+_UNSUPPORTED = (errno.ENOSYS, errno.EXDEV, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTSUP, errno.EBADF)
+
+
+def part_path(video_path):
+    """Path of the in-progress direct-offset file for a video"""
+    return video_path.with_name(video_path.name + '.part')
+
+
+def save_chunk(stream, chunk_path):
+    """
+    Save a chunk file atomically: a temporary file in the same directory, then a rename
+
+    Returns:
+        bytes written
+    """
+    directory, name = os.path.split(chunk_path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f'.{name}.')  # Does not match chunk_*
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            shutil.copyfileobj(stream, out, COPY_BUFFER_BYTES)
+            size = out.tell()
+        os.replace(tmp_path, chunk_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return size
+
+
+class _Replay:
+    """
+    Read-only stream: bytes of the chunk already consumed while comparing it,
+    then the rest of the request stream
+
+    The consumed bytes are not kept: those that matched are read again from
+    the file they were compared with (`prefix` bytes at offset), and only the
+    block that differed (`head`, at most COPY_BUFFER_BYTES + 1) is held.
+    """
+
+    def __init__(self, f, offset, prefix, head, stream):
+        self._f = f
+        self._offset = offset
+        self._prefix = prefix
+        self._head = head
+        self._stream = stream
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            return b''.join(iter(lambda: self.read(COPY_BUFFER_BYTES), b''))
+        if self._prefix:
+            data = os.pread(self._f.fileno(), min(size, self._prefix, COPY_BUFFER_BYTES), self._offset)
+            if not data:
+                raise OSError(errno.EIO, 'Compared file shrank while replaying a chunk')
+            self._offset += len(data)
+            self._prefix -= len(data)
+            if not self._prefix:
+                self._f.close()
+            return data
+        if self._head:
+            data, self._head = self._head[:size], self._head[size:]
+            return data
+        return self._stream.read(size)
+
+
+def _read_up_to(stream, size):
+    """Up to size bytes: fewer only at the end of the stream (socket streams may return short reads)"""
+    parts = []
+    while size > 0:
+        block = stream.read(size)
+        if not block:
+            break
+        parts.append(block)
+        size -= len(block)
+    return b''.join(parts)
+
+
+def same_chunk(stream, path, offset, length):
+    """
+    Whether a chunk holds exactly the `length` bytes of file path at offset (a
+    resent chunk of a finished video), compared COPY_BUFFER_BYTES at a time
+
+    Reading stops at the first block that differs, so a new upload's chunk
+    is not read twice in full, and memory stays at one block whatever the
+    chunk size.
+
+    Returns:
+        (matches, stream): the stream to store the chunk from, at its first byte again
+    """
+    try:
+        f = open(path, 'rb')
+    except FileNotFoundError:
+        return False, stream
+    matched = 0
+    while True:
+        remaining = length - matched
+        block = _read_up_to(stream, min(COPY_BUFFER_BYTES, remaining + 1))  # One byte more tells a longer chunk
+        if not block:
+            matches = remaining == 0
+            break
+        if len(block) > remaining or os.pread(f.fileno(), len(block), offset + matched) != block:
+            matches = False
+            break
+        matched += len(block)
+    if not matched:
+        f.close()
+    return matches, _Replay(f, offset, matched, block, stream)
+
+
+@contextlib.contextmanager
+def _flocked(fd):
+    fcntl.flock(fd, fcntl.LOCK_EX)
+    try:
+        yield
+    finally:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+def write_chunk_at(path, stream, chunk_index, chunk_size, total_chunks, guard=contextlib.nullcontext):
+    """
+    Write one chunk of a direct-offset upload at chunk_index * chunk_size
+
+    The file is created and sized by whichever chunk arrives first, and
+    the final chunk (index total_chunks - 1, which may be short) truncates it
+    to the video's length; both happen under an exclusive flock so they are
+    ordered across threads and worker processes. The body is read and written
+    without any lock: byte ranges of different chunks never overlap, and a
+    duplicate rewrites the same bytes.
+
+    Args:
+        path: the .part file (see part_path)
+        stream: file-like request body of the chunk, read in fixed-size blocks
+        chunk_size: bytes in every chunk but the last
+        guard: context manager factory held only while the file is opened
+            (created) and truncated, not while the body arrives, e.g.
+            ChunkManifest.storing: a slow client never blocks the upload's
+            completion
+
+    Returns:
+        bytes written
+
+    Raises:
+        ValueError: the chunk is longer than chunk_size, or a chunk other than
+            the last is shorter (nothing past the chunk's range is written)
+    """
+    offset = chunk_index * chunk_size
+    is_last = chunk_index == total_chunks - 1
+    with guard():
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        with _flocked(fd):
+            if os.fstat(fd).st_size == 0:
+                # Sparse: disk is only used as chunks arrive, not reserved for the size a client claims
+                os.ftruncate(fd, total_chunks * chunk_size)
+
+        written = 0
+        while True:
+            block = stream.read(min(COPY_BUFFER_BYTES, chunk_size - written + 1))
+            if not block:
+                break
+            if written + len(block) > chunk_size:
+                raise ValueError(f'Chunk {chunk_index} is larger than chunk_size ({chunk_size} bytes)')
+            view = memoryview(block)
+            while view:
+                count = os.pwrite(fd, view, offset + written)
+                written += count
+                view = view[count:]
+
+        if is_last:
+            if written == 0:
+                raise ValueError(f'Chunk {chunk_index} is empty')
+            with guard(), _flocked(fd):
+                os.ftruncate(fd, offset + written)
+        elif written != chunk_size:
+            raise ValueError(f'Chunk {chunk_index} has {written} bytes, expected chunk_size ({chunk_size})')
+        return written
+    finally:
+        os.close(fd)
+
+
+def remove_stale_uploads(session_dirs, max_age_seconds):
+    """
+    Delete the leftovers of abandoned uploads: `*_chunks` directories and
+    `*.part` files in session_dirs not modified for max_age_seconds (a chunk
+    directory counts as modified when a chunk file or its manifest is), and
+    completed uploads' `*_chunks.complete` tombstones as old
+
+    Returns:
+        paths removed
+    """
+    cutoff = time.time() - max_age_seconds
+    removed = []
+    for session_dir in session_dirs:
+        try:
+            entries = list(os.scandir(session_dir))
+        except (FileNotFoundError, NotADirectoryError):
+            continue
+        for entry in entries:
+            try:
+                if entry.name.endswith(('.part', '_chunks.complete')) and entry.is_file(follow_symlinks=False):
+                    if entry.stat().st_mtime < cutoff:
+                        os.unlink(entry.path)
+                        removed.append(entry.path)
+                elif entry.name.endswith('_chunks') and entry.is_dir(follow_symlinks=False):
+                    with os.scandir(entry.path) as files:
+                        mtimes = [entry.stat().st_mtime] + [f.stat().st_mtime for f in files]
+                    if max(mtimes) < cutoff:
+                        shutil.rmtree(entry.path)
+                        removed.append(entry.path)
+            except FileNotFoundError:
+                pass  # Completed (or removed) meanwhile
+    return removed
+
+
+def _copy_kernel(copy, src_fd, dst_fd, offset, size):
+    """Copy size bytes from the start of src to dst at offset with copy_file_range/sendfile"""
+    copied = 0
+    while copied < size:
+        if copy == 'copy_file_range':
+            count = os.copy_file_range(src_fd, dst_fd, min(KERNEL_COPY_BYTES, size - copied), copied, offset + copied)
+        else:
+            os.lseek(dst_fd, offset + copied, os.SEEK_SET)
+            count = os.sendfile(dst_fd, src_fd, copied, min(KERNEL_COPY_BYTES, size - copied))
+        if count == 0:
+            raise OSError(errno.EIO, 'Chunk shrank while copying')
+        copied += count
+
+
+def _copy_buffered(src_fd, dst_fd, offset, size, buffer):
+    view = memoryview(buffer)
+    copied = 0
+    while copied < size:
+        count = os.readv(src_fd, [view[:min(len(buffer), size - copied)]])
+        if count == 0:
+            raise OSError(errno.EIO, 'Chunk shrank while copying')
+        written = 0
+        while written < count:
+            written += os.pwrite(dst_fd, view[written:count], offset + copied + written)
+        copied += count
+
+
+def commit_file(path, final_path, fsync='none'):
+    """Rename a finished .part file into place, durably per the fsync policy"""
+    if fsync != 'none':
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+    os.replace(path, final_path)
+    if fsync != 'none':
+        dir_fd = os.open(os.path.dirname(final_path) or '.', os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+def reassemble_chunks(chunk_paths, video_path, fsync='none'):
+    """
+    Concatenate chunk files into video_path without reading them into Python
+
+    Copies with os.copy_file_range (in-kernel; reflinks on filesystems that
+    support it), falling back to os.sendfile and then to COPY_BUFFER_BYTES
+    buffered copies when a method is unavailable. The video is written as a
+    .part file and renamed into place, so a crash never leaves a truncated
+    video under the final name.
+
+    Args:
+        chunk_paths: chunk files in order
+        fsync: one of FSYNC_POLICIES
+
+    Returns:
+        (video size in bytes, copy method used: 'copy_file_range' | 'sendfile' | 'buffered')
+
+    Raises:
+        FileNotFoundError: a chunk is missing (the .part file is removed)
+    """
+    if fsync not in FSYNC_POLICIES:
+        raise ValueError(f'fsync must be one of {FSYNC_POLICIES}')
+    methods = [m for m in ('copy_file_range', 'sendfile') if hasattr(os, m)]
+    buffer = None
+    tmp_path = part_path(video_path)
+    dst_fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        offset = 0
+        for chunk_path in chunk_paths:
+            src_fd = os.open(chunk_path, os.O_RDONLY)
+            try:
+                size = os.fstat(src_fd).st_size
+                while methods:
+                    try:
+                        _copy_kernel(methods[0], src_fd, dst_fd, offset, size)
+                        break
+                    except OSError as e:
+                        if e.errno not in _UNSUPPORTED:
+                            raise
+                        methods.pop(0)  # Unavailable for these files: use the next method from now on
+                else:
+                    buffer = buffer if buffer is not None else bytearray(COPY_BUFFER_BYTES)
+                    os.lseek(src_fd, 0, os.SEEK_SET)
+                    _copy_buffered(src_fd, dst_fd, offset, size, buffer)
+            finally:
+                os.close(src_fd)
+            offset += size
+            if fsync == 'chunk':
+                os.fsync(dst_fd)
+    except BaseException:
+        os.close(dst_fd)
+        os.unlink(tmp_path)
+        raise
+    os.close(dst_fd)
+    commit_file(tmp_path, video_path, fsync)
+    return offset, methods[0] if methods else 'buffered'
@@ -8,6 +8,7 @@ const VideoUploader = (function() {
     const BACKEND_URL = ''; // Relative URLs -> nginx proxies to backend #claude
     console.log(`📡 Backend URL: ${BACKEND_URL || 'relative (nginx proxy)'}`); // #claude
     const CHUNK_SIZE = 1024 * 1024; // 1MB chunks
+    const UPLOAD_CONCURRENCY = 4; // Chunks in flight per video (one per RTT caps throughput on high-latency links)
     const MAX_RETRIES = 3;
     const RETRY_DELAY_BASE = 2000; // 2 seconds base delay
     const DEBUG = true; // Enable verbose logging //#claude
@@ -80,38 +81,65 @@ const VideoUploader = (function() {
     }
 
     /**
-     * Split blob into chunks
+     * Chunk indices still to send for a video, from /api/upload/status
+     * (all of them if the server has none, or its status cannot be fetched)
+     * Returns { pending, filePath }; filePath is set (and pending empty) if the
+     * server already has the whole video.
      */
-    function* chunkBlob(blob, chunkSize) {
-        let offset = 0;
-        while (offset < blob.size) {
-            const chunk = blob.slice(offset, offset + chunkSize);
-            yield chunk;
-            offset += chunkSize;
+    async function getPendingChunks(sessionId, videoId, totalChunks) {
+        const allChunks = { pending: Array.from({ length: totalChunks }, (_, i) => i), filePath: null };
+        try {
+            const params = new URLSearchParams({ session_id: sessionId, video_id: videoId });
+            const response = await fetch(`${BACKEND_URL}/api/upload/status?${params}`);
+            if (!response.ok) {
+                return allChunks;
+            }
+            const status = await response.json();
+            if (status.status === 'complete') {
+                return { pending: [], filePath: status.file_path };
+            }
+            if (status.status !== 'in_progress' || status.total_chunks !== totalChunks) {
+                return allChunks;
+            }
+            const pending = status.missing.flatMap(([first, last]) =>
+                Array.from({ length: last - first + 1 }, (_, i) => first + i));
+            // All chunks received but the server never finished the video: the last chunk completes it again
+            return { pending: pending.length > 0 ? pending : [totalChunks - 1], filePath: null };
+        } catch (error) {
+            log('warn', 'Upload status unavailable, sending all chunks:', error.message); //#claude
+            return allChunks;
         }
     }
 
     /**
      * Upload a single chunk with retry logic
+     * Sent as the raw request body (PUT + Content-Range): the server streams it
+     * to its offset in the video file, with no multipart parsing
      */
-    async function uploadChunkWithRetry(sessionId, videoId, chunkIndex, totalChunks, chunk, retryCount = 0) {
+    async function uploadChunkWithRetry(sessionId, videoId, chunkIndex, totalChunks, chunk, videoSize, retryCount = 0) {
         try {
             log('debug', `Uploading chunk ${chunkIndex}/${totalChunks - 1}, size: ${(chunk.size / 1024).toFixed(1)}KB`); //#claude
             //#claude
-            const formData = new FormData();
-            formData.append('session_id', sessionId);
-            formData.append('video_id', videoId);
-            formData.append('chunk_index', chunkIndex.toString());
-            formData.append('total_chunks', totalChunks.toString());
-            formData.append('chunk', chunk, `chunk_${chunkIndex}`);
+            const params = new URLSearchParams({
+                session_id: sessionId,
+                video_id: videoId,
+                chunk_size: CHUNK_SIZE.toString() // Every chunk but the last; chunk i starts at byte i * CHUNK_SIZE
+            });
+            const start = chunkIndex * CHUNK_SIZE;
 
             const startTime = Date.now(); //#claude
-            const response = await fetch(`${BACKEND_URL}/api/upload/chunk`, {
-                method: 'POST',
-                body: formData
+            const response = await fetch(`${BACKEND_URL}/api/upload/chunk?${params}`, {
+                method: 'PUT',
+                headers: {
+                    'Content-Type': 'application/octet-stream',
+                    'Content-Range': `bytes ${start}-${start + chunk.size - 1}/${videoSize}`
+                },
+                body: chunk
             });
             const duration = Date.now() - startTime; //#claude
-            log('debug', `Chunk ${chunkIndex} uploaded in ${duration}ms`); //#claude
+            // Server-side share of the round trip (parse, disk, reassemble, total), for slow-upload reports
+            const serverTiming = response.headers.get('Server-Timing');
+            log('debug', `Chunk ${chunkIndex} uploaded in ${duration}ms${serverTiming ? ` (server: ${serverTiming})` : ''}`); //#claude
 
             if (!response.ok) {
                 throw new Error(`Chunk upload failed: ${response.statusText}`);
@@ -129,7 +157,7 @@ const VideoUploader = (function() {
                 log('debug', `Chunk ${chunkIndex} error:`, error.message); //#claude
 
                 await new Promise(resolve => setTimeout(resolve, delay));
-                return uploadChunkWithRetry(sessionId, videoId, chunkIndex, totalChunks, chunk, retryCount + 1);
+                return uploadChunkWithRetry(sessionId, videoId, chunkIndex, totalChunks, chunk, videoSize, retryCount + 1);
             } else {
                 log('error', `Chunk ${chunkIndex} failed after ${MAX_RETRIES} retries`); //#claude
                 log('debug', 'Final error:', error); //#claude
@@ -154,37 +182,69 @@ const VideoUploader = (function() {
             log('info', `   Total chunks: ${totalChunks}`); //#claude
             log('debug', `   Chunk size: ${(CHUNK_SIZE / 1024).toFixed(0)}KB`); //#claude
 
-            let chunkIndex = 0;
-            let totalBytesUploaded = 0; //#claude
-
-            // Upload each chunk sequentially
-            for (const chunk of chunkBlob(blob, CHUNK_SIZE)) {
-                const chunkStartTime = Date.now(); //#claude
-                const result = await uploadChunkWithRetry(sessionId, videoId, chunkIndex, totalChunks, chunk);
-                const chunkDuration = Date.now() - chunkStartTime; //#claude
-                totalBytesUploaded += chunk.size; //#claude
-
-                // Update progress
-                const progress = ((chunkIndex + 1) / totalChunks) * 100;
-                const avgSpeed = (totalBytesUploaded / 1024) / ((Date.now() - startTime) / 1000); //#claude
-                //#claude
-                if (onProgress) {
-                    onProgress(progress, chunkIndex + 1, totalChunks);
-                }
-
-                log('info', `   Chunk ${chunkIndex + 1}/${totalChunks} uploaded (${progress.toFixed(1)}%) - ${chunkDuration}ms`); //#claude
-                log('debug', `   Average speed: ${avgSpeed.toFixed(1)} KB/s`); //#claude
+            // Resuming an interrupted upload (same videoId): send only the chunks the server lacks
+            const { pending: pendingChunks, filePath } = await getPendingChunks(sessionId, videoId, totalChunks);
+            if (filePath) {
+                log('success', `Video already uploaded: ${filePath}`); //#claude
+                return { status: 'video_complete', video_id: videoId, file_path: filePath };
+            }
+            if (pendingChunks.length < totalChunks) {
+                log('info', `   Resuming: ${totalChunks - pendingChunks.length}/${totalChunks} chunks already on server`); //#claude
+            }
 
-                // Check if video is complete
-                if (result.status === 'video_complete') {
-                    const totalDuration = Date.now() - startTime; //#claude
-                    log('success', `Video upload complete: ${result.file_path}`); //#claude
-                    log('info', `   Total time: ${(totalDuration / 1000).toFixed(1)}s`); //#claude
-                    log('info', `   Average speed: ${avgSpeed.toFixed(1)} KB/s`); //#claude
-                    return result;
+            let totalBytesUploaded = 0; //#claude
+            let done = totalChunks - pendingChunks.length;
+            let next = 0;
+            let completeResult = null;
+            let failed = false;
+
+            // UPLOAD_CONCURRENCY streams take the pending chunks in order; the server
+            // completes the video once, on whichever chunk arrives last
+            async function uploadStream() {
+                while (!failed && next < pendingChunks.length) {
+                    const chunkIndex = pendingChunks[next++];
+                    const chunk = blob.slice(chunkIndex * CHUNK_SIZE, (chunkIndex + 1) * CHUNK_SIZE);
+                    const chunkStartTime = Date.now(); //#claude
+                    let result;
+                    try {
+                        result = await uploadChunkWithRetry(sessionId, videoId, chunkIndex, totalChunks, chunk, blob.size);
+                    } catch (error) {
+                        failed = true; // Stop the other streams taking new chunks
+                        throw error;
+                    }
+                    const chunkDuration = Date.now() - chunkStartTime; //#claude
+                    totalBytesUploaded += chunk.size; //#claude
+
+                    // Update progress
+                    done++;
+                    const progress = (done / totalChunks) * 100;
+                    const avgSpeed = (totalBytesUploaded / 1024) / ((Date.now() - startTime) / 1000); //#claude
+                    //#claude
+                    if (onProgress) {
+                        onProgress(progress, done, totalChunks);
+                    }
+
+                    log('info', `   Chunk ${chunkIndex + 1}/${totalChunks} uploaded (${progress.toFixed(1)}%) - ${chunkDuration}ms`); //#claude
+                    log('debug', `   Average speed: ${avgSpeed.toFixed(1)} KB/s`); //#claude
+
+                    if (result.status === 'video_complete') {
+                        completeResult = result;
+                    }
                 }
+            }
 
-                chunkIndex++;
+            const streams = Math.min(UPLOAD_CONCURRENCY, pendingChunks.length);
+            log('debug', `   Parallel streams: ${streams}`); //#claude
+            await Promise.all(Array.from({ length: streams }, uploadStream));
+
+            // Check if video is complete
+            if (completeResult) {
+                const totalDuration = Date.now() - startTime; //#claude
+                const avgSpeed = (totalBytesUploaded / 1024) / (totalDuration / 1000); //#claude
+                log('success', `Video upload complete: ${completeResult.file_path}`); //#claude
+                log('info', `   Total time: ${(totalDuration / 1000).toFixed(1)}s`); //#claude
+                log('info', `   Average speed: ${avgSpeed.toFixed(1)} KB/s`); //#claude
+                return completeResult;
             }
 
             throw new Error('Upload completed but video not marked as complete');
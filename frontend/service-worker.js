@@ -1,7 +1,7 @@
 // Minimal Service Worker for PWA Installation
-// Version: 1.0.88 - V88: PWA detection (displayMode: 'pwa' vs 'browser')
+// Version: 1.0.95 - V95: Uploader PUTs chunks as raw bodies (Content-Range)
 
-const CACHE_NAME = 'facial-data-v88';
+const CACHE_NAME = 'facial-data-v95';
 const urlsToCache = [
   '/',
   '/index.html',